@@ -8,17 +8,66 @@ JINA_API_KEY = ""  # 填入你的Jina.ai API密钥
 OPENAI_API_KEY = ""  # 填入你的OpenAI API密钥
 
 # 提取器配置
-DEFAULT_EXTRACTOR = "firecrawl"  # 可选: "firecrawl", "jina", "combined"
+DEFAULT_EXTRACTOR = "firecrawl"  # 可选: "firecrawl", "jina", "local", "combined"
+LOCAL_WORKERS = None  # local提取器的工作进程数，None表示CPU核数
+COMBINED_EXTRACTORS = ["firecrawl", "jina"]  # combined提取器的主提取器和后备提取器
+HEDGE_DELAY = 2.0  # 延迟样本不足时启动后备提取器的等待时间(秒)
+HEDGE_PERCENTILE = 95  # 以主提取器延迟的该百分位数作为对冲截止时间
 
 # LLM配置
-LLM_PROVIDER = "openai"  # 可选: "openai", "azure", "local"
+# LLM提供者，可选: "openai", "azure", "local"（本地OpenAI兼容服务）, "rules"（规则优化，不调用LLM）
+LLM_PROVIDER = "openai"
+LLM_BASE_URL = None  # LLM API地址，local默认为http://127.0.0.1:8080/v1
+LLM_FALLBACK = None  # LLM请求失败时的后备优化方式，可选: "rules"
+LLM_TRIAGE = False  # 是否先分析markdown质量，规范的文档跳过优化，只有格式问题的按规则修复
+LLM_TRIAGE_THRESHOLD = 0.8  # 质量分低于该值且有表格、链接或重复内容问题时才调用LLM
 LLM_MODEL = "gpt-4"  # 模型名称
 LLM_TEMPERATURE = 0.1  # 温度参数，越低输出越确定
+LLM_CHUNK_TOKENS = 6000  # 长文档分块优化的token预算，0表示禁用分块
+LLM_CHUNK_CONCURRENCY = 4  # 分块并发优化的最大并发数
+LLM_CONCURRENCY = 8  # LLM最大并发请求数
+LLM_RPM = None  # LLM每分钟请求数上限，None表示不限制
+LLM_TPM = None  # LLM每分钟token数上限，None表示不限制
+LLM_SYSTEM_PROMPT = None  # 自定义系统提示词，None表示使用内置提示词；所有请求共用，作为可缓存的固定前缀
+LLM_HTML_MAX_CHARS = 20000  # 裁剪后附带给LLM的HTML最大字符数，0表示不限制
 
 # 处理配置
 MAX_URLS_PER_BATCH = 10  # 批处理URL数量上限
+MAX_BATCH_JOBS = 4  # 同时运行的Firecrawl批处理任务数
+BATCH_JOB_TIMEOUT = 600  # 单个批处理任务的最长等待时间(秒)
 TIMEOUT = 30  # API请求超时时间(秒)
 RETRY_COUNT = 3  # 失败重试次数
+RETRY_BASE_DELAY = 0.5  # 重试退避的基础时间(秒)，按指数增长并加入随机抖动
+RETRY_MAX_DELAY = 30  # 单次重试退避的最长时间(秒)
+RETRY_BUDGET_RATIO = 0.2  # 重试预算：重试请求数最多为新请求数的该比例
+MAX_RETRY_AFTER = 60  # 可接受的Retry-After上限(秒)，超过时放弃重试并熔断
+CIRCUIT_FAILURE_THRESHOLD = 0.5  # 熔断失败率阈值
+CIRCUIT_MIN_REQUESTS = 10  # 计算失败率前至少需要的请求数
+CIRCUIT_COOLDOWN = 5  # 熔断器初始冷却时间(秒)，探测失败时加倍
+CIRCUIT_MAX_COOLDOWN = 120  # 熔断器最大冷却时间(秒)
+MAX_CONNECTIONS = 100  # 异步连接池总连接数上限
+MAX_CONNECTIONS_PER_HOST = 20  # 异步连接池单个主机连接数上限
+MAX_CONCURRENCY = 50  # 异步批量提取的最大并发数
+INGEST_MAX_PAGE_SIZE = 10 * 1024 * 1024  # 离线读取语料时单个页面的大小上限(字节)
+
+# 缓存配置
+EXTRACTOR_CACHE_DIR = "./.cache/extractor"  # 提取结果缓存目录
+EXTRACTOR_CACHE_TTL = None  # 提取结果缓存有效期(秒)，None表示永不过期
+EXTRACTOR_CACHE_MAX_SIZE = 1024 * 1024 * 1024  # 提取结果缓存总大小上限(字节)，0表示不限制
+LLM_CACHE_PATH = "./.cache/llm.sqlite3"  # LLM响应缓存数据库路径
+
+# 指标配置
+METRICS_FILE = None  # 运行结束时写出Prometheus文本格式指标的文件路径
+METRICS_PORT = None  # 运行期间提供/metrics端点的端口
+METRICS_HOST = "127.0.0.1"  # /metrics端点的监听地址，0.0.0.0表示所有网卡
+
+# PDF解析对比应用配置
+PDF_WORKERS = None  # 逐页提取文本的工作进程数，None表示CPU核数
+PDF_PAGES_PER_TASK = 16  # 每个任务提取的页数，页数不超过该值的PDF在当前进程内提取
+PDF_JOB_WORKERS = 2  # 后台解析任务的工作线程数
+PDF_QUEUE_SIZE = 16  # 等待中的上传数上限，超过时返回503
+PDF_PAGE_WINDOW = 5  # 上传后预先解析的首屏页数，其余页面在分页查看时按需解析
+PREFERENCE_DB = "./results/preferences.sqlite3"  # 上传记录、工具输出和用户投票的SQLite数据库路径
 
 # 输出配置
 OUTPUT_DIR = "./output"  # 输出目录
@@ -0,0 +1,7 @@
+"""
+评估模块
+"""
+from src.benchmark.harness import run_benchmark
+from src.benchmark.mock_server import MockServer
+
+__all__ = ["MockServer", "run_benchmark"]
@@ -0,0 +1,61 @@
+"""
+性能基准测试命令行入口
+"""
+import argparse
+import json
+
+from src.benchmark.harness import SCENARIOS, run_benchmark
+
+
+def main():
+    """命令行入口函数"""
+    parser = argparse.ArgumentParser(description="Web Benchmark Agent - 本地模拟服务性能基准测试")
+    parser.add_argument("--urls", type=int, default=100, help="URL数量")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="batch", help="基准测试场景")
+    parser.add_argument(
+        "--extractor", choices=["firecrawl", "jina"], default="firecrawl", help="使用的提取器"
+    )
+    parser.add_argument("--no-optimize", action="store_true", help="batch场景禁用LLM优化")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟服务响应延迟(秒)")
+    parser.add_argument("--llm-latency", type=float, help="模拟LLM响应延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务错误率")
+    parser.add_argument("--payload-size", type=int, default=20000, help="每个页面的大致字节数")
+    parser.add_argument(
+        "--extract-concurrency", type=int, default=16, help="batch场景提取阶段并发数"
+    )
+    parser.add_argument(
+        "--optimize-concurrency", type=int, default=4, help="batch场景LLM优化阶段并发数"
+    )
+    parser.add_argument("--output", help="将报告以JSON格式写入文件")
+
+    args = parser.parse_args()
+
+    kwargs = {}
+    if args.scenario == "batch":
+        kwargs.update(
+            extract_concurrency=args.extract_concurrency,
+            optimize_concurrency=args.optimize_concurrency,
+        )
+
+    report = run_benchmark(
+        num_urls=args.urls,
+        scenario=args.scenario,
+        extractor_type=args.extractor,
+        optimize=not args.no_optimize,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        payload_size=args.payload_size,
+        llm_latency=args.llm_latency,
+        **kwargs,
+    )
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
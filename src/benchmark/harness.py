@@ -0,0 +1,181 @@
+"""
+性能基准测试模块，在本地模拟服务上运行批处理和异步提取并统计性能指标
+"""
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Union
+
+from src.benchmark.mock_server import MockServer
+from src.utils.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ["batch", "extract_async"]
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存(MB)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS返回字节，Linux返回KB
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def _summarize(
+    scenario: str,
+    latencies: List[float],
+    elapsed: float,
+    num_urls: int,
+    server_stats: Dict[str, int],
+) -> Dict[str, Union[str, float]]:
+    """汇总基准测试结果"""
+    return {
+        "scenario": scenario,
+        "urls": num_urls,
+        "elapsed_s": round(elapsed, 3),
+        "urls_per_s": round(num_urls / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "requests": server_stats.get("requests", 0),
+        "server_errors": server_stats.get("errors", 0),
+        "bytes_sent": server_stats.get("bytes_in", 0),
+        "bytes_received": server_stats.get("bytes_out", 0),
+    }
+
+
+def _run_batch(urls: List[str], extractor_type: str, **kwargs):
+    """
+    通过convert_batch_urls运行完整批处理，每个URL的延迟由任务日志中
+    started到done/failed的时间差得到
+
+    Returns:
+        (每个URL的延迟列表, 总耗时)
+    """
+    from src.main import convert_batch_urls
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        convert_batch_urls(
+            urls,
+            extractor_type=extractor_type,
+            output_dir=output_dir,
+            collect_results=False,
+            **kwargs,
+        )
+        elapsed = time.perf_counter() - start
+
+        started: Dict[str, float] = {}
+        latencies = []
+        with open(os.path.join(output_dir, "journal.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["stage"] == "started":
+                    started[record["url"]] = record["ts"]
+                elif record["stage"] in ("done", "failed"):
+                    latencies.append(record["ts"] - started[record["url"]])
+
+    return latencies, elapsed
+
+
+def _run_extract_async(urls: List[str], extractor_type: str, **kwargs):
+    """
+    直接运行提取器的异步接口，记录每次extract_async调用的延迟
+
+    Returns:
+        (每个URL的延迟列表, 总耗时)
+    """
+    from src.main import get_extractor
+
+    extractor = get_extractor(extractor_type, use_cache=False, **kwargs)
+    semaphore = asyncio.Semaphore(extractor.max_concurrency)
+    latencies: List[float] = []
+
+    async def timed(url: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await extractor.extract_async(url)
+            latencies.append(time.perf_counter() - start)
+
+    async def run():
+        try:
+            await asyncio.gather(*(timed(url) for url in urls))
+        finally:
+            await extractor.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return latencies, time.perf_counter() - start
+
+
+def run_benchmark(
+    num_urls: int = 100,
+    scenario: str = "batch",
+    extractor_type: str = "firecrawl",
+    optimize: bool = True,
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    payload_size: int = 20000,
+    llm_latency: Optional[float] = None,
+    **kwargs,
+) -> Dict[str, Union[str, float]]:
+    """
+    启动本地模拟服务并运行一个基准测试场景
+
+    Args:
+        num_urls: URL数量
+        scenario: 场景，"batch"为convert_batch_urls完整批处理，
+            "extract_async"为提取器异步接口
+        extractor_type: 提取器类型
+        optimize: batch场景是否进行LLM优化
+        latency: 模拟服务的响应延迟(秒)
+        jitter: 延迟抖动(秒)
+        error_rate: 模拟服务的错误率
+        payload_size: 每个页面的大致字节数
+        llm_latency: LLM接口的响应延迟(秒)
+        **kwargs: 传给convert_batch_urls或提取器的其他参数
+
+    Returns:
+        包含吞吐量、延迟百分位、峰值内存和传输字节数的报告
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"不支持的基准测试场景: {scenario}")
+
+    urls = [f"https://bench.local/page/{i}" for i in range(num_urls)]
+
+    with MockServer(
+        latency=latency,
+        jitter=jitter,
+        error_rate=error_rate,
+        payload_size=payload_size,
+        llm_latency=llm_latency,
+    ) as server:
+        base_url = (
+            f"{server.url}/v1/reader"
+            if extractor_type == "jina"
+            else f"{server.url}/v1"
+        )
+        kwargs.update(
+            api_key="benchmark",
+            base_url=base_url,
+            llm_base_url=f"{server.url}/v1",
+            retry_count=kwargs.get("retry_count", 3),
+        )
+
+        if scenario == "batch":
+            kwargs.update(use_cache=False, use_llm_cache=False, optimize=optimize)
+            latencies, elapsed = _run_batch(urls, extractor_type, **kwargs)
+        else:
+            latencies, elapsed = _run_extract_async(urls, extractor_type, **kwargs)
+
+        report = _summarize(scenario, latencies, elapsed, num_urls, server.stats())
+
+    logger.info(f"基准测试完成: {report}")
+    return report
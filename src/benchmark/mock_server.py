@@ -0,0 +1,298 @@
+"""
+本地模拟服务模块，模拟Firecrawl、Jina和OpenAI接口，用于性能基准测试
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+import uuid
+from typing import Dict, Optional
+
+import requests
+from aiohttp import web
+
+
+def make_payload(url: str, size: int) -> Dict[str, str]:
+    """
+    生成指定大小的模拟页面内容
+
+    Args:
+        url: 页面URL
+        size: markdown的大致字节数
+
+    Returns:
+        包含markdown、html和title的字典
+    """
+    paragraph = (
+        "Web benchmark agent converts HTML pages into clean markdown. "
+        "This paragraph is generated by the local mock server. "
+    )
+    sections = []
+    html_sections = []
+    length = 0
+    i = 0
+    while length < size:
+        text = paragraph * 4
+        sections.append(f"## Section {i}\n\n{text}\n\n[link {i}]({url}#s{i})")
+        html_sections.append(
+            f'<section class="s{i}"><h2>Section {i}</h2><p>{text}</p>'
+            f'<a href="{url}#s{i}">link {i}</a></section>'
+        )
+        length += len(sections[-1]) + 2
+        i += 1
+
+    title = f"Mock page {url}"
+    return {
+        "title": title,
+        "markdown": f"# {title}\n\n" + "\n\n".join(sections),
+        "html": (
+            f"<html><head><title>{title}</title><script>track()</script></head>"
+            f"<body><nav>menu</nav><main>{''.join(html_sections)}</main></body></html>"
+        ),
+    }
+
+
+class MockServer:
+    """
+    模拟服务，在独立进程中运行，避免影响被测进程的内存和CPU统计
+
+    支持配置响应延迟、抖动、错误率和页面大小，并统计请求数和收发字节数
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        payload_size: int = 20000,
+        llm_latency: Optional[float] = None,
+        seed: int = 0,
+    ):
+        """
+        初始化模拟服务
+
+        Args:
+            latency: 提取接口的平均响应延迟(秒)
+            jitter: 延迟的随机抖动范围(秒)
+            error_rate: 返回错误(503/429)的概率
+            payload_size: 每个页面markdown的大致字节数
+            llm_latency: LLM接口的平均响应延迟(秒)，默认与latency相同
+            seed: 随机数种子
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_size = payload_size
+        self.llm_latency = latency if llm_latency is None else llm_latency
+        self.seed = seed
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+
+    @property
+    def url(self) -> str:
+        """服务地址"""
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 10.0):
+        """
+        在子进程中启动服务并等待就绪
+
+        Args:
+            timeout: 等待就绪的最长时间(秒)
+        """
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve,
+            args=(
+                self.port,
+                self.latency,
+                self.jitter,
+                self.error_rate,
+                self.payload_size,
+                self.llm_latency,
+                self.seed,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{self.url}/__stats", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.05)
+        self.stop()
+        raise RuntimeError("模拟服务启动超时")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取服务端统计
+
+        Returns:
+            包含requests、errors、bytes_in、bytes_out的字典
+        """
+        stats: Dict[str, int] = requests.get(f"{self.url}/__stats", timeout=5).json()
+        return stats
+
+    def reset_stats(self):
+        """清零服务端统计"""
+        requests.post(f"{self.url}/__stats/reset", timeout=5)
+
+    def stop(self):
+        """停止服务"""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
+
+    def __enter__(self) -> "MockServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _serve(port, latency, jitter, error_rate, payload_size, llm_latency, seed):
+    """子进程入口"""
+    web.run_app(
+        _build_app(latency, jitter, error_rate, payload_size, llm_latency, seed),
+        host="127.0.0.1",
+        port=port,
+        print=None,
+        handle_signals=True,
+    )
+
+
+def _build_app(latency, jitter, error_rate, payload_size, llm_latency, seed):
+    """构建模拟服务应用"""
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0}
+    jobs: Dict[str, dict] = {}
+    # 已见过的系统提示词，模拟服务端的提示词前缀缓存
+    prompt_prefixes = set()
+
+    async def delay(base: float):
+        await asyncio.sleep(max(0.0, base + rng.uniform(-jitter, jitter)))
+
+    def respond(data: dict, status: int = 200, headers=None) -> web.Response:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        stats["bytes_out"] += len(body)
+        return web.Response(
+            body=body, status=status, content_type="application/json", headers=headers
+        )
+
+    def fail(status: int) -> web.Response:
+        stats["errors"] += 1
+        return respond(
+            {"success": False, "error": "mock error"}, status, {"Retry-After": "0"}
+        )
+
+    @web.middleware
+    async def count(request, handler):
+        body = await request.read()
+        if not request.path.startswith("/__stats"):
+            stats["requests"] += 1
+            stats["bytes_in"] += len(body)
+        return await handler(request)
+
+    async def firecrawl_scrape(request):
+        data = await request.json()
+        await delay(latency)
+        if rng.random() < error_rate:
+            return fail(503)
+        return respond(
+            {"success": True, "data": make_payload(data["url"], payload_size)}
+        )
+
+    async def firecrawl_batch(request):
+        data = await request.json()
+        if rng.random() < error_rate:
+            return fail(503)
+        job_id = uuid.uuid4().hex
+        jobs[job_id] = {"urls": data["urls"], "ready_at": time.monotonic() + latency}
+        return respond({"success": True, "data": {"jobId": job_id}})
+
+    async def firecrawl_job(request):
+        job = jobs.get(request.match_info["job_id"])
+        if job is None:
+            return respond({"success": False, "error": "job not found"}, 404)
+        if time.monotonic() < job["ready_at"]:
+            return respond({"data": {"status": "scraping", "results": []}})
+        results = [dict(make_payload(u, payload_size), url=u) for u in job["urls"]]
+        return respond({"data": {"status": "completed", "results": results}})
+
+    async def jina_reader(request):
+        data = await request.json()
+        await delay(latency)
+        if rng.random() < error_rate:
+            return fail(503)
+        payload = make_payload(data["url"], payload_size)
+        return respond(
+            {
+                "content": payload["markdown"],
+                "html": payload["html"],
+                "title": payload["title"],
+            }
+        )
+
+    async def chat_completions(request):
+        data = await request.json()
+        await delay(llm_latency)
+        if rng.random() < error_rate:
+            return fail(429)
+        prompt = data["messages"][-1]["content"]
+        # 返回提示词中的markdown，模拟优化结果
+        parts = prompt.split("```")
+        content = parts[1].strip("\n") if len(parts) > 1 else prompt
+        prompt_tokens = sum(len(m["content"]) for m in data["messages"]) // 4
+        completion_tokens = len(content) // 4
+        prefix = data["messages"][0]["content"] if len(data["messages"]) > 1 else ""
+        cached_tokens = len(prefix) // 4 if prefix in prompt_prefixes else 0
+        prompt_prefixes.add(prefix)
+        return respond(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": data.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            }
+        )
+
+    async def get_stats(request):
+        return web.json_response(stats)
+
+    async def reset_stats(request):
+        for key in stats:
+            stats[key] = 0
+        return web.json_response(stats)
+
+    app = web.Application(middlewares=[count], client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/v1/scrape", firecrawl_scrape)
+    app.router.add_post("/v1/batch/scrape", firecrawl_batch)
+    app.router.add_get("/v1/jobs/{job_id}", firecrawl_job)
+    app.router.add_post("/v1/reader", jina_reader)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/__stats", get_stats)
+    app.router.add_post("/__stats/reset", reset_stats)
+    return app
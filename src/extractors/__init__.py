@@ -2,7 +2,15 @@
 提取器模块
 """
 from src.extractors.base import BaseExtractor
+from src.extractors.combined import CombinedExtractor
 from src.extractors.firecrawl import FirecrawlExtractor
 from src.extractors.jina import JinaExtractor
+from src.extractors.local import LocalExtractor
 
-__all__ = ["BaseExtractor", "FirecrawlExtractor", "JinaExtractor"]
+__all__ = [
+    "BaseExtractor",
+    "CombinedExtractor",
+    "FirecrawlExtractor",
+    "JinaExtractor",
+    "LocalExtractor",
+]
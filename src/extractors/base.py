@@ -1,8 +1,29 @@
 """
 提取器基类模块
 """
+import asyncio
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+import requests
+from requests.exceptions import RequestException
+
+from src.extractors.resilience import (
+    BackendResilience,
+    get_backend_resilience,
+    parse_retry_after,
+)
+from src.extractors.transport import (
+    RETRYABLE_STATUS,
+    AsyncTransport,
+    TransportError,
+    get_shared_transport,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class BaseExtractor(ABC):
@@ -10,6 +31,9 @@ class BaseExtractor(ABC):
     提取器基类，定义所有提取器的通用接口
     """
 
+    # 提取器名称，用于缓存键和元数据
+    name = "base"
+
     def __init__(self, api_key: Optional[str] = None, **kwargs):
         """
         初始化提取器
@@ -20,6 +44,126 @@ class BaseExtractor(ABC):
         """
         self.api_key = api_key
         self.config = kwargs
+        self.max_concurrency = kwargs.get("max_concurrency", 50)
+
+        # 异步传输层，默认在相同配置的提取器之间共享连接池
+        self.transport: AsyncTransport = kwargs.get(
+            "transport"
+        ) or get_shared_transport(
+            timeout=kwargs.get("timeout", 30),
+            retry_count=kwargs.get("retry_count", 3),
+            max_connections=kwargs.get("max_connections", 100),
+            max_connections_per_host=kwargs.get("max_connections_per_host", 20),
+        )
+
+        # 重试、重试预算和熔断策略，同一后端的提取器共享
+        self.resilience: BackendResilience = kwargs.get(
+            "resilience"
+        ) or get_backend_resilience(
+            self.name,
+            retry_count=kwargs.get("retry_count", 3),
+            base_delay=kwargs.get("retry_base_delay", 0.5),
+            max_delay=kwargs.get("retry_max_delay", 30.0),
+            max_retry_after=kwargs.get("max_retry_after", 60.0),
+            retry_budget_ratio=kwargs.get("retry_budget_ratio", 0.2),
+            failure_threshold=kwargs.get("circuit_failure_threshold", 0.5),
+            min_requests=kwargs.get("circuit_min_requests", 10),
+            cooldown=kwargs.get("circuit_cooldown", 5.0),
+            max_cooldown=kwargs.get("circuit_max_cooldown", 120.0),
+            probe_timeout=kwargs.get("timeout", 30),
+            scope=kwargs.get("base_url"),
+        )
+
+    def cache_options(self) -> dict:
+        """
+        返回影响提取结果的请求选项，用于计算缓存键
+
+        Returns:
+            请求选项字典
+        """
+        return {}
+
+    def _post_json(
+        self,
+        endpoint: str,
+        payload: dict,
+        headers: Dict[str, str],
+        stats: Dict[str, int],
+        validate: Optional[Callable[[Any], Optional[str]]] = None,
+    ) -> Any:
+        """
+        发送同步POST请求并解析JSON响应，按后端的弹性策略重试
+
+        Args:
+            endpoint: 请求地址
+            payload: JSON请求体
+            headers: 请求头
+            stats: 统计字典，累加retries、bytes_out和bytes_in
+            validate: 检查响应数据的函数，返回错误信息时按可重试的失败处理
+
+        Returns:
+            解析后的JSON数据
+
+        Raises:
+            TransportError: 所有尝试均失败、重试被放弃或熔断器打开
+        """
+        resilience = self.resilience
+        for key in ("retries", "bytes_out", "bytes_in"):
+            stats.setdefault(key, 0)
+        body_size = len(json.dumps(payload).encode("utf-8"))
+        status = None
+
+        resilience.on_request()
+        attempt = 0
+        while True:
+            if not resilience.allow_request():
+                raise TransportError(f"{resilience.name}熔断中，快速失败", status)
+            if attempt:
+                stats["retries"] += 1
+            stats["bytes_out"] += body_size
+
+            retry_after = None
+            try:
+                response = requests.post(
+                    endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=self.config.get("timeout", 30),
+                )
+                stats["bytes_in"] += len(response.content)
+                response.raise_for_status()
+                data = response.json()
+                resilience.on_success()
+
+                error = validate(data) if validate else None
+                if error is None:
+                    return data
+                status = None
+            except RequestException as e:
+                failed = getattr(e, "response", None)
+                status = getattr(failed, "status_code", None)
+                if status is not None and status not in RETRYABLE_STATUS:
+                    # 不可重试的状态码直接失败，后端本身是正常的
+                    resilience.on_success()
+                    raise TransportError(str(e), status)
+                if failed is not None:
+                    retry_after = parse_retry_after(failed.headers.get("Retry-After"))
+                resilience.on_failure(retry_after)
+                error = str(e)
+            except BaseException:
+                # 请求没有结果，归还熔断器的探测名额
+                resilience.on_abandon()
+                raise
+
+            logger.error(
+                f"{self.name} API请求异常 (尝试 {attempt+1}/{resilience.retry_count}): "
+                f"{error}"
+            )
+            delay = resilience.next_delay(attempt, retry_after)
+            if delay is None:
+                raise TransportError(error, status)
+            time.sleep(delay)
+            attempt += 1
 
     @abstractmethod
     def extract(self, url: str) -> Dict[str, Union[str, dict]]:
@@ -53,6 +197,20 @@ class BaseExtractor(ABC):
         """
         pass
 
+    async def extract_page_async(
+        self, page: Dict[str, Any]
+    ) -> Dict[str, Union[str, dict]]:
+        """
+        从已获取的页面中异步提取内容，默认按页面URL重新提取
+
+        Args:
+            page: 包含url、html和可选metadata的页面
+
+        Returns:
+            提取结果
+        """
+        return await self.extract_async(page["url"])
+
     @abstractmethod
     def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
         """
@@ -65,3 +223,48 @@ class BaseExtractor(ABC):
             提取结果列表
         """
         pass
+
+    async def extract_batch_async(
+        self, urls: List[str]
+    ) -> List[Dict[str, Union[str, dict]]]:
+        """
+        异步批量从URL中提取内容，并发数受max_concurrency限制
+
+        Args:
+            urls: 网页URL列表
+
+        Returns:
+            提取结果列表，顺序与urls一致
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _extract(url: str) -> Dict[str, Union[str, dict]]:
+            async with semaphore:
+                return await self.extract_async(url)
+
+        return list(await asyncio.gather(*(_extract(url) for url in urls)))
+
+    async def extract_batch_stream(
+        self, urls: List[str]
+    ) -> AsyncIterator[Dict[str, Union[str, dict]]]:
+        """
+        异步批量提取，按完成顺序逐个产出结果
+
+        Args:
+            urls: 网页URL列表
+
+        Yields:
+            提取结果
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _extract(url: str) -> Dict[str, Union[str, dict]]:
+            async with semaphore:
+                return await self.extract_async(url)
+
+        for future in asyncio.as_completed([_extract(url) for url in urls]):
+            yield await future
+
+    async def aclose(self):
+        """关闭异步传输层，释放连接池"""
+        await self.transport.close()
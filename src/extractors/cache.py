@@ -0,0 +1,317 @@
+"""
+提取结果缓存模块，将提取结果按内容寻址压缩保存在本地磁盘
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+from src.extractors.base import BaseExtractor
+from src.utils.metrics import STAGE_EXTRACT, stage_metrics
+
+logger = logging.getLogger(__name__)
+
+# 缓存总大小的默认上限(字节)
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class ExtractorCache:
+    """
+    基于磁盘的提取结果缓存
+
+    缓存键由URL、提取器名称和请求选项计算的sha256哈希构成，
+    每条记录以zlib压缩的JSON文件保存。支持过期时间(TTL)，
+    并在总大小超过上限时按最近最少使用(LRU)顺序淘汰
+    """
+
+    SUFFIX = ".json.z"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = DEFAULT_MAX_SIZE,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 记录的有效期(秒)，为None或0时永不过期
+            max_size: 缓存总大小上限(字节)，默认为1GB，为None或0时不限制
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl or None
+        self.max_size = max_size or None
+        self._lock = threading.Lock()
+        # 键 -> 文件大小，按最近访问时间从旧到新排列
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(url: str, extractor: str, options: Optional[dict] = None) -> str:
+        """
+        计算缓存键
+
+        Args:
+            url: 网页URL
+            extractor: 提取器名称
+            options: 影响提取结果的请求选项
+
+        Returns:
+            十六进制sha256哈希
+        """
+        payload = json.dumps(
+            {"url": url, "extractor": extractor, "options": options or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """获取缓存键对应的文件路径"""
+        return os.path.join(self.cache_dir, key[:2], key + self.SUFFIX)
+
+    def _load_index(self):
+        """扫描缓存目录，按文件修改时间重建LRU索引"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[: -len(self.SUFFIX)], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_size += size
+
+    def _remove(self, key: str):
+        """删除一条记录（调用方需持有锁）"""
+        self._total_size -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的提取结果，未命中或已过期时返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                record = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+        with self._lock:
+            if self.ttl and time.time() - record.get("created_at", 0) > self.ttl:
+                self._remove(key)
+                return None
+
+            # 更新访问时间，用于LRU淘汰
+            if key in self._index:
+                self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        result: Optional[Dict[str, Any]] = record.get("result")
+        return result
+
+    def set(self, key: str, result: Dict[str, Union[str, dict]]):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            result: 提取结果
+        """
+        record = {"created_at": time.time(), "result": result}
+        data = zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入提取缓存失败: {str(e)}")
+            return
+
+        with self._lock:
+            self._total_size -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_size += len(data)
+            self._evict()
+
+    def _evict(self):
+        """淘汰最近最少使用的记录，直到总大小不超过上限（调用方需持有锁）"""
+        if not self.max_size:
+            return
+        while self._total_size > self.max_size and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+
+    @property
+    def size(self) -> int:
+        """缓存当前占用的字节数"""
+        return self._total_size
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class CachedExtractor(BaseExtractor):
+    """
+    为任意提取器增加磁盘缓存的包装器，命中缓存时不再请求远程API
+    """
+
+    def __init__(self, extractor: BaseExtractor, cache: ExtractorCache):
+        """
+        初始化缓存提取器
+
+        Args:
+            extractor: 被包装的提取器
+            cache: 缓存实例
+        """
+        super().__init__(
+            extractor.api_key,
+            transport=extractor.transport,
+            max_concurrency=extractor.max_concurrency,
+        )
+        self.extractor = extractor
+        self.cache = cache
+        self.name = extractor.name
+
+    def _key(self, url: str) -> str:
+        """计算URL对应的缓存键"""
+        return self.cache.make_key(
+            url, self.extractor.name, self.extractor.cache_options()
+        )
+
+    @staticmethod
+    def _cacheable(result: Dict[str, Any]) -> bool:
+        """只缓存成功的提取结果"""
+        return bool(result.get("markdown")) and not result.get("metadata", {}).get(
+            "error"
+        )
+
+    @staticmethod
+    def _mark_hit(result: Dict[str, Any]) -> Dict[str, Any]:
+        """在元数据中标记缓存命中，缓存中保存的原始请求指标不再适用"""
+        result["metadata"] = dict(
+            result.get("metadata") or {},
+            cache_hit=True,
+            metrics={STAGE_EXTRACT: {"cache_hit": True}},
+        )
+        return result
+
+    @staticmethod
+    def _mark_miss(result: Dict[str, Any]) -> Dict[str, Any]:
+        """在阶段指标中标记缓存未命中"""
+        stage_metrics(result, STAGE_EXTRACT)["cache_hit"] = False
+        return result
+
+    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        从缓存或被包装的提取器中提取内容
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            提取结果
+        """
+        key = self._key(url)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._mark_hit(cached)
+
+        result = self.extractor.extract(url)
+        if self._cacheable(result):
+            self.cache.set(key, result)
+        return self._mark_miss(result)
+
+    async def extract_async(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        异步从缓存或被包装的提取器中提取内容，磁盘读写在线程池中进行
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            提取结果
+        """
+        loop = asyncio.get_running_loop()
+        key = self._key(url)
+        cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None:
+            return self._mark_hit(cached)
+
+        result = await self.extractor.extract_async(url)
+        if self._cacheable(result):
+            await loop.run_in_executor(None, self.cache.set, key, result)
+        return self._mark_miss(result)
+
+    def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
+        """
+        批量提取，只有未命中缓存的URL会交给被包装的提取器
+
+        Args:
+            urls: URL列表
+
+        Returns:
+            提取结果列表，顺序与urls一致
+        """
+        results: List[Optional[Dict[str, Union[str, dict]]]] = []
+        misses = []
+        for url in urls:
+            cached = self.cache.get(self._key(url))
+            if cached is None:
+                misses.append(url)
+                results.append(None)
+            else:
+                results.append(self._mark_hit(cached))
+
+        if misses:
+            fetched: List[Dict[str, Any]] = self.extractor.extract_batch(misses)
+            by_url = {r.get("metadata", {}).get("url"): r for r in fetched}
+            for i, url in enumerate(urls):
+                if results[i] is not None:
+                    continue
+                result = by_url.get(url) or {
+                    "markdown": "",
+                    "html": "",
+                    "metadata": {"error": "批处理结果缺失", "url": url},
+                }
+                if self._cacheable(result):
+                    self.cache.set(self._key(url), result)
+                results[i] = self._mark_miss(result)
+
+        return results  # type: ignore[return-value]
+
+    async def aclose(self):
+        """关闭被包装提取器的异步传输层"""
+        await self.extractor.aclose()
@@ -0,0 +1,223 @@
+"""
+组合提取器模块，对多个提取器发送对冲请求，取最先返回的有效结果
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Any, Dict, List, Union
+
+from src.extractors.base import BaseExtractor
+from src.utils.metrics import STAGE_EXTRACT, percentile, stage_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CombinedExtractor(BaseExtractor):
+    """
+    对冲请求的组合提取器
+
+    先只请求主提取器；主提取器在截止时间内没有返回有效结果时，
+    再依次启动后备提取器，取最先返回非空markdown的结果并取消其余请求。
+    截止时间为主提取器近期延迟的百分位数，样本不足时使用固定的初始值
+    """
+
+    name = "combined"
+
+    def __init__(
+        self,
+        extractors: List[BaseExtractor],
+        hedge_delay: float = 2.0,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+        **kwargs,
+    ):
+        """
+        初始化组合提取器
+
+        Args:
+            extractors: 提取器列表，第一个为主提取器，其余按顺序作为后备
+            hedge_delay: 样本不足时启动后备提取器的等待时间(秒)
+            hedge_percentile: 以主提取器延迟的该百分位数作为截止时间
+            hedge_min_samples: 使用百分位数前至少需要的延迟样本数
+            latency_window: 保留的最近延迟样本数
+            **kwargs: 其他配置参数
+        """
+        if not extractors:
+            raise ValueError("组合提取器至少需要一个提取器")
+        kwargs.setdefault("transport", extractors[0].transport)
+        kwargs.setdefault("max_concurrency", extractors[0].max_concurrency)
+        super().__init__(None, **kwargs)
+        self.extractors = extractors
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = max(1, hedge_min_samples)
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def cache_options(self) -> dict:
+        """返回影响提取结果的请求选项"""
+        return {
+            extractor.name: extractor.cache_options() for extractor in self.extractors
+        }
+
+    def hedge_deadline(self) -> float:
+        """
+        计算启动下一个后备提取器前的等待时间
+
+        Returns:
+            等待时间(秒)
+        """
+        with self._lock:
+            samples = list(self._latencies)
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_delay
+        return percentile(samples, self.hedge_percentile)
+
+    def _observe(self, seconds: float):
+        """记录一次主提取器的延迟"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    @staticmethod
+    def _is_valid(result: Dict[str, Any]) -> bool:
+        """结果是否为非空markdown"""
+        return bool(result.get("markdown")) and not result.get("metadata", {}).get(
+            "error"
+        )
+
+    @staticmethod
+    def _mark(
+        result: Dict[str, Union[str, dict]], launched: int
+    ) -> Dict[str, Union[str, dict]]:
+        """在提取阶段指标中记录发出的请求数和是否对冲"""
+        stats = stage_metrics(result, STAGE_EXTRACT)
+        stats["hedged"] = launched > 1
+        stats["backends"] = launched
+        return result
+
+    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        使用对冲请求从URL提取内容，各提取器的同步请求在线程中执行
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            最先返回的有效结果，全部失败时返回主提取器的结果
+        """
+        pool = ThreadPoolExecutor(len(self.extractors))
+        start = time.perf_counter()
+        futures = {pool.submit(self.extractors[0].extract, url): 0}
+        launched = 1
+        results: Dict[int, Dict[str, Union[str, dict]]] = {}
+        primary_done = False
+
+        try:
+            while futures:
+                timeout = (
+                    self.hedge_deadline() if launched < len(self.extractors) else None
+                )
+                done, _ = wait_futures(
+                    list(futures), timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    index = futures.pop(future)
+                    result = future.result()
+                    if index == 0:
+                        primary_done = True
+                        self._observe(time.perf_counter() - start)
+                    if self._is_valid(result):
+                        return self._mark(result, launched)
+                    results[index] = result
+
+                # 截止时间已过或已完成的请求无效时，启动下一个后备提取器
+                if launched < len(self.extractors):
+                    backup = self.extractors[launched]
+                    logger.info(f"对冲请求: 启动后备提取器{backup.name} {url}")
+                    futures[pool.submit(backup.extract, url)] = launched
+                    launched += 1
+        finally:
+            # 不等待落后的请求
+            pool.shutdown(wait=False)
+            if not primary_done:
+                self._observe(time.perf_counter() - start)
+
+        return self._mark(results.get(0) or results[min(results)], launched)
+
+    async def extract_async(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        使用对冲请求异步从URL提取内容，得到有效结果后取消其余请求
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            最先返回的有效结果，全部失败时返回主提取器的结果
+        """
+        start = time.perf_counter()
+        tasks = {asyncio.ensure_future(self.extractors[0].extract_async(url)): 0}
+        launched = 1
+        results: Dict[int, Dict[str, Union[str, dict]]] = {}
+        primary_done = False
+
+        try:
+            while tasks:
+                timeout = (
+                    self.hedge_deadline() if launched < len(self.extractors) else None
+                )
+                done, _ = await asyncio.wait(
+                    list(tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = tasks.pop(task)
+                    result = task.result()
+                    if index == 0:
+                        primary_done = True
+                        self._observe(time.perf_counter() - start)
+                    if self._is_valid(result):
+                        return self._mark(result, launched)
+                    results[index] = result
+
+                if launched < len(self.extractors):
+                    backup = self.extractors[launched]
+                    logger.info(f"对冲请求: 启动后备提取器{backup.name} {url}")
+                    tasks[asyncio.ensure_future(backup.extract_async(url))] = launched
+                    launched += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            # 主提取器被取消时，已等待的时间是其延迟的下界，同样计入样本，
+            # 避免样本只包含快速返回的请求而使截止时间偏低
+            if not primary_done:
+                self._observe(time.perf_counter() - start)
+
+        return self._mark(results.get(0) or results[min(results)], launched)
+
+    def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
+        """
+        批量从URL提取内容，每个URL独立发送对冲请求
+
+        Args:
+            urls: URL列表
+
+        Returns:
+            提取结果列表，顺序与urls一致
+        """
+
+        async def collect():
+            try:
+                return await self.extract_batch_async(urls)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(collect())
+
+    async def aclose(self):
+        """关闭所有提取器的异步传输层"""
+        for extractor in self.extractors:
+            await extractor.aclose()
@@ -2,15 +2,14 @@
 Firecrawl提取器模块
 """
 import asyncio
-import json
 import logging
 import time
-from typing import Dict, List, Optional, Union
-
-import requests
-from requests.exceptions import RequestException
+from typing import AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import urlsplit, urlunsplit
 
 from src.extractors.base import BaseExtractor
+from src.extractors.transport import TransportError
+from src.utils.metrics import STAGE_EXTRACT, stage_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +19,7 @@ class FirecrawlExtractor(BaseExtractor):
     使用Firecrawl API提取网页内容
     """
 
+    name = "firecrawl"
     BASE_URL = "https://api.firecrawl.dev/v1"
 
     def __init__(self, api_key: Optional[str] = None, **kwargs):
@@ -33,83 +33,87 @@ class FirecrawlExtractor(BaseExtractor):
         super().__init__(api_key, **kwargs)
         self.timeout = kwargs.get("timeout", 30)
         self.retry_count = kwargs.get("retry_count", 3)
+        # 可覆盖API地址，用于代理或本地模拟服务
+        self.base_url = kwargs.get("base_url") or self.BASE_URL
+        # 批处理任务配置
+        self.batch_size = kwargs.get("max_urls_per_batch", 10)
+        self.max_batch_jobs = kwargs.get("max_batch_jobs", 4)
+        self.poll_interval = kwargs.get("poll_interval", 1.0)
+        self.max_poll_interval = kwargs.get("max_poll_interval", 30.0)
+        self.job_timeout = kwargs.get("job_timeout", 600.0)
+
+    def cache_options(self) -> dict:
+        """返回影响提取结果的请求选项"""
+        return {"formats": ["markdown", "html"], "base_url": self.base_url}
+
+    def _headers(self) -> Dict[str, str]:
+        """构建请求头"""
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
 
-    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+    @staticmethod
+    def _build_result(url: str, result_data: dict) -> Dict[str, Union[str, dict]]:
         """
-        使用Firecrawl从URL提取内容
+        将Firecrawl返回的数据转换为统一的结果格式
 
         Args:
             url: 网页URL
+            result_data: Firecrawl返回的单个页面数据
 
         Returns:
             包含markdown和原始HTML的字典
         """
-        endpoint = f"{self.BASE_URL}/scrape"
-
-        for attempt in range(self.retry_count):
-            try:
-                response = requests.post(
-                    endpoint,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}",
-                    },
-                    json={"url": url, "formats": ["markdown", "html"]},
-                    timeout=self.timeout,
-                )
-
-                response.raise_for_status()
-                data = response.json()
-
-                if data.get("success"):
-                    result_data = data.get("data", {})
-                    return {
-                        "markdown": result_data.get("markdown", ""),
-                        "html": result_data.get("html", ""),
-                        "metadata": {
-                            "title": result_data.get("title", ""),
-                            "url": url,
-                            "extractor": "firecrawl",
-                        },
-                    }
-                else:
-                    error_msg = data.get("error", "未知错误")
-                    logger.error(f"Firecrawl提取失败: {error_msg}")
-
-                    # 最后一次尝试失败时返回空结果
-                    if attempt == self.retry_count - 1:
-                        return {
-                            "markdown": "",
-                            "html": "",
-                            "metadata": {"error": error_msg, "url": url},
-                        }
-
-            except RequestException as e:
-                logger.error(
-                    f"Firecrawl API请求异常 (尝试 {attempt+1}/{self.retry_count}): {str(e)}"
-                )
+        return {
+            "markdown": result_data.get("markdown", ""),
+            "html": result_data.get("html", ""),
+            "metadata": {
+                "title": result_data.get("title", ""),
+                "url": url,
+                "extractor": "firecrawl",
+            },
+        }
 
-                # 最后一次尝试失败时返回空结果
-                if attempt == self.retry_count - 1:
-                    return {
-                        "markdown": "",
-                        "html": "",
-                        "metadata": {"error": str(e), "url": url},
-                    }
+    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        使用Firecrawl从URL提取内容
 
-                # 短暂延迟后重试
-                time.sleep(1)
+        Args:
+            url: 网页URL
 
-        # 不应该到达这里，但为安全起见
-        return {
-            "markdown": "",
-            "html": "",
-            "metadata": {"error": "所有请求尝试均失败", "url": url},
-        }
+        Returns:
+            包含markdown和原始HTML的字典
+        """
+        stats: Dict[str, int] = {}
+        try:
+            data = self._post_json(
+                f"{self.base_url}/scrape",
+                {"url": url, "formats": ["markdown", "html"]},
+                self._headers(),
+                stats,
+                validate=self._check_success,
+            )
+            result = self._build_result(url, data.get("data", {}))
+        except TransportError as e:
+            logger.error(f"Firecrawl提取失败: {str(e)}")
+            result = {
+                "markdown": "",
+                "html": "",
+                "metadata": {"error": str(e), "url": url},
+            }
+
+        stage_metrics(result, STAGE_EXTRACT).update(stats)
+        return result
+
+    @staticmethod
+    def _check_success(data: dict) -> Optional[str]:
+        """检查响应是否成功，失败时返回错误信息"""
+        return None if data.get("success") else data.get("error", "未知错误")
 
     async def extract_async(self, url: str) -> Dict[str, Union[str, dict]]:
         """
-        异步从URL提取内容
+        异步从URL提取内容，通过共享连接池发送请求
 
         Args:
             url: 网页URL
@@ -117,95 +121,300 @@ class FirecrawlExtractor(BaseExtractor):
         Returns:
             包含markdown和原始HTML的字典
         """
-        # 这里使用同步方法的简单实现，实际项目中应使用aiohttp等异步库
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.extract, url)
+        stats: Dict[str, int] = {}
+        try:
+            data = await self.transport.request_json(
+                "POST",
+                f"{self.base_url}/scrape",
+                headers=self._headers(),
+                json={"url": url, "formats": ["markdown", "html"]},
+                stats=stats,
+                resilience=self.resilience,
+            )
+            error_msg = self._check_success(data)
+        except TransportError as e:
+            logger.error(f"Firecrawl API异步请求失败: {str(e)}")
+            error_msg = str(e)
+
+        if error_msg is None:
+            result = self._build_result(url, data.get("data", {}))
+        else:
+            result = {
+                "markdown": "",
+                "html": "",
+                "metadata": {"error": error_msg, "url": url},
+            }
+
+        stage_metrics(result, STAGE_EXTRACT).update(stats)
+        return result
 
     def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
         """
-        批量从URL提取内容
+        批量从URL提取内容，在新的事件循环中运行extract_batch_async
+
+        不能在运行中的事件循环内调用，此时应直接使用extract_batch_async
 
         Args:
             urls: URL列表
 
         Returns:
-            提取结果列表
+            提取结果列表，顺序与urls一致
         """
-        results = []
 
-        # 使用Firecrawl批量API
-        endpoint = f"{self.BASE_URL}/batch/scrape"
+        async def collect():
+            try:
+                return await self.extract_batch_async(urls)
+            finally:
+                await self.aclose()
 
-        try:
-            response = requests.post(
-                endpoint,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                },
-                json={"urls": urls, "formats": ["markdown", "html"]},
-                timeout=self.timeout,
-            )
+        return asyncio.run(collect())
+
+    async def extract_batch_async(
+        self, urls: List[str]
+    ) -> List[Dict[str, Union[str, dict]]]:
+        """
+        异步批量从URL提取内容，使用FirecrawlBatchManager并发提交批处理任务
+
+        Args:
+            urls: URL列表
 
-            response.raise_for_status()
-            data = response.json()
+        Returns:
+            提取结果列表，顺序与urls一致
+        """
+        by_url = {}
+        async for result in self.extract_batch_stream(urls):
+            metadata = result.get("metadata")
+            if isinstance(metadata, dict):
+                by_url[metadata.get("url")] = result
+        return [
+            by_url.get(url)
+            or {
+                "markdown": "",
+                "html": "",
+                "metadata": {"error": "批处理结果缺失", "url": url},
+            }
+            for url in urls
+        ]
+
+    def extract_batch_stream(
+        self, urls: List[str]
+    ) -> AsyncIterator[Dict[str, Union[str, dict]]]:
+        """
+        批量提取，按完成顺序逐个产出结果
+
+        Args:
+            urls: URL列表
+
+        Returns:
+            提取结果的异步迭代器
+        """
+        manager = FirecrawlBatchManager(
+            self,
+            batch_size=self.batch_size,
+            max_jobs=self.max_batch_jobs,
+            poll_interval=self.poll_interval,
+            max_poll_interval=self.max_poll_interval,
+            job_timeout=self.job_timeout,
+        )
+        return manager.stream(urls)
+
+
+def _normalize_url(url: str) -> str:
+    """
+    规范化URL用于匹配批处理结果：协议和主机名小写，去掉片段和路径末尾的斜杠
 
-            if data.get("success"):
-                job_id = data.get("data", {}).get("jobId")
+    Args:
+        url: URL
 
-                # 轮询任务状态
-                status_endpoint = f"{self.BASE_URL}/jobs/{job_id}"
+    Returns:
+        规范化后的URL
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, parts.query, "")
+    )
 
-                for _ in range(30):  # 最多轮询30次
-                    status_response = requests.get(
-                        status_endpoint,
-                        headers={"Authorization": f"Bearer {self.api_key}"},
-                        timeout=self.timeout,
-                    )
 
-                    status_data = status_response.json().get("data", {})
-                    job_status = status_data.get("status")
+class FirecrawlBatchManager:
+    """
+    Firecrawl批处理任务管理器
 
-                    if job_status == "completed":
-                        results_data = status_data.get("results", [])
+    将URL列表按batch_size切分为多个批处理任务并发提交，以指数退避轮询任务状态，
+    任务的部分结果一出现就产出；任务结束、失败或超时后，
+    只对没有拿到结果的URL逐个重新提取。
 
-                        for result in results_data:
-                            item_url = result.get("url", "")
-                            results.append(
-                                {
-                                    "markdown": result.get("markdown", ""),
-                                    "html": result.get("html", ""),
-                                    "metadata": {
-                                        "title": result.get("title", ""),
-                                        "url": item_url,
-                                        "extractor": "firecrawl",
-                                    },
-                                }
-                            )
+    由extract_batch、extract_batch_async和extract_batch_stream使用；
+    流水线(BatchPipeline)仍逐个调用extract_async，以便与提取缓存、任务日志配合
+    """
 
-                        return results
+    def __init__(
+        self,
+        extractor: FirecrawlExtractor,
+        batch_size: int = 10,
+        max_jobs: int = 4,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        job_timeout: float = 600.0,
+    ):
+        """
+        初始化任务管理器
 
-                    elif job_status == "failed":
-                        error_msg = status_data.get("error", "批处理任务失败")
-                        logger.error(f"Firecrawl批处理失败: {error_msg}")
-                        break
+        Args:
+            extractor: Firecrawl提取器
+            batch_size: 每个批处理任务的URL数量
+            max_jobs: 同时运行的批处理任务数
+            poll_interval: 初始轮询间隔(秒)
+            max_poll_interval: 最大轮询间隔(秒)
+            job_timeout: 单个任务的最长等待时间(秒)
+        """
+        self.extractor = extractor
+        self.batch_size = max(1, batch_size)
+        self.max_jobs = max(1, max_jobs)
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.job_timeout = job_timeout
+
+    async def stream(
+        self, urls: List[str]
+    ) -> AsyncIterator[Dict[str, Union[str, dict]]]:
+        """
+        运行所有批处理任务，按完成顺序产出结果，每个URL只产出一次
 
-                    # 等待后再次轮询
-                    time.sleep(2)
+        Args:
+            urls: URL列表
 
-            # 如果批处理失败，尝试逐个提取
-            logger.warning("批处理失败，使用单个请求模式")
-            for url in urls:
-                results.append(self.extract(url))
+        Yields:
+            提取结果
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        batches = [
+            unique_urls[i : i + self.batch_size]
+            for i in range(0, len(unique_urls), self.batch_size)
+        ]
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_jobs)
+
+        async def run(batch: List[str]):
+            async with semaphore:
+                try:
+                    await self._run_job(batch, queue)
+                finally:
+                    await queue.put(None)
+
+        tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                else:
+                    yield item
+            # 传播任务中未处理的异常
+            for task in tasks:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _run_job(self, urls: List[str], queue: asyncio.Queue):
+        """
+        提交并跟踪一个批处理任务，结果写入队列
 
-            return results
+        Args:
+            urls: 本任务的URL列表
+            queue: 结果队列
+        """
+        base_url = self.extractor.base_url
+        transport = self.extractor.transport
+        # 规范化URL -> 请求的URL，Firecrawl返回的url可能补全了斜杠或经过重定向
+        pending: Dict[str, str] = {}
+        # 规范化后与其他URL相同的URL无法区分批处理结果，单独提取
+        ambiguous = []
+        for url in urls:
+            pending.setdefault(_normalize_url(url), url)
+            if pending[_normalize_url(url)] != url:
+                ambiguous.append(url)
 
-        except RequestException as e:
+        try:
+            data = await transport.request_json(
+                "POST",
+                f"{base_url}/batch/scrape",
+                headers=self.extractor._headers(),
+                json={"urls": list(pending.values()), "formats": ["markdown", "html"]},
+                resilience=self.extractor.resilience,
+            )
+            job_id = data.get("data", {}).get("jobId") if data.get("success") else None
+            if not job_id:
+                raise TransportError(data.get("error", "批处理任务提交失败"))
+
+            status_endpoint = f"{base_url}/jobs/{job_id}"
+            interval = self.poll_interval
+            deadline = time.monotonic() + self.job_timeout
+
+            while pending and time.monotonic() < deadline:
+                await asyncio.sleep(interval)
+                status = await transport.request_json(
+                    "GET",
+                    status_endpoint,
+                    headers=self.extractor._headers(),
+                    resilience=self.extractor.resilience,
+                )
+                status_data = status.get("data", {})
+
+                # 产出新完成的部分结果
+                for item in status_data.get("results", []):
+                    matched = self._match(item, pending)
+                    if matched is not None:
+                        await queue.put(self.extractor._build_result(matched, item))
+
+                job_status = status_data.get("status")
+                if job_status == "completed":
+                    break
+                if job_status == "failed":
+                    error_msg = status_data.get("error", "批处理任务失败")
+                    logger.error(f"Firecrawl批处理任务{job_id}失败: {error_msg}")
+                    break
+
+                interval = min(interval * 2, self.max_poll_interval)
+            else:
+                if pending:
+                    logger.warning(f"Firecrawl批处理任务{job_id}等待超时")
+
+        except TransportError as e:
             logger.error(f"Firecrawl批处理API异常: {str(e)}")
 
-            # 如果批处理失败，尝试逐个提取
-            logger.warning("批处理失败，使用单个请求模式")
-            for url in urls:
-                results.append(self.extract(url))
+        if pending or ambiguous:
+            # 只重新提取没有拿到结果的URL
+            missing = list(pending.values()) + ambiguous
+            logger.warning(f"批处理缺少{len(missing)}个URL的结果，使用单个请求模式")
+            results = await asyncio.gather(
+                *(self.extractor.extract_async(url) for url in missing)
+            )
+            for result in results:
+                await queue.put(result)
+
+    @staticmethod
+    def _match(item: dict, pending: Dict[str, str]) -> Optional[str]:
+        """
+        将批处理结果匹配到尚未拿到结果的请求URL，匹配成功时从pending中移除
+
+        优先使用结果元数据中的sourceURL(请求时的URL)，其次是最终的url
 
-            return results
+        Args:
+            item: 批处理返回的单个页面数据
+            pending: 规范化URL到请求URL的映射
+
+        Returns:
+            请求的URL，没有匹配时返回None
+        """
+        metadata = item.get("metadata") or {}
+        for candidate in (
+            metadata.get("sourceURL"),
+            item.get("url"),
+            metadata.get("url"),
+        ):
+            if candidate and _normalize_url(candidate) in pending:
+                return pending.pop(_normalize_url(candidate))
+        return None
@@ -1,15 +1,12 @@
 """
 Jina.ai提取器模块
 """
-import asyncio
 import logging
-import time
 from typing import Dict, List, Optional, Union
 
-import requests
-from requests.exceptions import RequestException
-
 from src.extractors.base import BaseExtractor
+from src.extractors.transport import TransportError
+from src.utils.metrics import STAGE_EXTRACT, stage_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +16,7 @@ class JinaExtractor(BaseExtractor):
     使用Jina.ai Reader API提取网页内容
     """
 
+    name = "jina"
     BASE_URL = "https://api.jina.ai/v1/reader"
 
     def __init__(self, api_key: Optional[str] = None, **kwargs):
@@ -32,69 +30,76 @@ class JinaExtractor(BaseExtractor):
         super().__init__(api_key, **kwargs)
         self.timeout = kwargs.get("timeout", 30)
         self.retry_count = kwargs.get("retry_count", 3)
+        # 可覆盖API地址，用于代理或本地模拟服务
+        self.base_url = kwargs.get("base_url") or self.BASE_URL
 
-    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+    def cache_options(self) -> dict:
+        """返回影响提取结果的请求选项"""
+        return {"format": "markdown", "base_url": self.base_url}
+
+    def _headers(self) -> Dict[str, str]:
+        """构建请求头"""
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    @staticmethod
+    def _build_result(url: str, data: dict) -> Dict[str, Union[str, dict]]:
         """
-        使用Jina.ai从URL提取内容
+        将Jina返回的数据转换为统一的结果格式
 
         Args:
             url: 网页URL
+            data: Jina返回的数据
 
         Returns:
             包含markdown和元数据的字典
         """
-        for attempt in range(self.retry_count):
-            try:
-                response = requests.post(
-                    self.BASE_URL,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}",
-                    },
-                    json={"url": url, "format": "markdown"},
-                    timeout=self.timeout,
-                )
-
-                response.raise_for_status()
-                data = response.json()
-
-                # 注意：这里的返回结构需要根据实际Jina.ai API调整
-                return {
-                    "markdown": data.get("content", ""),
-                    "html": data.get("html", ""),
-                    "metadata": {
-                        "title": data.get("title", ""),
-                        "url": url,
-                        "extractor": "jina",
-                    },
-                }
-
-            except RequestException as e:
-                logger.error(
-                    f"Jina API请求异常 (尝试 {attempt+1}/{self.retry_count}): {str(e)}"
-                )
-
-                # 最后一次尝试失败时返回空结果
-                if attempt == self.retry_count - 1:
-                    return {
-                        "markdown": "",
-                        "html": "",
-                        "metadata": {"error": str(e), "url": url},
-                    }
-
-                # 短暂延迟后重试
-                time.sleep(1)
-
-        # 不应该到达这里，但为安全起见
+        # 注意：这里的返回结构需要根据实际Jina.ai API调整
         return {
-            "markdown": "",
-            "html": "",
-            "metadata": {"error": "所有请求尝试均失败", "url": url},
+            "markdown": data.get("content", ""),
+            "html": data.get("html", ""),
+            "metadata": {
+                "title": data.get("title", ""),
+                "url": url,
+                "extractor": "jina",
+            },
         }
 
+    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        使用Jina.ai从URL提取内容
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            包含markdown和元数据的字典
+        """
+        stats: Dict[str, int] = {}
+        try:
+            data = self._post_json(
+                self.base_url,
+                {"url": url, "format": "markdown"},
+                self._headers(),
+                stats,
+            )
+            result = self._build_result(url, data)
+        except TransportError as e:
+            logger.error(f"Jina API请求失败: {str(e)}")
+            result = {
+                "markdown": "",
+                "html": "",
+                "metadata": {"error": str(e), "url": url},
+            }
+
+        stage_metrics(result, STAGE_EXTRACT).update(stats)
+        return result
+
     async def extract_async(self, url: str) -> Dict[str, Union[str, dict]]:
         """
-        异步从URL提取内容
+        异步从URL提取内容，通过共享连接池发送请求
 
         Args:
             url: 网页URL
@@ -102,9 +107,27 @@ class JinaExtractor(BaseExtractor):
         Returns:
             包含markdown和元数据的字典
         """
-        # 简单实现，实际项目中应使用aiohttp等异步库
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.extract, url)
+        stats: Dict[str, int] = {}
+        try:
+            data = await self.transport.request_json(
+                "POST",
+                self.base_url,
+                headers=self._headers(),
+                json={"url": url, "format": "markdown"},
+                stats=stats,
+                resilience=self.resilience,
+            )
+            result = self._build_result(url, data)
+        except TransportError as e:
+            logger.error(f"Jina API异步请求失败: {str(e)}")
+            result = {
+                "markdown": "",
+                "html": "",
+                "metadata": {"error": str(e), "url": url},
+            }
+
+        stage_metrics(result, STAGE_EXTRACT).update(stats)
+        return result
 
     def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
         """
@@ -0,0 +1,387 @@
+"""
+本地提取器模块，在进程内将本地HTML文件、目录或归档转换为markdown，不经过网络
+"""
+import asyncio
+import functools
+import logging
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+import html2text
+from bs4 import BeautifulSoup
+
+from src.extractors.base import BaseExtractor
+from src.utils.html import REMOVED_ROLES, REMOVED_TAGS
+from src.utils.metrics import STAGE_EXTRACT, stage_metrics
+
+logger = logging.getLogger(__name__)
+
+# 识别为HTML文档的文件扩展名
+HTML_EXTENSIONS = (".html", ".htm", ".xhtml")
+
+# 归档路径与成员路径之间的分隔符，例如 pages.zip!/docs/index.html
+MEMBER_SEPARATOR = "!/"
+
+
+def is_archive(path: str) -> bool:
+    """是否为支持的归档文件（zip、tar、tar.gz、tar.bz2、tar.xz）"""
+    return os.path.isfile(path) and (
+        zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+    )
+
+
+def _local_path(source: str) -> str:
+    """将file://地址转换为本地路径"""
+    if source.startswith("file://"):
+        return unquote(urlparse(source).path)
+    return source
+
+
+def iter_sources(path: str) -> Iterator[str]:
+    """
+    列出路径下所有HTML文档的来源标识
+
+    Args:
+        path: HTML文件、目录或归档的路径，也可以是file://地址
+
+    Yields:
+        来源标识：文件路径，或"归档路径!/成员路径"
+    """
+    path = _local_path(path)
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(HTML_EXTENSIONS):
+                    yield os.path.join(root, name)
+    elif is_archive(path):
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                names = [
+                    info.filename for info in archive.infolist() if not info.is_dir()
+                ]
+        else:
+            with tarfile.open(path) as archive:
+                names = [member.name for member in archive if member.isfile()]
+        for name in names:
+            if name.lower().endswith(HTML_EXTENSIONS):
+                yield f"{path}{MEMBER_SEPARATOR}{name}"
+    else:
+        yield path
+
+
+@functools.lru_cache(maxsize=8)
+def _open_archive(path: str) -> Union[zipfile.ZipFile, tarfile.TarFile]:
+    """打开并缓存归档，同一进程内的多次读取复用同一个句柄"""
+    if zipfile.is_zipfile(path):
+        return zipfile.ZipFile(path)
+    return tarfile.open(path)
+
+
+def decode_html(data: bytes, charset: Optional[str] = None) -> str:
+    """
+    解码HTML，依次尝试声明的编码和UTF-8，都失败时交给BeautifulSoup按meta声明的编码处理
+
+    Args:
+        data: HTML字节
+        charset: HTTP响应头中声明的编码
+
+    Returns:
+        HTML文本
+    """
+    for encoding in (charset, "utf-8"):
+        if not encoding:
+            continue
+        try:
+            return data.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return str(BeautifulSoup(data, "lxml"))
+
+
+def read_source(source: str) -> str:
+    """
+    读取来源标识对应的HTML
+
+    Args:
+        source: 文件路径、file://地址或"归档路径!/成员路径"
+
+    Returns:
+        HTML文本
+    """
+    source = _local_path(source)
+    if MEMBER_SEPARATOR in source:
+        archive_path, member = source.split(MEMBER_SEPARATOR, 1)
+        archive = _open_archive(archive_path)
+        if isinstance(archive, zipfile.ZipFile):
+            data = archive.read(member)
+        else:
+            member_file = archive.extractfile(member)
+            if member_file is None:
+                raise FileNotFoundError(f"归档中不是文件: {source}")
+            data = member_file.read()
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    return decode_html(data)
+
+
+def html_to_markdown(html: str, base_url: str = "") -> Dict[str, str]:
+    """
+    将HTML转换为markdown，移除脚本、导航等非正文节点，优先使用main或article中的内容
+
+    Args:
+        html: HTML文本
+        base_url: 用于补全相对链接的基础地址
+
+    Returns:
+        包含markdown、title和canonical_url的字典
+    """
+    soup = BeautifulSoup(html, "lxml")
+
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    canonical = soup.find("link", rel="canonical")
+    canonical_url = str(canonical.get("href") or "") if canonical else ""
+
+    for tag in soup.find_all(REMOVED_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if not tag.decomposed and (
+            tag.get("role") in REMOVED_ROLES or tag.get("aria-hidden") == "true"
+        ):
+            tag.decompose()
+
+    root = soup.find("main") or soup.find("article") or soup.body or soup
+
+    converter = html2text.HTML2Text(baseurl=base_url or canonical_url)
+    # 不按固定宽度折行，保留链接和图片
+    converter.body_width = 0
+    converter.ignore_links = False
+    converter.ignore_images = False
+    markdown = converter.handle(str(root)).strip()
+
+    return {"markdown": markdown, "title": title, "canonical_url": canonical_url}
+
+
+def extract_source(source: str, keep_html: bool = True) -> Dict[str, Union[str, dict]]:
+    """
+    读取并转换一个本地HTML文档，可在工作进程中执行
+
+    Args:
+        source: 来源标识
+        keep_html: 结果中是否保留原始HTML
+
+    Returns:
+        包含markdown、html和元数据的字典
+    """
+    try:
+        html = read_source(source)
+    except (OSError, KeyError, tarfile.TarError, zipfile.BadZipFile) as e:
+        logger.error(f"读取本地文档失败 {source}: {str(e)}")
+        return {
+            "markdown": "",
+            "html": "",
+            "metadata": {"error": str(e), "url": source},
+        }
+    return convert_html(html, source, keep_html)
+
+
+def convert_html(
+    html: str, url: str, keep_html: bool = True, metadata: Optional[dict] = None
+) -> Dict[str, Union[str, dict]]:
+    """
+    将已读取的HTML转换为提取结果，可在工作进程中执行
+
+    Args:
+        html: HTML文本
+        url: 页面URL或来源标识
+        keep_html: 结果中是否保留原始HTML
+        metadata: 合并到结果元数据中的附加字段
+
+    Returns:
+        包含markdown、html和元数据的字典
+    """
+    start = time.perf_counter()
+    # 网页URL用于补全相对链接，本地来源则使用页面中的canonical地址
+    base_url = url if url.startswith(("http://", "https://")) else ""
+    converted = html_to_markdown(html, base_url=base_url)
+
+    result: Dict[str, Any] = {
+        "markdown": converted["markdown"],
+        "html": html if keep_html else "",
+        "metadata": {
+            "title": converted["title"],
+            "url": url,
+            "extractor": LocalExtractor.name,
+            **(metadata or {}),
+        },
+    }
+    if converted["canonical_url"]:
+        result["metadata"]["canonical_url"] = converted["canonical_url"]
+    stats = stage_metrics(result, STAGE_EXTRACT)
+    stats["bytes_in"] = len(html.encode("utf-8"))
+    stats["convert_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+class LocalExtractor(BaseExtractor):
+    """
+    本地提取器，将本地HTML文件、目录或归档转换为markdown
+
+    转换在进程内完成，没有网络请求和API费用；workers大于1时批量转换在
+    多进程工作池中并行执行
+    """
+
+    name = "local"
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        初始化本地提取器
+
+        Args:
+            api_key: 未使用，保持与其他提取器一致的接口
+            **kwargs: 其他配置参数，其中:
+                - workers: 工作进程数，默认为CPU核数，为1时在当前进程内转换
+                - keep_html: 结果中是否保留原始HTML，默认为True
+        """
+        super().__init__(api_key, **kwargs)
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+        self.keep_html = kwargs.get("keep_html", True)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def cache_options(self) -> dict:
+        """返回影响提取结果的选项"""
+        return {"keep_html": self.keep_html}
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """获取工作进程池，workers为1时返回None"""
+        if self.workers <= 1:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        return self._pool
+
+    def extract(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        转换单个本地HTML文档
+
+        Args:
+            url: 文件路径、file://地址或"归档路径!/成员路径"
+
+        Returns:
+            包含markdown和元数据的字典
+        """
+        return extract_source(url, self.keep_html)
+
+    async def extract_async(self, url: str) -> Dict[str, Union[str, dict]]:
+        """
+        异步转换单个本地HTML文档，转换在工作进程池中执行，不阻塞事件循环
+
+        Args:
+            url: 来源标识
+
+        Returns:
+            包含markdown和元数据的字典
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_pool(), extract_source, url, self.keep_html
+        )
+
+    async def extract_page_async(
+        self, page: Dict[str, Any]
+    ) -> Dict[str, Union[str, dict]]:
+        """
+        在工作进程池中转换已读取的页面，不再读取文件
+
+        Args:
+            page: 包含url、html和可选metadata的页面
+
+        Returns:
+            包含markdown和元数据的字典
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_pool(),
+            convert_html,
+            page["html"],
+            page["url"],
+            self.keep_html,
+            page.get("metadata"),
+        )
+
+    def extract_batch(self, urls: List[str]) -> List[Dict[str, Union[str, dict]]]:
+        """
+        批量转换本地HTML文档，目录和归档会展开为其中的所有HTML文档
+
+        Args:
+            urls: 来源标识列表
+
+        Returns:
+            提取结果列表
+        """
+        return list(self.extract_stream(urls))
+
+    def extract_stream(
+        self, paths: Iterable[str], window: Optional[int] = None
+    ) -> Iterator[Dict[str, Union[str, dict]]]:
+        """
+        按输入顺序逐个产出转换结果，同时在工作池中转换的文档数不超过window
+
+        Args:
+            paths: 文件、目录或归档路径
+            window: 同时转换的文档数上限，默认为工作进程数的4倍
+
+        Yields:
+            提取结果
+        """
+        sources = (source for path in paths for source in iter_sources(path))
+        pool = self._get_pool()
+        if pool is None:
+            for source in sources:
+                yield extract_source(source, self.keep_html)
+            return
+
+        window = window or self.workers * 4
+        pending: List = []
+        for source in sources:
+            pending.append(pool.submit(extract_source, source, self.keep_html))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+    def close(self):
+        """关闭工作进程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    async def aclose(self):
+        """关闭工作进程池"""
+        self.close()
+
+
+def expand_sources(paths: Iterable[str]) -> Tuple[List[str], int]:
+    """
+    将路径列表展开为HTML文档的来源标识列表
+
+    Args:
+        paths: 文件、目录或归档路径
+
+    Returns:
+        (来源标识列表, 展开的目录和归档数)
+    """
+    sources: List[str] = []
+    collections = 0
+    for path in paths:
+        local = _local_path(path)
+        if os.path.isdir(local) or is_archive(local):
+            collections += 1
+        sources.extend(iter_sources(path))
+    return sources, collections
@@ -0,0 +1,394 @@
+"""
+提取器弹性模块，提供带抖动的指数退避、重试预算、按后端的熔断器和Retry-After处理
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头
+
+    Args:
+        value: 秒数或HTTP日期
+
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryBudget:
+    """
+    重试预算，限制重试请求占总请求的比例
+
+    每个新请求存入ratio个令牌，每次重试取出一个令牌，另外每秒补充
+    min_per_second个令牌，保证低流量时仍可重试。后端故障时重试量
+    最多为正常流量的ratio倍，不会把每个请求都放大retry_count倍
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 1.0,
+        max_balance: float = 100.0,
+    ):
+        """
+        初始化重试预算
+
+        Args:
+            ratio: 重试请求与新请求的比例上限
+            min_per_second: 每秒补充的令牌数
+            max_balance: 令牌数上限
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._balance = min(max_balance, min_per_second * 10)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        self._balance = min(
+            self.max_balance,
+            self._balance + (now - self._updated) * self.min_per_second,
+        )
+        self._updated = now
+
+    def deposit(self):
+        """记录一个新请求"""
+        with self._lock:
+            self._refill()
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """
+        尝试为一次重试取出令牌
+
+        Returns:
+            是否允许重试
+        """
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    统计最近window_size次请求的结果，失败率超过阈值时打开，打开期间请求快速失败；
+    冷却时间过后进入半开状态，只放行一个探测请求，成功则关闭，失败则以
+    加倍的冷却时间重新打开。探测请求被取消或未报告结果时，最多占用探测名额
+    probe_timeout秒，之后放行新的探测请求
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        min_requests: int = 10,
+        window_size: int = 50,
+        cooldown: float = 5.0,
+        max_cooldown: float = 120.0,
+        probe_timeout: float = 60.0,
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            name: 后端名称
+            failure_threshold: 打开熔断器的失败率阈值
+            min_requests: 计算失败率前至少需要的请求数
+            window_size: 统计的最近请求数
+            cooldown: 初始冷却时间(秒)
+            max_cooldown: 最大冷却时间(秒)
+            probe_timeout: 探测请求占用探测名额的最长时间(秒)，通常为请求超时时间
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_requests = max(1, min_requests)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self._cooldown = cooldown
+        self._outcomes: deque = deque(maxlen=window_size)
+        self._state = STATE_CLOSED
+        self._open_until = 0.0
+        self._probing = False
+        self._probe_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """当前状态，冷却结束时转为半开（调用方需持有锁）"""
+        if self._state == STATE_OPEN and time.monotonic() >= self._open_until:
+            self._state = STATE_HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        是否放行一个请求，半开状态下只放行一个探测请求，探测超时后放行下一个
+
+        Returns:
+            是否放行
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN:
+                now = time.monotonic()
+                if not self._probing or now >= self._probe_until:
+                    self._probing = True
+                    self._probe_until = now + self.probe_timeout
+                    return True
+            return False
+
+    def release_probe(self):
+        """探测请求没有结果（被取消或意外异常）时归还探测名额，不改变状态"""
+        with self._lock:
+            if self._current_state() == STATE_HALF_OPEN:
+                self._probing = False
+
+    def _open(self, seconds: float):
+        """打开熔断器（调用方需持有锁）"""
+        self._state = STATE_OPEN
+        self._open_until = time.monotonic() + seconds
+        self._probing = False
+        self._outcomes.clear()
+        logger.warning(f"{self.name}熔断器打开，{seconds:.1f}秒内的请求将快速失败")
+
+    def record_success(self):
+        """记录一次成功"""
+        with self._lock:
+            if self._current_state() == STATE_HALF_OPEN:
+                self._state = STATE_CLOSED
+                self._cooldown = self.base_cooldown
+                self._probing = False
+                logger.info(f"{self.name}熔断器关闭")
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """记录一次失败"""
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_HALF_OPEN:
+                # 探测失败，冷却时间加倍
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                self._open(self._cooldown)
+                return
+            if state == STATE_OPEN:
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_requests
+                and failures / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._open(self._cooldown)
+
+    def trip(self, seconds: float):
+        """
+        立即打开熔断器，用于后端明确要求长时间等待的情况
+
+        Args:
+            seconds: 打开的时长(秒)
+        """
+        with self._lock:
+            self._open(min(seconds, self.max_cooldown))
+
+
+class BackendResilience:
+    """
+    单个后端的弹性策略，组合重试次数、带抖动的指数退避、重试预算和熔断器
+
+    同一后端的所有提取器实例共享一个实例，后端故障时所有请求都能感知
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry_count: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_retry_after: float = 60.0,
+        retry_budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        初始化弹性策略
+
+        Args:
+            name: 后端名称
+            retry_count: 最大尝试次数
+            base_delay: 退避的基础时间(秒)
+            max_delay: 单次退避的最长时间(秒)
+            max_retry_after: 可接受的Retry-After上限(秒)，超过时不再重试并打开熔断器
+            retry_budget: 重试预算，为None时不限制
+            breaker: 熔断器，为None时不熔断
+        """
+        self.name = name
+        self.retry_count = max(1, retry_count)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_budget = retry_budget
+        self.breaker = breaker
+
+    def allow_request(self) -> bool:
+        """熔断器是否放行请求"""
+        return self.breaker is None or self.breaker.allow()
+
+    def on_request(self):
+        """记录一个新请求（不含重试）"""
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
+
+    def on_success(self):
+        """记录后端正常响应，包括不可重试的4xx"""
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def on_abandon(self):
+        """记录请求在得到响应前被放弃，例如协程被取消"""
+        if self.breaker is not None:
+            self.breaker.release_probe()
+
+    def on_failure(self, retry_after: Optional[float] = None):
+        """
+        记录一次可重试的失败
+
+        Args:
+            retry_after: 响应头中的Retry-After(秒)
+        """
+        if self.breaker is None:
+            return
+        if retry_after is not None and retry_after > self.max_retry_after:
+            self.breaker.trip(retry_after)
+        else:
+            self.breaker.record_failure()
+
+    def next_delay(
+        self, attempt: int, retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        计算下一次重试前的等待时间
+
+        Args:
+            attempt: 已完成的尝试序号（从0开始）
+            retry_after: 响应头中的Retry-After(秒)
+
+        Returns:
+            等待的秒数，不应再重试时返回None
+        """
+        if attempt >= self.retry_count - 1:
+            return None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(f"{self.name}要求等待{retry_after:.0f}秒，放弃重试")
+            return None
+        if self.breaker is not None and self.breaker.state == STATE_OPEN:
+            return None
+        if self.retry_budget is not None and not self.retry_budget.try_withdraw():
+            logger.warning(f"{self.name}重试预算已用尽，放弃重试")
+            return None
+        # 全抖动的指数退避，避免大量请求同时重试
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+        return max(delay, retry_after or 0.0)
+
+
+_shared_resilience: Dict[tuple, BackendResilience] = {}
+_shared_lock = threading.Lock()
+
+
+def get_backend_resilience(
+    name: str,
+    retry_count: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    max_retry_after: float = 60.0,
+    retry_budget_ratio: Optional[float] = 0.2,
+    failure_threshold: Optional[float] = 0.5,
+    min_requests: int = 10,
+    cooldown: float = 5.0,
+    max_cooldown: float = 120.0,
+    probe_timeout: float = 60.0,
+    scope: Optional[str] = None,
+) -> BackendResilience:
+    """
+    获取按后端和配置共享的弹性策略
+
+    Args:
+        name: 后端名称
+        retry_count: 最大尝试次数
+        base_delay: 退避的基础时间(秒)
+        max_delay: 单次退避的最长时间(秒)
+        max_retry_after: 可接受的Retry-After上限(秒)
+        retry_budget_ratio: 重试请求与新请求的比例上限，为None时不限制
+        failure_threshold: 熔断器的失败率阈值，为None时不熔断
+        min_requests: 计算失败率前至少需要的请求数
+        cooldown: 熔断器初始冷却时间(秒)
+        max_cooldown: 熔断器最大冷却时间(秒)
+        probe_timeout: 熔断器半开时探测请求占用探测名额的最长时间(秒)
+        scope: 区分同名后端的附加键，例如API地址
+
+    Returns:
+        弹性策略实例
+    """
+    config = dict(locals())
+    key = tuple(sorted(config.items()))
+    with _shared_lock:
+        if key not in _shared_resilience:
+            _shared_resilience[key] = BackendResilience(
+                name,
+                retry_count=retry_count,
+                base_delay=base_delay,
+                max_delay=max_delay,
+                max_retry_after=max_retry_after,
+                retry_budget=RetryBudget(retry_budget_ratio)
+                if retry_budget_ratio is not None
+                else None,
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=failure_threshold,
+                    min_requests=min_requests,
+                    cooldown=cooldown,
+                    max_cooldown=max_cooldown,
+                    probe_timeout=probe_timeout,
+                )
+                if failure_threshold is not None
+                else None,
+            )
+        return _shared_resilience[key]
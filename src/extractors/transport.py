@@ -0,0 +1,222 @@
+"""
+异步HTTP传输层模块，为提取器提供共享的连接池
+"""
+import asyncio
+import json as jsonlib
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from src.extractors.resilience import BackendResilience, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的HTTP状态码
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# 响应体不是JSON时错误信息中保留的最大字符数
+ERROR_BODY_CHARS = 200
+
+
+class TransportError(Exception):
+    """
+    传输层请求在所有重试后仍失败时抛出的异常
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncTransport:
+    """
+    基于aiohttp的异步HTTP客户端，连接池复用TCP/TLS连接（keep-alive），
+    并限制总连接数和单个主机的连接数
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        retry_count: int = 3,
+        max_connections: int = 100,
+        max_connections_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        backoff: float = 0.5,
+    ):
+        """
+        初始化传输层
+
+        Args:
+            timeout: 单次请求的超时时间(秒)
+            retry_count: 最大尝试次数
+            max_connections: 连接池总连接数上限
+            max_connections_per_host: 单个主机的连接数上限
+            keepalive_timeout: 空闲连接保持时间(秒)
+            backoff: 重试的基础退避时间(秒)，按指数增长并加入随机抖动
+        """
+        self.timeout = timeout
+        self.retry_count = max(1, retry_count)
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.backoff = backoff
+        # 调用方未指定后端弹性策略时只做有限次数的退避重试
+        self.resilience = BackendResilience(
+            "transport", retry_count=retry_count, base_delay=backoff
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        获取当前事件循环下的会话，会话与事件循环绑定，必要时重新创建
+
+        Returns:
+            aiohttp会话
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._loop = loop
+        return self._session
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Optional[Any] = None,
+        stats: Optional[Dict[str, int]] = None,
+        resilience: Optional[BackendResilience] = None,
+    ) -> Any:
+        """
+        发送请求并解析JSON响应，网络错误、超时、可重试的状态码和无法解析为JSON的响应体
+        按后端的弹性策略重试：
+        带抖动的指数退避、遵循Retry-After、受重试预算限制，熔断器打开时快速失败
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            headers: 请求头
+            json: JSON请求体
+            stats: 可选的统计字典，累加retries、bytes_out和bytes_in
+            resilience: 后端弹性策略，默认使用传输层自身的重试配置
+
+        Returns:
+            解析后的JSON数据
+
+        Raises:
+            TransportError: 所有尝试均失败、重试被放弃或熔断器打开
+        """
+        resilience = resilience or self.resilience
+        last_error = "所有请求尝试均失败"
+        last_status = None
+        if stats is None:
+            stats = {}
+        for key in ("retries", "bytes_out", "bytes_in"):
+            stats.setdefault(key, 0)
+
+        body = None
+        headers = dict(headers or {})
+        if json is not None:
+            body = jsonlib.dumps(json).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+
+        resilience.on_request()
+        attempt = 0
+        while True:
+            if not resilience.allow_request():
+                raise TransportError(f"{resilience.name}熔断中，快速失败", last_status)
+            if attempt:
+                stats["retries"] += 1
+
+            retry_after = None
+            try:
+                session = self._get_session()
+                stats["bytes_out"] += len(body or b"")
+                async with session.request(
+                    method, url, headers=headers, data=body
+                ) as response:
+                    content = await response.read()
+                    stats["bytes_in"] += len(content)
+                    if response.status in RETRYABLE_STATUS:
+                        last_status = response.status
+                        last_error = f"HTTP {response.status}: {response.reason}"
+                        retry_after = parse_retry_after(
+                            response.headers.get("Retry-After")
+                        )
+                    else:
+                        response.raise_for_status()
+                        try:
+                            data = jsonlib.loads(content)
+                        except ValueError:
+                            # 代理或网关返回的错误页面，按可重试的失败处理
+                            last_status = response.status
+                            snippet = content[:ERROR_BODY_CHARS].decode(
+                                "utf-8", errors="replace"
+                            )
+                            last_error = (
+                                f"HTTP {response.status}: 响应不是有效的JSON: {snippet}"
+                            )
+                        else:
+                            resilience.on_success()
+                            return data
+
+            except aiohttp.ClientResponseError as e:
+                # 不可重试的状态码直接失败，后端本身是正常的
+                resilience.on_success()
+                raise TransportError(f"HTTP {e.status}: {e.message}", e.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_status = None
+                last_error = str(e) or e.__class__.__name__
+            except BaseException:
+                # 请求被取消或意外失败，没有结果，归还熔断器的探测名额
+                resilience.on_abandon()
+                raise
+
+            resilience.on_failure(retry_after)
+            logger.error(
+                f"异步请求异常 (尝试 {attempt+1}/{resilience.retry_count}) {url}: "
+                f"{last_error}"
+            )
+
+            delay = resilience.next_delay(attempt, retry_after)
+            if delay is None:
+                raise TransportError(last_error, last_status)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self):
+        """关闭会话并释放连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_shared_transports: Dict[tuple, AsyncTransport] = {}
+
+
+def get_shared_transport(**kwargs) -> AsyncTransport:
+    """
+    获取按配置共享的传输层实例，使多个提取器复用同一个连接池
+
+    Args:
+        **kwargs: AsyncTransport的配置参数
+
+    Returns:
+        传输层实例
+    """
+    key = tuple(sorted(kwargs.items()))
+    if key not in _shared_transports:
+        _shared_transports[key] = AsyncTransport(**kwargs)
+    return _shared_transports[key]
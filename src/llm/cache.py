@@ -0,0 +1,137 @@
+"""
+LLM响应缓存模块，按提示词哈希缓存优化结果
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    两级LLM响应缓存
+
+    前端为进程内的LRU字典，后端为SQLite数据库（WAL模式），
+    缓存键由模型、温度、提供者和完整的提示词消息计算得到
+    """
+
+    def __init__(self, path: str, memory_size: int = 256):
+        """
+        初始化响应缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            memory_size: 内存LRU层保留的条目数
+        """
+        self.path = path
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str, temperature: float, provider: str, messages: List[dict]
+    ) -> str:
+        """
+        计算缓存键
+
+        Args:
+            model: 模型名称
+            temperature: 温度参数
+            provider: LLM提供者
+            messages: 渲染后的提示词消息
+
+        Returns:
+            十六进制sha256哈希
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "provider": provider,
+                "messages": messages,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, response: str):
+        """写入内存LRU层（调用方需持有锁）"""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应文本，未命中时返回None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            try:
+                row = self._conn.execute(
+                    "SELECT response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"读取LLM缓存失败: {str(e)}")
+                return None
+
+            if row is None:
+                return None
+            response: str = row[0]
+            self._remember(key, response)
+            return response
+
+    def set(self, key: str, response: str):
+        """
+        写入响应
+
+        Args:
+            key: 缓存键
+            response: 响应文本
+        """
+        with self._lock:
+            self._remember(key, response)
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, response, time.time()),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"写入LLM缓存失败: {str(e)}")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,137 @@
+"""
+Markdown分块模块，按标题和块边界将长文档切分为不超过token预算的片段
+"""
+import re
+from typing import List
+
+_CJK_RE = re.compile(
+    r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]"
+)
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估计文本的token数
+
+    中日韩字符按每字1个token计算，其余字符按每4个字符1个token计算，
+    无需依赖具体模型的分词器
+
+    Args:
+        text: 文本
+
+    Returns:
+        估计的token数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_blocks(markdown: str) -> List[str]:
+    """
+    将markdown切分为块：以空行分隔，标题单独开始新块，代码块保持完整
+
+    Args:
+        markdown: markdown文本
+
+    Returns:
+        块列表
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_fence = False
+
+    def flush():
+        if current:
+            blocks.append("\n".join(current))
+            current.clear()
+
+    for line in markdown.split("\n"):
+        if _FENCE_RE.match(line):
+            if not in_fence:
+                flush()
+            current.append(line)
+            in_fence = not in_fence
+            if not in_fence:
+                flush()
+            continue
+
+        if in_fence:
+            current.append(line)
+        elif not line.strip():
+            flush()
+        elif _HEADING_RE.match(line):
+            flush()
+            current.append(line)
+        else:
+            current.append(line)
+
+    flush()
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """按行切分超过预算的单个块"""
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for line in block.split("\n"):
+        line_tokens = estimate_tokens(line) + 1
+        if current and current_tokens + line_tokens > max_tokens:
+            pieces.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_markdown(markdown: str, max_tokens: int) -> List[str]:
+    """
+    将markdown切分为不超过max_tokens的片段
+
+    片段只在块边界处切分，并且在已用去一半预算后优先在标题处开始新片段，
+    使每个片段尽量对应完整的章节。超过预算的单个块按行切分
+
+    Args:
+        markdown: markdown文本
+        max_tokens: 每个片段的token预算
+
+    Returns:
+        按原文顺序排列的片段列表
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+            current.clear()
+            current_tokens = 0
+
+    for block in _split_blocks(markdown):
+        block_tokens = estimate_tokens(block) + 2
+        is_heading = bool(_HEADING_RE.match(block))
+
+        if block_tokens > max_tokens:
+            flush()
+            chunks.extend(_split_oversized(block, max_tokens))
+            continue
+
+        if current and (
+            current_tokens + block_tokens > max_tokens
+            or (is_heading and current_tokens >= max_tokens // 2)
+        ):
+            flush()
+
+        current.append(block)
+        current_tokens += block_tokens
+
+    flush()
+    return chunks
@@ -1,13 +1,83 @@
 """
 LLM处理器模块，用于优化提取的markdown
 """
+import asyncio
 import logging
-from typing import Dict, Optional, Union
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
 
 import openai
+from openai.types.chat import ChatCompletionMessageParam
+
+from src.llm.cache import ResponseCache
+from src.llm.chunking import estimate_tokens, split_markdown
+from src.llm.providers import BaseProvider, get_provider
+from src.llm.quality import (
+    DECISION_LLM,
+    DECISION_RULES,
+    DECISION_SKIP,
+    analyze_markdown,
+    decide,
+)
+from src.llm.rules import rule_optimize
+from src.llm.scheduler import RateLimiter
+from src.utils.html import prune_html
+from src.utils.metrics import STAGE_OPTIMIZE
 
 logger = logging.getLogger(__name__)
 
+# 系统提示词，所有请求共用，保持不变以便服务端缓存提示词前缀
+SYSTEM_PROMPT = """你是一个专业的HTML到Markdown转换专家。你的任务是检查从HTML生成的Markdown文本，
+改进其质量，确保其格式正确，并修复任何问题。遵循以下规则：
+
+1. 确保保留原始内容的结构和层次
+2. 正确处理标题、列表、表格、链接和图片
+3. 移除不必要的空白行和重复内容
+4. 修正格式错误，如标题级别跳过或嵌套不当的列表
+5. 保持代码块的格式和语法高亮
+6. 保留原始的链接URL和图片URL
+
+用户消息中会给出原始提取的Markdown，有时还会附带原始HTML，需要时可以参考HTML。
+如果给出的是长文档的一部分，只优化这一部分，不要补充其他部分的内容。
+返回优化后的Markdown文本，不要添加任何解释或注释。"""
+
+# 分块模式下用户消息的开头
+PART_INTRO = "下面是一篇长文档按顺序切分后的第{index}/{total}部分。"
+
+# 可重试的LLM请求异常
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def _cached_tokens(usage) -> int:
+    """
+    读取响应用量中命中提示词缓存的token数
+
+    OpenAI及兼容服务在prompt_tokens_details.cached_tokens中返回，
+    部分服务使用prompt_cache_hit_tokens字段
+
+    Args:
+        usage: 响应的usage字段
+
+    Returns:
+        命中缓存的token数，未返回时为0
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    for value in (
+        getattr(details, "cached_tokens", None),
+        getattr(usage, "prompt_cache_hit_tokens", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return 0
+
 
 class LLMProcessor:
     """
@@ -19,17 +89,61 @@ class LLMProcessor:
         初始化LLM处理器
 
         Args:
-            api_key: OpenAI API密钥
-            **kwargs: 其他配置参数
+            api_key: API密钥
+            **kwargs: 其他配置参数，其中:
+                - provider: LLM提供者，支持"openai"、"azure"、"local"和"rules"
+                - llm_base_url: API地址，用于OpenAI兼容服务或本地服务
+                - llm_fallback: 为"rules"时，LLM请求失败的文档或片段按规则优化
+                - llm_triage: 是否先在本地分析markdown质量，只把需要的文档交给LLM
+                - llm_triage_threshold: 质量分低于该值且存在规则无法修复的问题时调用LLM
+
+        Raises:
+            ValueError: 不支持的提供者
         """
         self.api_key = api_key
         self.model = kwargs.get("model", "gpt-4")
         self.temperature = kwargs.get("temperature", 0.1)
-        self.provider = kwargs.get("provider", "openai")
+        self.provider = kwargs.get("provider") or "openai"
+        self.backend: BaseProvider = get_provider(self.provider, api_key, **kwargs)
+        self.fallback = kwargs.get("llm_fallback")
+        # 质量分级：已经规范的文档跳过优化，只有格式问题的按规则修复，其余才调用LLM
+        self.triage = kwargs.get("llm_triage", False)
+        self.triage_threshold = kwargs.get("llm_triage_threshold", 0.8)
+        # 分块模式：markdown和HTML的估计token数超过chunk_tokens时，
+        # 按块切分并发优化后按顺序拼接，为0时禁用
+        self.chunk_tokens = kwargs.get("chunk_tokens", 6000)
+        self.chunk_concurrency = kwargs.get("chunk_concurrency", 4)
+        # HTML预处理：移除非正文节点和属性，并限制附带的HTML长度(字符)
+        self.prune_html = kwargs.get("prune_html", True)
+        self.html_max_chars = kwargs.get("html_max_chars", 20000)
+
+        # 每个实例使用独立的API客户端，首次调用时创建
+        self._client: Optional[openai.OpenAI] = None
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+
+        # 异步调度：限制并发数、每分钟请求数和token数，429时退避重试
+        self.max_retries = kwargs.get("llm_max_retries", 5)
+        self.limiter = RateLimiter(
+            max_concurrency=kwargs.get("llm_concurrency", 8),
+            requests_per_minute=kwargs.get("llm_rpm"),
+            tokens_per_minute=kwargs.get("llm_tpm"),
+        )
 
-        # 根据提供者设置API客户端
-        if self.provider == "openai":
-            openai.api_key = self.api_key
+        # 响应缓存，相同输入的重复运行不再调用LLM
+        self.cache: Optional[ResponseCache] = kwargs.get("llm_cache")
+        cache_path = kwargs.get("llm_cache_path")
+        if self.cache is None and cache_path and kwargs.get("use_llm_cache", True):
+            self.cache = ResponseCache(cache_path)
+
+        # 系统消息只构建一次，所有请求共享同一个前缀
+        self.system_prompt = kwargs.get("llm_system_prompt") or SYSTEM_PROMPT
+        self._system_message: Dict[str, str] = {
+            "role": "system",
+            "content": self.system_prompt,
+        }
+
+        # 分块模式下多个线程同时累加请求统计
+        self._stats_lock = threading.Lock()
 
     def optimize_markdown(
         self, extracted_data: Dict[str, Union[str, dict]]
@@ -43,69 +157,758 @@ class LLMProcessor:
         Returns:
             优化后的数据
         """
+        prepared = self._prepare(extracted_data)
+        if prepared is None:
+            return extracted_data
+        markdown, html, html_stats = prepared
+
+        quality = self._assess(markdown)
+        local = self._optimize_locally(extracted_data, quality, html_stats)
+        if local is not None:
+            return local
+
+        stats = self._new_stats()
+        try:
+            if self._needs_chunking(markdown):
+                result = self._optimize_chunked(extracted_data, html_stats, stats)
+            else:
+                optimized_markdown, cache_hit = self._complete(
+                    self._build_messages(markdown, html), stats
+                )
+                result = self._build_result(
+                    extracted_data, optimized_markdown, cache_hit, html_stats, stats
+                )
+
+        except Exception as e:
+            logger.error(f"LLM处理失败: {str(e)}")
+            result = self._fallback_result(extracted_data, html_stats)
+        return self._with_quality(result, quality)
+
+    async def optimize_markdown_async(
+        self, extracted_data: Dict[str, Union[str, dict]]
+    ) -> Dict[str, Union[str, dict]]:
+        """
+        使用LLM异步优化提取的markdown，请求经过调度器限速
+
+        Args:
+            extracted_data: 提取的数据，包含markdown和HTML
+
+        Returns:
+            优化后的数据
+        """
+        prepared = self._prepare(extracted_data)
+        if prepared is None:
+            return extracted_data
+        markdown, html, html_stats = prepared
+
+        quality = self._assess(markdown)
+        local = self._optimize_locally(extracted_data, quality, html_stats)
+        if local is not None:
+            return local
+
+        stats = self._new_stats()
+        try:
+            if self._needs_chunking(markdown):
+                result = await self._optimize_chunked_async(
+                    extracted_data, html_stats, stats
+                )
+            else:
+                optimized_markdown, cache_hit = await self._complete_async(
+                    self._build_messages(markdown, html), stats
+                )
+                result = self._build_result(
+                    extracted_data, optimized_markdown, cache_hit, html_stats, stats
+                )
+
+        except Exception as e:
+            logger.error(f"LLM处理失败: {str(e)}")
+            result = self._fallback_result(extracted_data, html_stats)
+        return self._with_quality(result, quality)
+
+    def optimize_markdown_stream(
+        self,
+        extracted_data: Dict[str, Union[str, dict]],
+        write: Callable[[str], Any],
+    ) -> Dict[str, Union[str, dict]]:
+        """
+        流式优化markdown，生成的文本片段一到达就交给write，调用方可以边生成边写出
+
+        长文档按顺序逐块流式优化；命中响应缓存时一次写出缓存内容。
+        开始输出前失败时写出原始markdown，输出中途失败时保留已写出的部分，
+        并在元数据的stream_error中记录错误。首个片段的到达时间记录在
+        optimize阶段指标的ttfb_seconds中
+
+        Args:
+            extracted_data: 提取的数据，包含markdown和HTML
+            write: 接收文本片段的函数，例如文件对象的write
+
+        Returns:
+            优化后的数据，markdown与写出的内容一致
+        """
+        prepared = self._prepare(extracted_data)
+        if prepared is None:
+            return extracted_data
+        markdown, html, html_stats = prepared
+
+        quality = self._assess(markdown)
+        local = self._optimize_locally(extracted_data, quality, html_stats)
+        if local is not None:
+            write(local["markdown"])
+            return local
+
+        stats: Dict[str, Any] = self._new_stats()
+        start = time.perf_counter()
+        written: List[str] = []
+
+        def emit(text: str):
+            if not text:
+                return
+            if not written:
+                stats["ttfb_seconds"] = round(time.perf_counter() - start, 4)
+            written.append(text)
+            write(text)
+
+        parts: List[Tuple[str, Optional[Tuple[int, int]]]]
+        if self._needs_chunking(markdown):
+            chunks = split_markdown(markdown, self.chunk_tokens)
+            logger.info(f"文档较长，分为{len(chunks)}块流式优化")
+            parts = [
+                (chunk, (index + 1, len(chunks))) for index, chunk in enumerate(chunks)
+            ]
+        else:
+            parts = [(markdown, None)]
+
+        outputs = []
+        error = None
+        for index, (content, part) in enumerate(parts):
+            if index:
+                emit("\n\n")
+            emitted = len(written)
+            try:
+                optimized, cache_hit = self._complete_stream(
+                    self._build_messages(content, "" if part else html, part),
+                    emit,
+                    stats,
+                )
+                outputs.append((optimized, cache_hit, True))
+            except Exception as e:
+                logger.error(f"LLM流式处理失败: {str(e)}")
+                outputs.append((self._fallback_text(content), False, False))
+                if len(written) == emitted:
+                    emit(outputs[-1][0])
+                else:
+                    error = str(e)
+
+        if len(outputs) > 1:
+            result = self._merge_chunks(extracted_data, outputs, html_stats, stats)
+        elif outputs[0][2]:
+            result = self._build_result(
+                extracted_data, outputs[0][0], outputs[0][1], html_stats, stats
+            )
+        else:
+            result = dict(self._fallback_result(extracted_data, html_stats))
+            result["metadata"] = dict(result.get("metadata") or {})
+            self._attach_stats(result, stats, False)
+        result["markdown"] = "".join(written)
+        if error:
+            result["metadata"]["stream_error"] = error
+        return self._with_quality(result, quality)
+
+    async def optimize_batch(
+        self, extracted_data_list: List[Dict[str, Union[str, dict]]]
+    ) -> List[Dict[str, Union[str, dict]]]:
+        """
+        异步批量优化，吞吐量由调度器的并发数和RPM/TPM配额决定
+
+        Args:
+            extracted_data_list: 提取的数据列表
+
+        Returns:
+            优化后的数据列表，顺序与输入一致
+        """
+        return list(
+            await asyncio.gather(
+                *(self.optimize_markdown_async(data) for data in extracted_data_list)
+            )
+        )
+
+    @property
+    def client(self) -> openai.OpenAI:
+        """同步API客户端"""
+        client = self._client
+        if client is None:
+            client = self.backend.create_client()
+            if client is None:
+                raise RuntimeError(f"LLM提供者{self.provider}不使用API客户端")
+            self._client = client
+        return client
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """异步API客户端，重试由调度器处理"""
+        client = self._async_client
+        if client is None:
+            client = self.backend.create_async_client()
+            if client is None:
+                raise RuntimeError(f"LLM提供者{self.provider}不使用API客户端")
+            self._async_client = client
+        return client
+
+    def _prepare(
+        self, extracted_data: Dict[str, Any]
+    ) -> Optional[Tuple[str, str, Optional[dict]]]:
+        """
+        检查输入并预处理HTML
+
+        Args:
+            extracted_data: 提取的数据
+
+        Returns:
+            (markdown, 预处理后的HTML, HTML裁剪统计)，无法优化时返回None
+        """
         markdown = extracted_data.get("markdown", "")
         html = extracted_data.get("html", "")
 
         if not markdown:
             logger.warning("没有提供markdown内容进行优化")
+            return None
+
+        html_stats = None
+        if self.prune_html and html:
+            html, html_stats = self._prune_html(html)
+
+        return markdown, html, html_stats
+
+    def _needs_chunking(self, markdown: str) -> bool:
+        """
+        判断是否需要分块优化
+
+        只按markdown的长度判断：分块请求不附带HTML，HTML的长度由html_max_chars单独限制
+        """
+        return bool(self.chunk_tokens) and estimate_tokens(markdown) > self.chunk_tokens
+
+    def _build_result(
+        self,
+        extracted_data: Dict[str, Any],
+        optimized_markdown: Optional[str],
+        cache_hit: bool,
+        html_stats: Optional[dict] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        构建优化结果，包含原始数据和优化后的markdown
+
+        Args:
+            extracted_data: 提取的数据
+            optimized_markdown: 优化后的markdown
+            cache_hit: 是否命中响应缓存
+            html_stats: HTML裁剪统计信息
+            stats: 请求统计
+
+        Returns:
+            优化后的数据
+        """
+        result = dict(extracted_data)
+        result["markdown"] = optimized_markdown
+        result["metadata"] = dict(result.get("metadata") or {})
+        result["metadata"]["optimized"] = True
+        if self.cache is not None:
+            result["metadata"]["llm_cache_hit"] = cache_hit
+        if html_stats is not None:
+            result["metadata"]["html_pruning"] = html_stats
+        self._attach_stats(result, stats, cache_hit)
+        return result
+
+    def _optimize_with_rules(
+        self,
+        extracted_data: Dict[str, Any],
+        html_stats: Optional[dict] = None,
+    ) -> Dict[str, Any]:
+        """
+        按规则优化，不发送请求
+
+        Args:
+            extracted_data: 提取的数据
+            html_stats: HTML裁剪统计信息
+
+        Returns:
+            优化后的数据
+        """
+        result = self._build_result(
+            extracted_data,
+            rule_optimize(extracted_data.get("markdown", "")),
+            False,
+            html_stats,
+            self._new_stats(),
+        )
+        result["metadata"]["optimizer"] = "rules"
+        return result
+
+    def _assess(self, markdown: str) -> Optional[dict]:
+        """
+        分析markdown质量并决定处理方式
+
+        Args:
+            markdown: 提取的markdown
+
+        Returns:
+            包含score、blocks、issues和decision的质量报告，未启用质量分级时返回None
+        """
+        if not self.triage:
+            return None
+        report = analyze_markdown(markdown)
+        report["decision"] = decide(report, self.triage_threshold)
+        logger.info(f"markdown质量分: {report['score']}，处理方式: {report['decision']}")
+        return report
+
+    def _optimize_locally(
+        self,
+        extracted_data: Dict[str, Any],
+        quality: Optional[dict],
+        html_stats: Optional[dict] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        不需要调用LLM时在本地处理：质量合格的跳过，规则提供者或只有格式问题的按规则优化
+
+        Args:
+            extracted_data: 提取的数据
+            quality: 质量报告
+            html_stats: HTML裁剪统计信息
+
+        Returns:
+            处理结果，需要调用LLM时返回None
+        """
+        decision = quality["decision"] if quality else DECISION_LLM
+        if decision == DECISION_SKIP:
+            result = dict(extracted_data)
+            result["metadata"] = dict(result.get("metadata") or {})
+            result["metadata"]["optimized"] = False
+            self._attach_stats(result, self._new_stats(), False)
+        elif decision == DECISION_RULES or self.backend.rule_based:
+            result = self._optimize_with_rules(extracted_data, html_stats)
+        else:
+            return None
+        return self._with_quality(result, quality)
+
+    @staticmethod
+    def _with_quality(
+        result: Dict[str, Any], quality: Optional[dict]
+    ) -> Dict[str, Any]:
+        """将质量报告写入结果元数据，并在optimize阶段指标中记录处理方式"""
+        if quality is None:
+            return result
+        result = dict(result)
+        result["metadata"] = dict(result.get("metadata") or {})
+        result["metadata"]["quality"] = quality
+        metrics = dict(result["metadata"].get("metrics", {}))
+        metrics[STAGE_OPTIMIZE] = dict(
+            metrics.get(STAGE_OPTIMIZE, {}), triage=quality["decision"]
+        )
+        result["metadata"]["metrics"] = metrics
+        return result
+
+    def _fallback_text(self, markdown: str) -> str:
+        """LLM请求失败时的文本：启用规则后备时按规则优化，否则保留原文"""
+        return rule_optimize(markdown) if self.fallback == "rules" else markdown
+
+    def _fallback_result(
+        self,
+        extracted_data: Dict[str, Any],
+        html_stats: Optional[dict] = None,
+    ) -> Dict[str, Any]:
+        """LLM请求失败时的结果：启用规则后备时按规则优化，否则返回原数据"""
+        if self.fallback != "rules":
             return extracted_data
+        logger.info("使用规则优化作为后备")
+        return self._optimize_with_rules(extracted_data, html_stats)
 
-        # 构建提示词
-        system_prompt = """
-你是一个专业的HTML到Markdown转换专家。你的任务是检查从HTML生成的Markdown文本，
-改进其质量，确保其格式正确，并修复任何问题。遵循以下规则：
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        """创建请求统计字典"""
+        return {
+            "requests": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+        }
 
-1. 确保保留原始内容的结构和层次
-2. 正确处理标题、列表、表格、链接和图片
-3. 移除不必要的空白行和重复内容
-4. 修正格式错误，如标题级别跳过或嵌套不当的列表
-5. 保持代码块的格式和语法高亮
-6. 保留原始的链接URL和图片URL
+    def _record_usage(self, stats: Optional[Dict[str, int]], response, retries: int):
+        """
+        累加一次LLM调用的重试次数和token用量，包括命中服务端提示词缓存的token数
 
-返回优化后的Markdown文本，不要添加任何解释或注释。
-"""
+        Args:
+            stats: 请求统计，为None时忽略
+            response: LLM响应
+            retries: 本次调用的重试次数
+        """
+        if stats is None:
+            return
+        usage = getattr(response, "usage", None)
+        with self._stats_lock:
+            stats["requests"] += 1
+            stats["retries"] += retries
+            for key in ("prompt_tokens", "completion_tokens"):
+                value = getattr(usage, key, None)
+                if isinstance(value, int):
+                    stats[key] += value
+            cached = _cached_tokens(usage)
+            if cached:
+                stats["cached_tokens"] += cached
 
-        user_prompt = f"""
-请检查并优化下面的Markdown内容。
+    def _attach_stats(
+        self,
+        result: Dict[str, Any],
+        stats: Optional[Dict[str, Any]],
+        cache_hit: bool,
+    ):
+        """将请求统计写入结果元数据的optimize阶段指标"""
+        if stats is None:
+            return
+        metrics = dict(result["metadata"].get("metrics", {}))
+        metrics[STAGE_OPTIMIZE] = dict(stats)
+        if self.cache is not None:
+            metrics[STAGE_OPTIMIZE]["cache_hit"] = cache_hit
+        result["metadata"]["metrics"] = metrics
 
-这是原始提取的Markdown:
-```
-{markdown}
-```
+    def _prune_html(self, html: str) -> Tuple[str, dict]:
+        """
+        裁剪HTML并统计节省的字节数和token数
 
-需要时，你可以参考原始HTML:
-```
-{html}
-```
+        Args:
+            html: 原始HTML
 
-请返回优化后的Markdown:
-"""
+        Returns:
+            (裁剪后的HTML, 统计信息)
+        """
+        pruned = prune_html(html, self.html_max_chars)
+        tokens_before = estimate_tokens(html)
+        tokens_after = estimate_tokens(pruned["html"])
+        stats = {
+            "bytes_before": pruned["bytes_before"],
+            "bytes_after": pruned["bytes_after"],
+            "bytes_saved": pruned["bytes_before"] - pruned["bytes_after"],
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "truncated": pruned["truncated"],
+        }
+        logger.info(
+            f"HTML裁剪: {stats['bytes_before']} -> {stats['bytes_after']}字节, "
+            f"节省约{stats['tokens_saved']}个token"
+        )
+        return pruned["html"], stats
 
-        try:
-            if self.provider == "openai":
-                response = openai.chat.completions.create(
+    def _build_messages(
+        self, markdown: str, html: str = "", part: Optional[Tuple[int, int]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        构建提示词消息
+
+        系统消息在初始化时构建且内容固定，作为所有请求共同的前缀，
+        可被服务端的提示词缓存复用；可变的markdown和HTML只出现在其后的用户消息中
+
+        Args:
+            markdown: 待优化的markdown
+            html: 原始HTML，为空时不附带
+            part: 分块模式下的(序号, 总数)，序号从1开始
+
+        Returns:
+            消息列表
+        """
+        if part:
+            intro = PART_INTRO.format(index=part[0], total=part[1])
+        else:
+            intro = "请检查并优化下面的Markdown内容。"
+
+        user_prompt = f"{intro}\n\n这是原始提取的Markdown:\n```\n{markdown}\n```\n"
+        if html:
+            user_prompt += f"\n原始HTML:\n```\n{html}\n```\n"
+
+        return [self._system_message, {"role": "user", "content": user_prompt}]
+
+    def _complete(
+        self, messages: List[Dict[str, str]], stats: Optional[Dict[str, int]] = None
+    ) -> Tuple[Optional[str], bool]:
+        """
+        调用LLM，优先读取响应缓存
+
+        Args:
+            messages: 提示词消息
+            stats: 请求统计，累加请求数和token用量
+
+        Returns:
+            (响应文本, 是否命中缓存)
+        """
+        cache_key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached, True
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=cast(List[ChatCompletionMessageParam], messages),
+            temperature=self.temperature,
+        )
+        self._record_usage(stats, response, 0)
+        content = response.choices[0].message.content
+
+        self._cache_store(cache_key, content)
+        return content, False
+
+    def _complete_stream(
+        self,
+        messages: List[Dict[str, str]],
+        emit: Callable[[str], None],
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Tuple[str, bool]:
+        """
+        以流式方式调用LLM，每个文本片段到达时调用emit，优先读取响应缓存
+
+        Args:
+            messages: 提示词消息
+            emit: 接收文本片段的函数
+            stats: 请求统计，累加请求数和token用量
+
+        Returns:
+            (完整响应文本, 是否命中缓存)
+        """
+        cache_key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            emit(cached)
+            return cached, True
+
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=cast(List[ChatCompletionMessageParam], messages),
+            temperature=self.temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        pieces: List[str] = []
+        last_event = None
+        for event in stream:
+            # 最后一个事件只包含usage，没有choices
+            if getattr(event, "usage", None) is not None:
+                last_event = event
+            for choice in event.choices or []:
+                delta = choice.delta.content
+                if delta:
+                    pieces.append(delta)
+                    emit(delta)
+        self._record_usage(stats, last_event, 0)
+        content = "".join(pieces)
+
+        self._cache_store(cache_key, content)
+        return content, False
+
+    def _cache_lookup(
+        self, messages: List[Dict[str, str]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查询响应缓存
+
+        Args:
+            messages: 提示词消息
+
+        Returns:
+            (缓存键, 缓存的响应)，未启用缓存时缓存键为None
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = ResponseCache.make_key(
+            self.model, self.temperature, self.provider, messages
+        )
+        return cache_key, self.cache.get(cache_key)
+
+    def _cache_store(self, cache_key: Optional[str], content: Optional[str]):
+        """将非空响应写入响应缓存，未启用缓存时忽略"""
+        if self.cache is not None and cache_key is not None and content:
+            self.cache.set(cache_key, content)
+
+    async def _complete_async(
+        self, messages: List[Dict[str, str]], stats: Optional[Dict[str, int]] = None
+    ) -> Tuple[Optional[str], bool]:
+        """
+        异步调用LLM，优先读取响应缓存；请求受调度器限速，
+        遇到429、超时和5xx时按Retry-After或带抖动的指数退避重试
+
+        Args:
+            messages: 提示词消息
+            stats: 请求统计，累加请求数、重试次数和token用量
+
+        Returns:
+            (响应文本, 是否命中缓存)
+        """
+        cache_key, cached = self._cache_lookup(messages)
+        if cached is not None:
+            return cached, True
+
+        # 预计token数：提示词加上与markdown相当的输出
+        estimated = sum(estimate_tokens(m["content"]) for m in messages)
+        estimated += estimate_tokens(messages[-1]["content"]) // 2
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
+            actual = None
+            try:
+                response = await self.async_client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
+                    messages=cast(List[ChatCompletionMessageParam], messages),
                     temperature=self.temperature,
                 )
+                usage = getattr(response, "usage", None)
+                actual = getattr(usage, "total_tokens", None)
+                if not isinstance(actual, int):
+                    actual = None
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"LLM请求失败 (尝试 {attempt+1}/{self.max_retries+1})，"
+                    f"{delay:.1f}秒后重试: {str(e)}"
+                )
+                if isinstance(e, openai.RateLimitError):
+                    self.limiter.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            finally:
+                self.limiter.release(estimated, actual)
 
-                optimized_markdown = response.choices[0].message.content
+            self._record_usage(stats, response, attempt)
+            content = response.choices[0].message.content
+            self._cache_store(cache_key, content)
+            return content, False
 
-                # 返回结果，包含原始和优化后的内容
-                result = extracted_data.copy()
-                result["markdown"] = optimized_markdown
-                result["metadata"] = result.get("metadata", {})
-                result["metadata"]["optimized"] = True
+        raise RuntimeError("LLM请求重试次数耗尽")
 
-                return result
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """
+        计算重试等待时间，优先使用响应头中的Retry-After
 
-            else:
-                logger.error(f"不支持的LLM提供者: {self.provider}")
-                return extracted_data
+        Args:
+            error: 请求异常
+            attempt: 已尝试次数（从0开始）
 
-        except Exception as e:
-            logger.error(f"LLM处理失败: {str(e)}")
-            return extracted_data
+        Returns:
+            等待的秒数
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after") if hasattr(headers, "get") else None
+        try:
+            if retry_after is not None:
+                return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return min(60.0, 2.0**attempt) * (0.5 + random.random() / 2)
+
+    def _optimize_chunked(
+        self,
+        extracted_data: Dict[str, Any],
+        html_stats: Optional[dict] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        分块优化长文档：按标题和块边界切分markdown，并发优化各片段后按顺序拼接
+
+        分块模式下不附带原始HTML，单个片段优化失败时保留该片段的原文
+
+        Args:
+            extracted_data: 提取的数据
+            html_stats: HTML裁剪统计信息
+            stats: 请求统计，累加所有片段的请求
+
+        Returns:
+            优化后的数据
+        """
+        chunks = split_markdown(extracted_data.get("markdown", ""), self.chunk_tokens)
+        total = len(chunks)
+        logger.info(f"文档较长，分为{total}块进行优化")
+
+        def optimize_chunk(args: Tuple[int, str]) -> Tuple[str, bool, bool]:
+            index, chunk = args
+            try:
+                content, cache_hit = self._complete(
+                    self._build_messages(chunk, part=(index + 1, total)), stats
+                )
+                return content or chunk, cache_hit, True
+            except Exception as e:
+                logger.error(f"第{index+1}/{total}块优化失败: {str(e)}")
+                return self._fallback_text(chunk), False, False
+
+        with ThreadPoolExecutor(max(1, self.chunk_concurrency)) as pool:
+            outputs = list(pool.map(optimize_chunk, enumerate(chunks)))
+
+        return self._merge_chunks(extracted_data, outputs, html_stats, stats)
+
+    async def _optimize_chunked_async(
+        self,
+        extracted_data: Dict[str, Any],
+        html_stats: Optional[dict] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        异步分块优化长文档，各片段的请求由调度器统一限速
+
+        Args:
+            extracted_data: 提取的数据
+            html_stats: HTML裁剪统计信息
+            stats: 请求统计，累加所有片段的请求
+
+        Returns:
+            优化后的数据
+        """
+        chunks = split_markdown(extracted_data.get("markdown", ""), self.chunk_tokens)
+        total = len(chunks)
+        logger.info(f"文档较长，分为{total}块进行优化")
+
+        async def optimize_chunk(index: int, chunk: str) -> Tuple[str, bool, bool]:
+            try:
+                content, cache_hit = await self._complete_async(
+                    self._build_messages(chunk, part=(index + 1, total)), stats
+                )
+                return content or chunk, cache_hit, True
+            except Exception as e:
+                logger.error(f"第{index+1}/{total}块优化失败: {str(e)}")
+                return self._fallback_text(chunk), False, False
+
+        outputs = await asyncio.gather(
+            *(optimize_chunk(index, chunk) for index, chunk in enumerate(chunks))
+        )
+        return self._merge_chunks(extracted_data, list(outputs), html_stats, stats)
+
+    def _merge_chunks(
+        self,
+        extracted_data: Dict[str, Any],
+        outputs: List[Tuple[str, bool, bool]],
+        html_stats: Optional[dict] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        按顺序拼接各片段的优化结果
+
+        Args:
+            extracted_data: 提取的数据
+            outputs: 各片段的(文本, 是否命中缓存, 是否优化成功)
+            html_stats: HTML裁剪统计信息
+            stats: 请求统计
+
+        Returns:
+            优化后的数据
+        """
+        result = dict(extracted_data)
+        result["markdown"] = "\n\n".join(content.strip() for content, _, _ in outputs)
+        result["metadata"] = dict(result.get("metadata") or {})
+        result["metadata"]["optimized"] = any(ok for _, _, ok in outputs)
+        result["metadata"]["chunks"] = len(outputs)
+        result["metadata"]["failed_chunks"] = sum(1 for _, _, ok in outputs if not ok)
+        if self.cache is not None:
+            result["metadata"]["llm_cache_hit"] = all(hit for _, hit, _ in outputs)
+        if html_stats is not None:
+            result["metadata"]["html_pruning"] = html_stats
+        self._attach_stats(result, stats, all(hit for _, hit, _ in outputs))
+
+        return result
@@ -0,0 +1,171 @@
+"""
+LLM提供者模块，为LLM处理器创建不同后端的API客户端
+"""
+import logging
+import os
+from abc import ABC
+from typing import Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+# 本地OpenAI兼容服务的默认地址（llama.cpp server的默认端口）
+DEFAULT_LOCAL_BASE_URL = "http://127.0.0.1:8080/v1"
+
+# Azure OpenAI的默认API版本
+DEFAULT_AZURE_API_VERSION = "2024-06-01"
+
+
+class BaseProvider(ABC):
+    """
+    LLM提供者基类
+
+    提供同步和异步两种OpenAI风格的客户端，处理器通过chat.completions.create
+    发送请求；不调用LLM的提供者返回None
+    """
+
+    # 提供者名称，用于响应缓存键和元数据
+    name = "base"
+
+    # 是否不调用LLM，直接按规则优化
+    rule_based = False
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        初始化提供者
+
+        Args:
+            api_key: API密钥
+            **kwargs: 其他配置参数
+        """
+        self.api_key = api_key
+        self.base_url: Optional[str] = kwargs.get("llm_base_url")
+
+    def create_client(self) -> Optional[openai.OpenAI]:
+        """创建同步客户端"""
+        return None
+
+    def create_async_client(self) -> Optional[openai.AsyncOpenAI]:
+        """创建异步客户端，重试由处理器的调度器负责"""
+        return None
+
+
+class OpenAIProvider(BaseProvider):
+    """OpenAI API，llm_base_url可指向其他兼容服务"""
+
+    name = "openai"
+
+    def create_client(self) -> openai.OpenAI:
+        return openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+
+    def create_async_client(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=self.api_key, base_url=self.base_url, max_retries=0
+        )
+
+
+class AzureProvider(BaseProvider):
+    """Azure OpenAI，模型名为部署名称"""
+
+    name = "azure"
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        初始化Azure提供者
+
+        Args:
+            api_key: API密钥，为空时使用环境变量AZURE_OPENAI_API_KEY
+            **kwargs: 其他配置参数，其中:
+                - llm_base_url: 资源地址，默认为环境变量AZURE_OPENAI_ENDPOINT
+                - llm_api_version: API版本，默认为环境变量OPENAI_API_VERSION
+        """
+        super().__init__(api_key or os.getenv("AZURE_OPENAI_API_KEY"), **kwargs)
+        self.base_url = self.base_url or os.getenv("AZURE_OPENAI_ENDPOINT")
+        self.api_version = (
+            kwargs.get("llm_api_version")
+            or os.getenv("OPENAI_API_VERSION")
+            or DEFAULT_AZURE_API_VERSION
+        )
+
+    def _endpoint(self) -> str:
+        """Azure资源地址，未配置时报错"""
+        if not self.base_url:
+            raise ValueError(
+                "未配置Azure资源地址，请设置llm_base_url或环境变量AZURE_OPENAI_ENDPOINT"
+            )
+        return self.base_url
+
+    def create_client(self) -> openai.AzureOpenAI:
+        return openai.AzureOpenAI(
+            api_key=self.api_key,
+            azure_endpoint=self._endpoint(),
+            api_version=self.api_version,
+        )
+
+    def create_async_client(self) -> openai.AsyncAzureOpenAI:
+        return openai.AsyncAzureOpenAI(
+            api_key=self.api_key,
+            azure_endpoint=self._endpoint(),
+            api_version=self.api_version,
+            max_retries=0,
+        )
+
+
+class LocalProvider(OpenAIProvider):
+    """
+    本地OpenAI兼容服务，例如llama.cpp server或vLLM
+
+    不需要API密钥，也不受外部配额限制；这类服务会将并发请求合并为批次推理，
+    吞吐量由处理器的llm_concurrency决定
+    """
+
+    name = "local"
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        初始化本地提供者
+
+        Args:
+            api_key: API密钥，本地服务通常不校验
+            **kwargs: 其他配置参数，其中llm_base_url默认为环境变量
+                LOCAL_LLM_BASE_URL，两者都为空时为http://127.0.0.1:8080/v1
+        """
+        # 客户端要求非空的API密钥
+        super().__init__(api_key or "local", **kwargs)
+        self.base_url = (
+            self.base_url or os.getenv("LOCAL_LLM_BASE_URL") or DEFAULT_LOCAL_BASE_URL
+        )
+
+
+class RuleProvider(BaseProvider):
+    """按固定规则优化，不调用LLM，结果确定且没有请求开销"""
+
+    name = "rules"
+    rule_based = True
+
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (OpenAIProvider, AzureProvider, LocalProvider, RuleProvider)
+}
+
+
+def get_provider(name: str, api_key: Optional[str] = None, **kwargs) -> BaseProvider:
+    """
+    创建指定名称的提供者
+
+    Args:
+        name: 提供者名称，支持"openai"、"azure"、"local"和"rules"
+        api_key: API密钥
+        **kwargs: 其他配置参数
+
+    Returns:
+        提供者实例
+
+    Raises:
+        ValueError: 不支持的提供者
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"不支持的LLM提供者: {name}")
+    return PROVIDERS[name](api_key, **kwargs)
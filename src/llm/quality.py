@@ -0,0 +1,183 @@
+"""
+Markdown质量分析模块，在本地检查提取结果的常见问题，决定是否需要LLM优化
+"""
+import re
+from typing import Any, Dict, List
+
+from src.llm.rules import BLOCK_CODE, BLOCK_HEADING, BLOCK_TEXT, split_blocks
+
+# 处理决策
+DECISION_SKIP = "skip"
+DECISION_RULES = "rules"
+DECISION_LLM = "llm"
+
+# 规则优化可以修复的问题
+RULE_ISSUES = (
+    "heading_skips",
+    "empty_headings",
+    "unclosed_fences",
+    "duplicate_blocks",
+    "excess_blank_lines",
+)
+
+# 需要LLM处理的问题
+LLM_ISSUES = ("broken_tables", "broken_links", "repeated_blocks")
+
+# 各问题在质量分中的权重
+ISSUE_WEIGHTS = {
+    "heading_skips": 1.0,
+    "empty_headings": 0.5,
+    "unclosed_fences": 3.0,
+    "duplicate_blocks": 1.0,
+    "excess_blank_lines": 0.25,
+    "broken_tables": 3.0,
+    "broken_links": 1.0,
+    "repeated_blocks": 1.0,
+}
+
+# 参与重复检测的最短段落长度，避免把短标签算作重复
+MIN_DUPLICATE_CHARS = 20
+
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_LINK_RE = re.compile(r"!?\[[^\]]*\]\(([^)]*)\)")
+_TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_BLANK_RUN_RE = re.compile(r"\n[ \t]*\n([ \t]*\n)+")
+
+
+def _unclosed_fences(markdown: str) -> int:
+    """统计未闭合的代码块"""
+    fence = None
+    for line in markdown.split("\n"):
+        if fence is None:
+            match = _FENCE_RE.match(line)
+            if match:
+                fence = match.group(1)
+        elif line.strip().startswith(fence):
+            fence = None
+    return int(fence is not None)
+
+
+def _table_cells(row: str) -> int:
+    """统计表格行的单元格数"""
+    return len(row.strip().strip("|").split("|"))
+
+
+def _broken_tables(lines: List[str]) -> int:
+    """统计缺少分隔行或各行列数不一致的表格"""
+    broken = 0
+    table: List[str] = []
+    for line in lines + [""]:
+        if line.lstrip().startswith("|"):
+            table.append(line)
+            continue
+        if len(table) >= 2:
+            cells = {_table_cells(row) for row in table}
+            if not _TABLE_SEPARATOR_RE.match(table[1]) or len(cells) > 1:
+                broken += 1
+        table = []
+    return broken
+
+
+def _broken_links(text: str) -> int:
+    """统计地址为空、含空白或未闭合的链接和图片"""
+    broken = 0
+    for match in _LINK_RE.finditer(text):
+        href = match.group(1).strip()
+        # 允许 [text](url "title") 形式的标题
+        target = href.split(' "')[0]
+        if not target or " " in target or target.startswith("javascript:"):
+            broken += 1
+    # 有"]("却没有匹配到完整链接的，视为未闭合
+    broken += max(0, text.count("](") - len(_LINK_RE.findall(text)))
+    return broken
+
+
+def analyze_markdown(markdown: str) -> Dict[str, Any]:
+    """
+    分析markdown质量
+
+    检查标题跳级、空标题、未闭合的代码块、连续和非连续的重复段落、
+    多余空行、表格结构和链接完整性，并按问题权重计算0-1的质量分
+
+    Args:
+        markdown: markdown文本
+
+    Returns:
+        包含质量分score、块数blocks和各问题数量issues的字典
+    """
+    blocks = split_blocks(markdown)
+    issues = dict.fromkeys(ISSUE_WEIGHTS, 0)
+    issues["unclosed_fences"] = _unclosed_fences(markdown)
+
+    last_level = None
+    previous = None
+    seen = set()
+    prose: List[str] = []
+    for kind, text in blocks:
+        if kind == BLOCK_HEADING:
+            level = len(text) - len(text.lstrip("#"))
+            if not text.lstrip("#").strip("# \t"):
+                issues["empty_headings"] += 1
+                continue
+            if last_level is not None and level > last_level + 1:
+                issues["heading_skips"] += 1
+            last_level = level
+        elif kind == BLOCK_TEXT:
+            prose.append(text)
+            if len(text) >= MIN_DUPLICATE_CHARS:
+                if text == previous:
+                    issues["duplicate_blocks"] += 1
+                elif text in seen:
+                    issues["repeated_blocks"] += 1
+                seen.add(text)
+        if kind != BLOCK_CODE:
+            previous = text
+
+    prose_text = "\n".join(prose)
+    issues["broken_tables"] = _broken_tables(prose_text.split("\n"))
+    issues["broken_links"] = _broken_links(prose_text)
+    issues["excess_blank_lines"] = len(_BLANK_RUN_RE.findall(markdown))
+
+    penalty = sum(ISSUE_WEIGHTS[name] * count for name, count in issues.items())
+    return {
+        "score": round(max(0.0, 1.0 - penalty / max(5, len(blocks))), 3),
+        "blocks": len(blocks),
+        "issues": issues,
+    }
+
+
+def decide(report: Dict[str, Any], llm_below: float = 0.8) -> str:
+    """
+    根据质量分析结果决定处理方式
+
+    没有问题时跳过优化；存在只有LLM能修复的问题且质量分低于llm_below时交给LLM；
+    否则有问题时使用规则优化
+
+    Args:
+        report: analyze_markdown的结果
+        llm_below: 交给LLM的质量分阈值
+
+    Returns:
+        "skip"、"rules"或"llm"
+    """
+    issues = report["issues"]
+    if any(issues[name] for name in LLM_ISSUES) and report["score"] < llm_below:
+        return DECISION_LLM
+    if any(issues[name] for name in RULE_ISSUES):
+        return DECISION_RULES
+    return DECISION_SKIP
+
+
+def optimization_ok(result: Dict[str, Any]) -> bool:
+    """
+    判断optimize阶段是否成功：已经优化，或质量合格而跳过优化
+
+    Args:
+        result: 优化阶段的结果
+
+    Returns:
+        是否成功
+    """
+    metadata = result.get("metadata") or {}
+    quality = metadata.get("quality") or {}
+    return bool(metadata.get("optimized")) or quality.get("decision") == DECISION_SKIP
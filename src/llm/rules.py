@@ -0,0 +1,115 @@
+"""
+基于规则的markdown优化模块，不调用LLM，结果确定，可作为离线优化或LLM失败时的后备
+"""
+import re
+from typing import List, Optional, Tuple
+
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_HEADING_RE = re.compile(r"^(#{1,6})(?:\s+(.*?))?(?:\s+#+)?\s*$")
+_BULLET_RE = re.compile(r"^(\s*)[*+](\s+)")
+_RULE_RE = re.compile(r"^\s*([*_-])(\s*\1){2,}\s*$")
+
+# 块类型
+BLOCK_TEXT = "text"
+BLOCK_HEADING = "heading"
+BLOCK_CODE = "code"
+
+
+def split_blocks(markdown: str) -> List[Tuple[str, str]]:
+    """
+    将markdown切分为(类型, 文本)块：空行分隔段落，标题单独成块，代码块原样保留
+
+    Args:
+        markdown: markdown文本
+
+    Returns:
+        块列表
+    """
+    blocks: List[Tuple[str, str]] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+
+    def flush():
+        if current:
+            blocks.append((BLOCK_TEXT, "\n".join(current)))
+            current.clear()
+
+    for line in markdown.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if fence is not None:
+            current.append(line)
+            if line.strip().startswith(fence):
+                blocks.append((BLOCK_CODE, "\n".join(current)))
+                current.clear()
+                fence = None
+            continue
+
+        match = _FENCE_RE.match(line)
+        if match:
+            flush()
+            fence = match.group(1)
+            current.append(line.rstrip())
+        elif not line.strip():
+            flush()
+        elif line.lstrip().startswith("#") and _HEADING_RE.match(line.strip()):
+            flush()
+            blocks.append((BLOCK_HEADING, line.strip()))
+        else:
+            current.append(line.rstrip())
+
+    if fence is not None:
+        # 补全未闭合的代码块
+        current.append(fence)
+        blocks.append((BLOCK_CODE, "\n".join(current)))
+    else:
+        flush()
+    return blocks
+
+
+def _normalize_bullets(text: str) -> str:
+    """将*和+列表标记统一为-，分隔线保持不变"""
+    lines = []
+    for line in text.split("\n"):
+        if not _RULE_RE.match(line):
+            line = _BULLET_RE.sub(r"\1-\2", line, count=1)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def rule_optimize(markdown: str) -> str:
+    """
+    按固定规则整理markdown
+
+    规则与LLM提示词中的要求对应：修正标题跳级并去掉闭合的#，
+    列表标记统一为-，合并多余空行，移除连续重复的段落，
+    补全未闭合的代码块，代码块内容保持不变
+
+    Args:
+        markdown: markdown文本
+
+    Returns:
+        整理后的markdown
+    """
+    output: List[str] = []
+    last_level: Optional[int] = None
+    previous: Optional[str] = None
+
+    for kind, text in split_blocks(markdown):
+        if kind == BLOCK_HEADING:
+            match = _HEADING_RE.match(text)
+            if match is None or not match.group(2):
+                continue
+            hashes, title = match.groups()
+            level = len(hashes)
+            if last_level is not None and level > last_level + 1:
+                level = last_level + 1
+            last_level = level
+            text = f"{'#' * level} {title}"
+        elif kind == BLOCK_TEXT:
+            text = _normalize_bullets(text)
+
+        if kind != BLOCK_CODE and text == previous:
+            continue
+        previous = text
+        output.append(text)
+
+    return "\n\n".join(output)
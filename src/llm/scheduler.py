@@ -0,0 +1,144 @@
+"""
+LLM请求调度模块，按每分钟请求数和token数限制请求速率
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    令牌桶，容量为每分钟配额，按配额匀速补充
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        初始化令牌桶
+
+        Args:
+            per_minute: 每分钟配额
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        """按经过的时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        计算获取指定数量令牌需要等待的时间
+
+        Args:
+            amount: 需要的令牌数，超过容量时按容量计算
+
+        Returns:
+            需要等待的秒数
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """
+        扣除令牌，允许为负以记录超额使用
+
+        Args:
+            amount: 令牌数
+        """
+        self._refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    LLM请求调度器
+
+    同时限制并发请求数、每分钟请求数(RPM)和每分钟token数(TPM)，
+    收到429响应后暂停所有请求直到Retry-After指定的时间
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_concurrency: 最大并发请求数
+            requests_per_minute: 每分钟请求数上限，为None时不限制
+            tokens_per_minute: 每分钟token数上限，为None时不限制
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取绑定当前事件循环的信号量"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """
+        等待直到可以发送一个预计消耗estimated_tokens的请求，并占用一个并发名额
+
+        Args:
+            estimated_tokens: 预计消耗的token数
+        """
+        await self._get_semaphore().acquire()
+        try:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(estimated_tokens)
+        except BaseException:
+            self._get_semaphore().release()
+            raise
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None):
+        """
+        释放并发名额，并按实际消耗修正token配额
+
+        Args:
+            estimated_tokens: acquire时预计的token数
+            actual_tokens: 实际消耗的token数，为None时不修正
+        """
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+        self._get_semaphore().release()
+
+    def pause(self, seconds: float):
+        """
+        暂停所有请求，用于处理429响应
+
+        Args:
+            seconds: 暂停的秒数
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
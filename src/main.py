@@ -2,17 +2,33 @@
 Web Benchmark Agent主入口模块
 """
 import argparse
-import json
 import logging
 import os
 import sys
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, Iterable, List, Optional, TextIO, Union
 
 from dotenv import load_dotenv
 
+from src.extractors.cache import DEFAULT_MAX_SIZE, CachedExtractor, ExtractorCache
+from src.extractors.combined import CombinedExtractor
 from src.extractors.firecrawl import FirecrawlExtractor
 from src.extractors.jina import JinaExtractor
+from src.extractors.local import LocalExtractor, expand_sources
 from src.llm.processor import LLMProcessor
+from src.llm.quality import optimization_ok
+from src.pipeline.ingest import DEFAULT_MAX_PAGE_BYTES, iter_pages
+from src.pipeline.journal import JobJournal
+from src.pipeline.runner import BatchPipeline
+from src.pipeline.sinks import get_sink, write_result_files
+from src.utils.metrics import (
+    REGISTRY,
+    STAGE_EXTRACT,
+    STAGE_OPTIMIZE,
+    STAGE_SAVE,
+    Timer,
+    record_stage,
+    start_metrics_server,
+)
 
 # 设置日志
 logging.basicConfig(
@@ -32,20 +48,79 @@ def get_extractor(extractor_type: str = "firecrawl", **kwargs):
     获取指定类型的提取器
 
     Args:
-        extractor_type: 提取器类型，支持"firecrawl"和"jina"
+        extractor_type: 提取器类型，支持"firecrawl"、"jina"、"local"和"combined"
+        **kwargs: 提取器配置，其中本地提取器的配置为:
+            - local_workers: 本地转换的工作进程数，默认为CPU核数
+            组合提取器的配置为:
+            - combined_extractors: 组合的提取器类型列表，第一个为主提取器，
+              默认为["firecrawl", "jina"]
+            - hedge_delay: 延迟样本不足时启动后备提取器的等待时间(秒)
+            - hedge_percentile: 以主提取器延迟的该百分位数作为对冲截止时间
+            缓存相关配置为:
+            - use_cache: 是否启用提取结果缓存，默认为True
+            - cache_dir: 缓存目录，未指定时使用环境变量EXTRACTOR_CACHE_DIR，
+              两者都为空则不使用缓存
+            - cache_ttl: 缓存有效期(秒)
+            - cache_max_size: 缓存总大小上限(字节)，默认为1GB，为0时不限制
+
+    Returns:
+        提取器实例
+    """
+    use_cache = kwargs.pop("use_cache", True)
+    cache_dir = kwargs.pop("cache_dir", None) or os.getenv("EXTRACTOR_CACHE_DIR")
+    cache_ttl = kwargs.pop("cache_ttl", None)
+    cache_max_size = kwargs.pop("cache_max_size", DEFAULT_MAX_SIZE)
+    api_key = kwargs.pop("api_key", None)
+    combined_extractors = kwargs.pop("combined_extractors", None) or [
+        "firecrawl",
+        "jina",
+    ]
+
+    if extractor_type == "combined":
+        # 各子提取器使用各自的API密钥
+        extractors = [
+            _create_extractor(name, None, **kwargs) for name in combined_extractors
+        ]
+        hedge_delay = kwargs.get("hedge_delay")
+        hedge_percentile = kwargs.get("hedge_percentile")
+        extractor = CombinedExtractor(
+            extractors,
+            hedge_delay=2.0 if hedge_delay is None else hedge_delay,
+            hedge_percentile=95 if hedge_percentile is None else hedge_percentile,
+        )
+    else:
+        extractor = _create_extractor(extractor_type, api_key, **kwargs)
+
+    # 本地转换比读取缓存更快，且本地文件可能被修改，不使用提取缓存
+    if use_cache and cache_dir and extractor_type != "local":
+        cache = ExtractorCache(cache_dir, ttl=cache_ttl, max_size=cache_max_size)
+        logger.info(f"使用提取缓存: {cache_dir} ({len(cache)}条记录)")
+        return CachedExtractor(extractor, cache)
+
+    return extractor
+
+
+def _create_extractor(extractor_type: str, api_key: Optional[str] = None, **kwargs):
+    """
+    创建单个提取器
+
+    Args:
+        extractor_type: 提取器类型，支持"firecrawl"、"jina"和"local"
+        api_key: API密钥，为空时使用对应的环境变量
         **kwargs: 提取器配置
 
     Returns:
         提取器实例
     """
     if extractor_type == "firecrawl":
-        api_key = kwargs.get("api_key") or os.getenv("FIRECRAWL_API_KEY")
+        api_key = api_key or os.getenv("FIRECRAWL_API_KEY")
         return FirecrawlExtractor(api_key=api_key, **kwargs)
     elif extractor_type == "jina":
-        api_key = kwargs.get("api_key") or os.getenv("JINA_API_KEY")
+        api_key = api_key or os.getenv("JINA_API_KEY")
         return JinaExtractor(api_key=api_key, **kwargs)
-    else:
-        raise ValueError(f"不支持的提取器类型: {extractor_type}")
+    elif extractor_type == "local":
+        return LocalExtractor(workers=kwargs.pop("local_workers", None), **kwargs)
+    raise ValueError(f"不支持的提取器类型: {extractor_type}")
 
 
 def get_llm_processor(**kwargs):
@@ -53,13 +128,25 @@ def get_llm_processor(**kwargs):
     获取LLM处理器
 
     Args:
-        **kwargs: 处理器配置
+        **kwargs: 处理器配置，llm_cache_path未指定时使用环境变量LLM_CACHE_PATH，
+            llm_provider和llm_model未指定时使用环境变量LLM_PROVIDER和LLM_MODEL
 
     Returns:
         LLM处理器实例
     """
-    api_key = kwargs.get("api_key") or os.getenv("OPENAI_API_KEY")
-    return LLMProcessor(api_key=api_key, **kwargs)
+    kwargs["api_key"] = kwargs.get("api_key") or os.getenv("OPENAI_API_KEY")
+    kwargs["provider"] = (
+        kwargs.pop("llm_provider", None)
+        or kwargs.get("provider")
+        or os.getenv("LLM_PROVIDER", "openai")
+    )
+    kwargs["model"] = (
+        kwargs.pop("llm_model", None)
+        or kwargs.get("model")
+        or os.getenv("LLM_MODEL", "gpt-4")
+    )
+    kwargs.setdefault("llm_cache_path", os.getenv("LLM_CACHE_PATH"))
+    return LLMProcessor(**kwargs)
 
 
 def convert_url_to_markdown(
@@ -67,7 +154,8 @@ def convert_url_to_markdown(
     extractor_type: str = "firecrawl",
     optimize: bool = True,
     output_file: Optional[str] = None,
-    save_html: bool = None,
+    save_html: Optional[bool] = None,
+    stream: bool = False,
     **kwargs,
 ) -> Dict[str, Union[str, dict]]:
     """
@@ -79,6 +167,8 @@ def convert_url_to_markdown(
         optimize: 是否使用LLM优化
         output_file: 输出文件路径
         save_html: 是否保存HTML（如果为None则使用环境变量）
+        stream: 是否流式输出LLM优化结果，生成的文本立即写入output_file，
+            未指定output_file时写到标准输出
         **kwargs: 其他参数
 
     Returns:
@@ -92,127 +182,193 @@ def convert_url_to_markdown(
 
     # 1. 提取内容
     extractor = get_extractor(extractor_type, **kwargs)
-    extracted_data = extractor.extract(url)
+    with Timer() as timer:
+        extracted_data = extractor.extract(url)
+    record_stage(
+        extracted_data,
+        STAGE_EXTRACT,
+        timer.seconds,
+        ok=not extracted_data.get("metadata", {}).get("error"),
+    )
 
     logger.info(f"使用{extractor_type}提取完成")
 
     # 2. LLM优化（如果启用）
     if optimize and extracted_data.get("markdown"):
         processor = get_llm_processor(**kwargs)
-        result = processor.optimize_markdown(extracted_data)
+        with Timer() as timer:
+            if stream:
+                result = _optimize_streaming(processor, extracted_data, output_file)
+            else:
+                result = processor.optimize_markdown(extracted_data)
+        record_stage(
+            result,
+            STAGE_OPTIMIZE,
+            timer.seconds,
+            ok=optimization_ok(result),
+        )
         logger.info("LLM优化完成")
     else:
         result = extracted_data
 
     # 3. 保存结果（如果需要）
+    # 保存耗时在写出之后才能得到，只出现在返回的元数据和指标中
     if output_file:
-        output_dir = os.path.dirname(output_file)
-        if output_dir:  # 如果文件路径包含目录
-            os.makedirs(output_dir, exist_ok=True)
-
-        # 保存Markdown
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(result.get("markdown", ""))
-
-        # 保存HTML（如果需要）
-        if save_html and result.get("html"):
-            html_file = os.path.splitext(output_file)[0] + ".html"
-            with open(html_file, "w", encoding="utf-8") as f:
-                f.write(result.get("html", ""))
-            logger.info(f"已保存HTML到: {html_file}")
-
-        # 保存元数据
-        json_file = os.path.splitext(output_file)[0] + ".json"
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(result.get("metadata", {}), f, ensure_ascii=False, indent=2)
-        logger.info(f"已保存元数据到: {json_file}")
-
+        streamed = stream and optimize and bool(extracted_data.get("markdown"))
+        with Timer() as timer:
+            write_result_files(
+                result, output_file, save_html=save_html, write_markdown=not streamed
+            )
+        record_stage(result, STAGE_SAVE, timer.seconds)
         logger.info(f"已保存Markdown到: {output_file}")
 
     return result
 
 
+def _flushing_writer(stream: TextIO) -> Callable[[str], None]:
+    """返回写出文本片段后立即刷新的写函数"""
+
+    def write(text: str):
+        stream.write(text)
+        stream.flush()
+
+    return write
+
+
+def _optimize_streaming(
+    processor: LLMProcessor,
+    extracted_data: Dict[str, Union[str, dict]],
+    output_file: Optional[str] = None,
+) -> Dict[str, Union[str, dict]]:
+    """
+    流式优化并边生成边写出，每个片段写出后立即刷新，下游可以及时读取
+
+    Args:
+        processor: LLM处理器
+        extracted_data: 提取的数据
+        output_file: markdown输出文件路径，为空时写到标准输出
+
+    Returns:
+        优化后的数据
+    """
+    if not output_file:
+        return processor.optimize_markdown_stream(
+            extracted_data, _flushing_writer(sys.stdout)
+        )
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        return processor.optimize_markdown_stream(extracted_data, _flushing_writer(f))
+
+
 def convert_batch_urls(
-    urls: List[str],
+    urls: Iterable[Union[str, dict]],
     extractor_type: str = "firecrawl",
     optimize: bool = True,
     output_dir: Optional[str] = None,
-    save_html: bool = None,
+    save_html: Optional[bool] = None,
+    extract_concurrency: int = 16,
+    optimize_concurrency: int = 4,
+    write_concurrency: int = 4,
+    collect_results: bool = True,
+    journal_path: Optional[str] = None,
+    resume: bool = False,
+    output_format: str = "files",
+    shard_size: Optional[int] = None,
     **kwargs,
 ) -> List[Dict[str, Union[str, dict]]]:
     """
     批量转换URL
 
+    提取、LLM优化和保存以流水线方式并行进行，每个结果完成后立即写出
+
     Args:
-        urls: URL列表
+        urls: URL列表，也可以是已读取页面的生成器（见convert_corpus）
         extractor_type: 提取器类型
         optimize: 是否使用LLM优化
         output_dir: 输出目录
         save_html: 是否保存HTML（如果为None则使用环境变量）
+        extract_concurrency: 提取阶段并发数
+        optimize_concurrency: LLM优化阶段并发数
+        write_concurrency: 保存阶段并发数
+        collect_results: 是否在内存中收集并返回结果，大批量写文件时可关闭
+        journal_path: 任务日志路径，未指定且有输出目录时使用输出目录下的journal.jsonl
+        resume: 是否根据任务日志恢复运行，跳过已完成的URL
+        output_format: 输出格式，"files"为每个URL三个文件，
+            "jsonl"为gzip压缩的JSONL分片，"parquet"为Parquet分片
+        shard_size: 分片输出每个分片的记录数
         **kwargs: 其他参数
 
     Returns:
         结果列表
     """
-    logger.info(f"批量处理{len(urls)}个URL")
+    if isinstance(urls, list):
+        logger.info(f"批量处理{len(urls)}个URL")
 
     # 获取是否保存HTML的设置
     if save_html is None:
         save_html = os.getenv("SAVE_HTML", "false").lower() == "true"
 
-    # 1. 提取内容
     extractor = get_extractor(extractor_type, **kwargs)
-    extracted_data_list = extractor.extract_batch(urls)
-
-    logger.info(f"使用{extractor_type}批量提取完成")
-
-    # 2. LLM优化（如果启用）
-    results = []
-
-    if optimize:
-        processor = get_llm_processor(**kwargs)
-
-        for i, extracted_data in enumerate(extracted_data_list):
-            if extracted_data.get("markdown"):
-                result = processor.optimize_markdown(extracted_data)
-                results.append(result)
+    processor = get_llm_processor(**kwargs) if optimize else None
+
+    journal = None
+    if journal_path is None and output_dir:
+        journal_path = os.path.join(output_dir, "journal.jsonl")
+    if journal_path:
+        journal = JobJournal(journal_path, resume=resume)
+
+    sink = (
+        get_sink(output_format, output_dir, save_html, shard_size)
+        if output_dir
+        else None
+    )
 
-                logger.info(
-                    f"优化完成 ({i+1}/{len(extracted_data_list)}): {extracted_data.get('metadata', {}).get('url', '')}"
-                )
-            else:
-                results.append(extracted_data)
-    else:
-        results = extracted_data_list
+    pipeline = BatchPipeline(
+        extractor,
+        processor=processor,
+        sink=sink,
+        extract_concurrency=extract_concurrency,
+        optimize_concurrency=optimize_concurrency,
+        write_concurrency=write_concurrency,
+        journal=journal,
+    )
+    try:
+        results = pipeline.run_sync(urls, collect_results=collect_results)
+    finally:
+        if journal is not None:
+            journal.close()
 
-    # 3. 保存结果（如果需要）
     if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
+        logger.info(f"批量处理结果已保存到: {output_dir}")
 
-        for i, result in enumerate(results):
-            url_str = result.get("metadata", {}).get("url", "")
-            # 构建干净的文件名
-            filename_base = f"url_{i+1}"
+    return results
 
-            # 保存Markdown
-            md_filename = os.path.join(output_dir, f"{filename_base}.md")
-            with open(md_filename, "w", encoding="utf-8") as f:
-                f.write(result.get("markdown", ""))
 
-            # 保存HTML（如果需要）
-            if save_html and result.get("html"):
-                html_filename = os.path.join(output_dir, f"{filename_base}.html")
-                with open(html_filename, "w", encoding="utf-8") as f:
-                    f.write(result.get("html", ""))
+def convert_corpus(
+    paths: List[str],
+    max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+    **kwargs,
+) -> List[Dict[str, Union[str, dict]]]:
+    """
+    转换离线保存的页面语料
 
-            # 保存元数据
-            json_filename = os.path.join(output_dir, f"{filename_base}.json")
-            with open(json_filename, "w", encoding="utf-8") as f:
-                json.dump(result.get("metadata", {}), f, ensure_ascii=False, indent=2)
+    从WARC文件、tar/zip归档或HTML目录中流式读取页面，由本地提取器直接转换HTML，
+    再进入LLM优化和保存阶段；不重新请求页面，结果可复现
 
-        logger.info(f"批量处理结果已保存到: {output_dir}")
+    Args:
+        paths: 语料路径列表
+        max_page_bytes: 单个页面的大小上限(字节)，超过的页面被跳过
+        **kwargs: 传给convert_batch_urls的其他参数
 
-    return results
+    Returns:
+        结果列表
+    """
+    kwargs["extractor_type"] = "local"
+    logger.info(f"离线读取语料: {', '.join(paths)}")
+    return convert_batch_urls(iter_pages(paths, max_page_bytes), **kwargs)
 
 
 def main():
@@ -223,16 +379,198 @@ def main():
     parser.add_argument("--url", help="要处理的URL")
     parser.add_argument("--urls-file", help="包含URL列表的文件路径")
     parser.add_argument(
-        "--extractor", choices=["firecrawl", "jina"], default="firecrawl", help="使用的提取器"
+        "--ingest",
+        nargs="+",
+        metavar="PATH",
+        help="离线读取WARC文件、tar/zip归档或HTML目录中保存的页面并用本地提取器转换",
+    )
+    parser.add_argument(
+        "--max-page-size", type=int, default=10, help="离线读取时单个页面的大小上限(MB)"
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=["firecrawl", "jina", "local", "combined"],
+        default=os.getenv("DEFAULT_EXTRACTOR", "firecrawl"),
+        help="使用的提取器，local在本地转换HTML文件、目录或归档，combined对Firecrawl和Jina发送对冲请求",
+    )
+    parser.add_argument("--local-workers", type=int, help="local提取器的工作进程数，默认为CPU核数")
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=2.0,
+        help="combined提取器在延迟样本不足时启动后备提取器的等待时间(秒)",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=95,
+        help="combined提取器以主提取器延迟的该百分位数作为对冲截止时间",
     )
     parser.add_argument("--no-optimize", action="store_true", help="禁用LLM优化")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="处理单个URL时流式输出LLM优化结果，边生成边写入输出文件或标准输出",
+    )
     parser.add_argument("--output-file", help="单个URL的输出文件路径")
     parser.add_argument("--output-dir", help="批量处理的输出目录")
     parser.add_argument("--save-html", action="store_true", help="保存原始HTML")
+    parser.add_argument(
+        "--output-format",
+        choices=["files", "jsonl", "parquet"],
+        default="files",
+        help="批量处理的输出格式：每个URL三个文件、压缩JSONL分片或Parquet分片",
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=10000, help="JSONL/Parquet每个分片的记录数"
+    )
+    parser.add_argument(
+        "--retry-budget",
+        type=float,
+        default=0.2,
+        help="提取请求的重试预算，重试请求数最多为新请求数的该比例",
+    )
+    parser.add_argument(
+        "--circuit-threshold",
+        type=float,
+        default=0.5,
+        help="提取后端的熔断失败率阈值，超过时该后端的请求快速失败",
+    )
+    parser.add_argument(
+        "--circuit-cooldown", type=float, default=5.0, help="熔断器打开后的初始冷却时间(秒)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("EXTRACTOR_CACHE_DIR", "./.cache/extractor"),
+        help="提取结果缓存目录",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="禁用提取结果缓存")
+    parser.add_argument("--cache-ttl", type=float, help="提取结果缓存有效期(秒)")
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE // (1024 * 1024),
+        help="提取结果缓存总大小上限(MB)，0表示不限制",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        default=os.getenv("LLM_CACHE_PATH", "./.cache/llm.sqlite3"),
+        help="LLM响应缓存数据库路径",
+    )
+    parser.add_argument("--no-llm-cache", action="store_true", help="禁用LLM响应缓存")
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=6000,
+        help="长文档分块优化的token预算，超过时分块并发优化，0表示禁用",
+    )
+    parser.add_argument(
+        "--html-max-chars",
+        type=int,
+        default=20000,
+        help="裁剪后附带给LLM的HTML最大字符数，0表示不限制",
+    )
+    parser.add_argument(
+        "--llm-provider",
+        choices=["openai", "azure", "local", "rules"],
+        help="LLM提供者，local为本地OpenAI兼容服务，rules按规则优化不调用LLM，默认使用环境变量LLM_PROVIDER",
+    )
+    parser.add_argument("--llm-model", help="LLM模型名称，默认使用环境变量LLM_MODEL")
+    parser.add_argument(
+        "--llm-base-url",
+        help="LLM API地址，例如本地llama.cpp或vLLM服务的http://127.0.0.1:8080/v1",
+    )
+    parser.add_argument(
+        "--llm-fallback",
+        choices=["rules"],
+        help="LLM请求失败时的后备优化方式，rules表示按规则优化",
+    )
+    parser.add_argument(
+        "--triage",
+        action="store_true",
+        help="先在本地分析markdown质量，规范的文档跳过优化，只有格式问题的按规则修复",
+    )
+    parser.add_argument(
+        "--triage-threshold",
+        type=float,
+        default=0.8,
+        help="质量分低于该值且有表格、链接或重复内容问题时才调用LLM",
+    )
+    parser.add_argument("--llm-rpm", type=float, help="LLM每分钟请求数上限")
+    parser.add_argument("--llm-tpm", type=float, help="LLM每分钟token数上限")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="LLM最大并发请求数")
+    parser.add_argument("--journal", help="批量处理的任务日志路径，默认为输出目录下的journal.jsonl")
+    parser.add_argument(
+        "--resume", action="store_true", help="根据任务日志恢复中断的批量处理，跳过已完成的URL"
+    )
+    parser.add_argument(
+        "--extract-concurrency", type=int, default=16, help="批量处理时提取阶段的并发数"
+    )
+    parser.add_argument(
+        "--optimize-concurrency", type=int, default=4, help="批量处理时LLM优化阶段的并发数"
+    )
+    parser.add_argument(
+        "--write-concurrency", type=int, default=4, help="批量处理时保存阶段的并发数"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("METRICS_FILE"),
+        help="运行结束时以Prometheus文本格式写出各阶段指标的文件路径",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, help="运行期间在该端口提供Prometheus的/metrics端点"
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default=os.getenv("METRICS_HOST", "127.0.0.1"),
+        help="/metrics端点的监听地址，默认只监听本机，0.0.0.0表示所有网卡",
+    )
 
     args = parser.parse_args()
 
-    if args.url:
+    if args.metrics_port is not None:
+        start_metrics_server(args.metrics_port, host=args.metrics_host)
+
+    # 提取缓存、LLM响应缓存、提示词构建和LLM调度配置
+    common_kwargs = {
+        "local_workers": args.local_workers,
+        "retry_budget_ratio": args.retry_budget,
+        "circuit_failure_threshold": args.circuit_threshold,
+        "circuit_cooldown": args.circuit_cooldown,
+        "hedge_delay": args.hedge_delay,
+        "hedge_percentile": args.hedge_percentile,
+        "use_cache": not args.no_cache,
+        "cache_dir": args.cache_dir,
+        "cache_ttl": args.cache_ttl,
+        "cache_max_size": args.cache_max_size * 1024 * 1024,
+        "use_llm_cache": not args.no_llm_cache,
+        "llm_cache_path": args.llm_cache,
+        "chunk_tokens": args.chunk_tokens,
+        "html_max_chars": args.html_max_chars,
+        "llm_provider": args.llm_provider,
+        "llm_model": args.llm_model,
+        "llm_base_url": args.llm_base_url,
+        "llm_fallback": args.llm_fallback,
+        "llm_triage": args.triage,
+        "llm_triage_threshold": args.triage_threshold,
+        "llm_rpm": args.llm_rpm,
+        "llm_tpm": args.llm_tpm,
+        "llm_concurrency": args.llm_concurrency,
+    }
+
+    urls = None
+    if args.urls_file and not args.url and not args.ingest:
+        with open(args.urls_file, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+
+    if args.extractor == "local" and (args.url or urls):
+        # 目录和归档展开为其中的所有HTML文档，按批量处理
+        sources, collections = expand_sources(urls or [args.url])
+        if collections:
+            logger.info(f"本地提取: 展开{collections}个目录或归档，共{len(sources)}个HTML文档")
+            urls = sources
+
+    if urls is None and args.url:
         # 处理单个URL
         result = convert_url_to_markdown(
             url=args.url,
@@ -240,23 +578,45 @@ def main():
             optimize=not args.no_optimize,
             output_file=args.output_file,
             save_html=args.save_html,
+            stream=args.stream,
+            **common_kwargs,
         )
 
         if not args.output_file:
-            print(result.get("markdown", ""))
-
-    elif args.urls_file:
-        # 批量处理URL列表
-        with open(args.urls_file, "r", encoding="utf-8") as f:
-            urls = [line.strip() for line in f if line.strip()]
+            if args.stream and not args.no_optimize:
+                # markdown已流式写到标准输出，只补充换行
+                print()
+            else:
+                print(result.get("markdown", ""))
 
-        results = convert_batch_urls(
-            urls=urls,
-            extractor_type=args.extractor,
+    elif args.ingest or urls is not None:
+        batch_kwargs = dict(
             optimize=not args.no_optimize,
             output_dir=args.output_dir,
             save_html=args.save_html,
+            extract_concurrency=args.extract_concurrency,
+            optimize_concurrency=args.optimize_concurrency,
+            write_concurrency=args.write_concurrency,
+            # 写入目录时无需在内存中保留所有结果
+            collect_results=not args.output_dir,
+            journal_path=args.journal,
+            resume=args.resume,
+            output_format=args.output_format,
+            shard_size=args.shard_size,
+            **common_kwargs,
         )
+        if args.ingest:
+            # 离线读取已保存的页面语料
+            results = convert_corpus(
+                args.ingest,
+                max_page_bytes=args.max_page_size * 1024 * 1024,
+                **batch_kwargs,
+            )
+        else:
+            # 批量处理URL列表
+            results = convert_batch_urls(
+                urls=urls, extractor_type=args.extractor, **batch_kwargs
+            )
 
         if not args.output_dir:
             for i, result in enumerate(results):
@@ -265,6 +625,11 @@ def main():
 
     else:
         parser.print_help()
+        return
+
+    if args.metrics_file:
+        REGISTRY.write(args.metrics_file)
+        logger.info(f"指标已保存到: {args.metrics_file}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""
+批处理流水线模块
+"""
+from src.pipeline.ingest import iter_pages
+from src.pipeline.journal import JobJournal
+from src.pipeline.runner import BatchPipeline
+from src.pipeline.sinks import BaseSink, FileSink, JsonlSink, ParquetSink, get_sink
+
+__all__ = [
+    "BatchPipeline",
+    "JobJournal",
+    "BaseSink",
+    "FileSink",
+    "JsonlSink",
+    "ParquetSink",
+    "get_sink",
+    "iter_pages",
+]
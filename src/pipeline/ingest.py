@@ -0,0 +1,284 @@
+"""
+离线语料读取模块，从WARC文件、tar/zip归档或HTML目录中流式读取已保存的页面
+"""
+import gzip
+import io
+import logging
+import os
+import tarfile
+import zipfile
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from src.extractors.local import HTML_EXTENSIONS, MEMBER_SEPARATOR, decode_html
+
+logger = logging.getLogger(__name__)
+
+# 单个页面的默认大小上限(字节)，超过的记录会被跳过，保证内存占用有界
+DEFAULT_MAX_PAGE_BYTES = 10 * 1024 * 1024
+
+# 识别为WARC文件的扩展名
+WARC_EXTENSIONS = (".warc", ".warc.gz")
+
+# 识别为HTML的内容类型
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+_READ_SIZE = 64 * 1024
+
+Page = Dict[str, Union[str, dict]]
+
+
+def _parse_headers(lines: Iterable[bytes]) -> Dict[str, str]:
+    """解析首部行，键转为小写"""
+    headers = {}
+    for line in lines:
+        name, sep, value = line.decode("latin-1").partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _content_type(value: str) -> Tuple[str, Optional[str]]:
+    """解析Content-Type，返回(媒体类型, 编码)"""
+    parts = [p.strip() for p in value.split(";")]
+    charset = None
+    for part in parts[1:]:
+        key, _, val = part.partition("=")
+        if key.strip().lower() == "charset":
+            charset = val.strip().strip('"') or None
+    return parts[0].lower(), charset
+
+
+def _skip(stream: io.BufferedIOBase, size: int):
+    """分块跳过指定字节数，不在内存中保留"""
+    while size > 0:
+        chunk = stream.read(min(size, _READ_SIZE))
+        if not chunk:
+            return
+        size -= len(chunk)
+
+
+def _dechunk(body: bytes) -> bytes:
+    """解码HTTP分块传输编码"""
+    output = bytearray()
+    pos = 0
+    while pos < len(body):
+        end = body.find(b"\r\n", pos)
+        if end < 0:
+            break
+        size = int(body[pos:end].split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        output += body[end + 2 : end + 2 + size]
+        pos = end + 2 + size + 2
+    return bytes(output)
+
+
+def _decode_http_body(body: bytes, headers: Dict[str, str]) -> bytes:
+    """按Transfer-Encoding和Content-Encoding还原HTTP响应体"""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding in ("gzip", "x-gzip"):
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def _parse_http_response(block: bytes) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+    """解析WARC响应记录中的HTTP报文，返回(状态码, 响应头, 响应体)"""
+    head, sep, body = block.partition(b"\r\n\r\n")
+    if not sep:
+        head, sep, body = block.partition(b"\n\n")
+    lines = head.splitlines()
+    if not lines:
+        return None
+    status_line = lines[0].split(None, 2)
+    if len(status_line) < 2 or not status_line[1].isdigit():
+        return None
+    return int(status_line[1]), _parse_headers(lines[1:]), body
+
+
+def iter_warc(
+    path: str, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES
+) -> Iterator[Page]:
+    """
+    流式读取WARC文件中的HTML页面
+
+    逐条读取记录，只解析状态码为2xx的HTML响应记录和HTML资源记录，
+    其余记录和超过大小上限的记录直接跳过；支持按记录或整体gzip压缩的.warc.gz
+
+    Args:
+        path: WARC文件路径
+        max_page_bytes: 单条记录的大小上限(字节)
+
+    Yields:
+        包含url、html和metadata的页面
+    """
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        offset = 0
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b"WARC/"):
+                logger.warning(f"WARC格式错误，停止读取 {path}: {line[:40]!r}")
+                return
+
+            header_lines = []
+            while True:
+                line = stream.readline()
+                if not line or not line.strip():
+                    break
+                header_lines.append(line)
+            headers = _parse_headers(header_lines)
+            length = int(headers.get("content-length", "0"))
+            record_type = headers.get("warc-type", "")
+            url = headers.get("warc-target-uri", "").strip("<>")
+            mime, _ = _content_type(headers.get("content-type", ""))
+            index = offset
+            offset += 1
+
+            wanted = (record_type == "response" and mime == "application/http") or (
+                record_type == "resource" and mime in HTML_CONTENT_TYPES
+            )
+            if not wanted or length > max_page_bytes:
+                _skip(stream, length)
+                continue
+
+            block = stream.read(length)
+            if record_type == "response":
+                parsed = _parse_http_response(block)
+                if parsed is None:
+                    continue
+                status, http_headers, body = parsed
+                mime, charset = _content_type(http_headers.get("content-type", ""))
+                if not 200 <= status < 300 or mime not in HTML_CONTENT_TYPES:
+                    continue
+                try:
+                    body = _decode_http_body(body, http_headers)
+                except (zlib.error, ValueError) as e:
+                    logger.warning(f"无法解码WARC记录 {url}: {str(e)}")
+                    continue
+            else:
+                status, charset, body = 200, None, block
+
+            yield {
+                "url": url,
+                "html": decode_html(body, charset),
+                "metadata": {
+                    "source": f"{path}#{index}",
+                    "fetched_at": headers.get("warc-date", ""),
+                    "status_code": status,
+                },
+            }
+
+
+def iter_archive(
+    path: str, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES
+) -> Iterator[Page]:
+    """
+    流式读取tar或zip归档中的HTML文件
+
+    tar归档以流模式顺序读取，压缩的tar也无需随机访问；zip归档按目录顺序逐个读取成员
+
+    Args:
+        path: 归档路径
+        max_page_bytes: 单个文件的大小上限(字节)
+
+    Yields:
+        包含url、html和metadata的页面，url为"归档路径!/成员路径"
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(HTML_EXTENSIONS):
+                    continue
+                if info.file_size > max_page_bytes:
+                    continue
+                yield _file_page(path, info.filename, archive.read(info))
+        return
+
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.lower().endswith(HTML_EXTENSIONS):
+                continue
+            if member.size > max_page_bytes:
+                continue
+            member_file = archive.extractfile(member)
+            if member_file is None:
+                continue
+            yield _file_page(path, member.name, member_file.read())
+
+
+def iter_directory(
+    path: str, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES
+) -> Iterator[Page]:
+    """
+    按路径顺序读取目录中的HTML文件
+
+    Args:
+        path: 目录路径
+        max_page_bytes: 单个文件的大小上限(字节)
+
+    Yields:
+        包含url、html和metadata的页面，url为文件路径
+    """
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(HTML_EXTENSIONS):
+                continue
+            file_path = os.path.join(root, name)
+            if os.path.getsize(file_path) > max_page_bytes:
+                continue
+            with open(file_path, "rb") as f:
+                yield _file_page(None, file_path, f.read())
+
+
+def _file_page(archive: Optional[str], name: str, data: bytes) -> Page:
+    """构造文件来源的页面"""
+    source = f"{archive}{MEMBER_SEPARATOR}{name}" if archive else name
+    return {"url": source, "html": decode_html(data), "metadata": {"source": source}}
+
+
+def iter_pages(
+    paths: Iterable[str], max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES
+) -> Iterator[Page]:
+    """
+    依次流式读取多个语料路径中的页面
+
+    每次只在内存中保留一个页面，可直接作为BatchPipeline的输入
+
+    Args:
+        paths: WARC文件、tar/zip归档、HTML目录或单个HTML文件的路径
+        max_page_bytes: 单个页面的大小上限(字节)
+
+    Yields:
+        包含url、html和metadata的页面
+    """
+    for path in paths:
+        count = 0
+        if os.path.isdir(path):
+            pages = iter_directory(path, max_page_bytes)
+        elif path.lower().endswith(WARC_EXTENSIONS):
+            pages = iter_warc(path, max_page_bytes)
+        elif zipfile.is_zipfile(path) or tarfile.is_tarfile(path):
+            pages = iter_archive(path, max_page_bytes)
+        elif os.path.getsize(path) > max_page_bytes:
+            logger.warning(f"文件超过页面大小上限，跳过: {path}")
+            pages = iter(())
+        else:
+            with open(path, "rb") as f:
+                pages = iter([_file_page(None, path, f.read())])
+        for page in pages:
+            count += 1
+            yield page
+        logger.info(f"从{path}读取了{count}个页面")
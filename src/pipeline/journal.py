@@ -0,0 +1,132 @@
+"""
+批处理任务日志模块，以追加写入的JSONL文件记录每个URL的处理进度
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 处理阶段
+STAGE_STARTED = "started"
+STAGE_EXTRACTED = "extracted"
+STAGE_OPTIMIZED = "optimized"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+
+class JobJournal:
+    """
+    追加写入的任务日志
+
+    每条记录为一行JSON，包含URL、输入序号、阶段、输出位置和时间戳。
+    重新打开日志时按记录顺序回放，得到每个URL的最新阶段，
+    中断后恢复运行时跳过已完成的URL，失败和处理中的URL重新排队
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        初始化任务日志
+
+        Args:
+            path: 日志文件路径
+            resume: 是否在已有日志的基础上继续，为False时清空已有日志
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: Dict[str, dict] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self._replay()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _replay(self):
+        """回放已有日志，恢复每个URL的最新状态"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 进程被杀死时最后一行可能不完整
+                    continue
+                self._state[record["url"]] = record
+        logger.info(
+            f"从任务日志恢复: 已完成{len(self.completed())}个，"
+            f"待重新处理{len(self._state) - len(self.completed())}个"
+        )
+
+    def record(
+        self,
+        url: str,
+        stage: str,
+        index: Optional[int] = None,
+        output: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        """
+        追加一条进度记录
+
+        Args:
+            url: 网页URL
+            stage: 处理阶段
+            index: URL在输入中的序号
+            output: 输出位置
+            error: 错误信息
+        """
+        record = {"url": url, "stage": stage, "ts": time.time()}
+        if index is not None:
+            record["index"] = index
+        if output is not None:
+            record["output"] = output
+        if error is not None:
+            record["error"] = error
+
+        with self._lock:
+            self._state[url] = record
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def stage(self, url: str) -> Optional[str]:
+        """
+        获取URL的最新阶段
+
+        Args:
+            url: 网页URL
+
+        Returns:
+            阶段名称，没有记录时返回None
+        """
+        record = self._state.get(url)
+        return record["stage"] if record else None
+
+    def is_done(self, url: str) -> bool:
+        """URL是否已处理完成"""
+        return self.stage(url) == STAGE_DONE
+
+    def completed(self) -> Dict[str, dict]:
+        """
+        获取所有已完成的URL
+
+        Returns:
+            URL到最新记录的映射
+        """
+        return {
+            url: record
+            for url, record in self._state.items()
+            if record["stage"] == STAGE_DONE
+        }
+
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -0,0 +1,297 @@
+"""
+批处理流水线模块，提取、LLM优化和结果保存三个阶段并行流转
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from src.extractors.base import BaseExtractor
+from src.llm.processor import LLMProcessor
+from src.llm.quality import optimization_ok
+from src.pipeline.journal import (
+    STAGE_DONE,
+    STAGE_EXTRACTED,
+    STAGE_FAILED,
+    STAGE_OPTIMIZED,
+    STAGE_STARTED,
+    JobJournal,
+)
+from src.pipeline.sinks import BaseSink, FileSink
+from src.utils.metrics import (
+    STAGE_EXTRACT,
+    STAGE_OPTIMIZE,
+    STAGE_SAVE,
+    MetricsRegistry,
+    Timer,
+    record_stage,
+)
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+def _with_error(data: dict, error: Exception) -> dict:
+    """在结果的元数据中记录异常，保留已有的内容"""
+    metadata = {**data.get("metadata", {}), "error": str(error) or repr(error)}
+    return {**data, "metadata": metadata}
+
+
+class BatchPipeline:
+    """
+    流式批处理流水线
+
+    每个阶段有独立的并发上限，阶段之间通过有界队列连接，
+    某个URL完成提取后立即进入优化，优化完成后立即写出，
+    内存中最多只保留队列容量内的页面
+    """
+
+    def __init__(
+        self,
+        extractor: BaseExtractor,
+        processor: Optional[LLMProcessor] = None,
+        output_dir: Optional[str] = None,
+        save_html: bool = False,
+        extract_concurrency: int = 16,
+        optimize_concurrency: int = 4,
+        write_concurrency: int = 4,
+        queue_size: int = 64,
+        journal: Optional[JobJournal] = None,
+        sink: Optional[BaseSink] = None,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初始化流水线
+
+        Args:
+            extractor: 提取器
+            processor: LLM处理器，为None时跳过优化阶段
+            output_dir: 输出目录，未指定sink时按每个URL三个文件的方式写出
+            save_html: 是否保存HTML（仅在未指定sink时使用）
+            extract_concurrency: 提取阶段并发数
+            optimize_concurrency: 优化阶段并发数
+            write_concurrency: 保存阶段并发数
+            queue_size: 阶段间队列容量
+            journal: 任务日志，记录每个URL的处理阶段，已完成的URL会被跳过
+            sink: 结果输出，运行结束时由流水线关闭；为None且output_dir也为None时不写出
+            registry: 指标注册表，默认使用全局注册表
+        """
+        self.extractor = extractor
+        self.processor = processor
+        self.output_dir = output_dir
+        self.save_html = save_html
+        self.extract_concurrency = max(1, extract_concurrency)
+        self.optimize_concurrency = max(1, optimize_concurrency)
+        self.write_concurrency = max(1, write_concurrency)
+        self.queue_size = max(1, queue_size)
+        self.journal = journal
+        if sink is None and output_dir:
+            sink = FileSink(output_dir, save_html)
+        self.sink = sink
+        self.registry = registry
+
+    async def run(
+        self, urls: Iterable[Union[str, dict]], collect_results: bool = True
+    ) -> List[Dict[str, Union[str, dict]]]:
+        """
+        运行流水线
+
+        Args:
+            urls: URL序列，可以是生成器；元素也可以是包含url和html的已读取页面
+                （见src.pipeline.ingest），此时由提取器直接转换页面中的HTML
+            collect_results: 是否在内存中收集并返回所有结果
+
+        Returns:
+            结果列表（按输入顺序），collect_results为False时返回空列表
+        """
+        url_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        optimize_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: Dict[int, Dict[str, Union[str, dict]]] = {}
+        loop = asyncio.get_running_loop()
+        # 文件写入放到线程池中执行
+        write_pool = ThreadPoolExecutor(self.write_concurrency)
+        total = 0
+        skipped = 0
+
+        def record(url: str, stage: str, index: int, **kwargs):
+            if self.journal is not None:
+                self.journal.record(url, stage, index=index, **kwargs)
+
+        # 已交给非持久输出、等待写入磁盘的结果: 序号 -> URL
+        uncommitted: Dict[int, str] = {}
+
+        def on_commit(committed: List[Tuple[int, str]]):
+            # 结果写入磁盘后才记为完成，中途退出时恢复运行会重新处理这些URL
+            for index, output in committed:
+                url = uncommitted.pop(index, None)
+                if url is not None:
+                    record(url, STAGE_DONE, index, output=output)
+
+        if self.sink is not None and not self.sink.durable:
+            self.sink.on_commit = on_commit
+
+        async def feed():
+            nonlocal total, skipped
+            for index, item in enumerate(urls):
+                url = item["url"] if isinstance(item, dict) else item
+                if self.journal is not None and self.journal.is_done(url):
+                    skipped += 1
+                    continue
+                record(url, STAGE_STARTED, index)
+                await url_queue.put((index, item))
+                total += 1
+            for _ in range(self.extract_concurrency):
+                await url_queue.put(_DONE)
+
+        async def extract_worker():
+            while True:
+                item = await url_queue.get()
+                if item is _DONE:
+                    return
+                index, item = item
+                url = item["url"] if isinstance(item, dict) else item
+                try:
+                    with Timer() as timer:
+                        if isinstance(item, dict):
+                            data = await self.extractor.extract_page_async(item)
+                        else:
+                            data = await self.extractor.extract_async(url)
+                    record_stage(
+                        data,
+                        STAGE_EXTRACT,
+                        timer.seconds,
+                        ok=not data.get("metadata", {}).get("error"),
+                        registry=self.registry,
+                    )
+                    record(url, STAGE_EXTRACTED, index)
+                except Exception as e:
+                    # 单个URL的异常不影响其他URL，失败结果照常进入保存阶段
+                    logger.error(f"提取失败 (#{index+1}) {url}: {str(e)}")
+                    data = _with_error({"markdown": "", "html": "", "metadata": {}}, e)
+                    data["metadata"].setdefault("url", url)
+                await optimize_queue.put((index, url, data))
+
+        async def optimize_worker():
+            while True:
+                item = await optimize_queue.get()
+                if item is _DONE:
+                    return
+                index, url, data = item
+                if self.processor and data.get("markdown"):
+                    try:
+                        with Timer() as timer:
+                            data = await self.processor.optimize_markdown_async(data)
+                        ok = optimization_ok(data)
+                        record_stage(
+                            data,
+                            STAGE_OPTIMIZE,
+                            timer.seconds,
+                            ok=ok,
+                            registry=self.registry,
+                        )
+                        if ok:
+                            record(url, STAGE_OPTIMIZED, index)
+                            logger.info(f"优化完成 (#{index+1}): {url}")
+                        else:
+                            # 处理器在LLM请求失败时返回未优化的内容，记为失败，恢复运行时重试
+                            logger.error(f"优化失败 (#{index+1}) {url}: 未得到优化结果")
+                            data = _with_error(data, RuntimeError("LLM优化失败"))
+                    except Exception as e:
+                        logger.error(f"优化失败 (#{index+1}) {url}: {str(e)}")
+                        data = _with_error(data, e)
+                await write_queue.put((index, url, data))
+
+        async def write_worker():
+            while True:
+                item = await write_queue.get()
+                if item is _DONE:
+                    return
+                index, url, data = item
+                try:
+                    await write_one(index, url, data)
+                except Exception as e:
+                    logger.error(f"记录结果失败 (#{index+1}) {url}: {str(e)}")
+                    record(url, STAGE_FAILED, index, error=str(e))
+                if collect_results:
+                    results[index] = data
+
+        async def write_one(index: int, url: str, data: dict):
+            output = None
+            error = data.get("metadata", {}).get("error")
+            deferred = self.sink is not None and not self.sink.durable
+            if self.sink is not None:
+                if deferred and not error:
+                    uncommitted[index] = url
+                timer = Timer()
+                try:
+                    with timer:
+                        output = await loop.run_in_executor(
+                            write_pool, self.sink.write, index, data
+                        )
+                except Exception as e:
+                    logger.error(f"保存结果失败 {url}: {str(e)}")
+                    error = str(e)
+                    uncommitted.pop(index, None)
+                record_stage(
+                    data,
+                    STAGE_SAVE,
+                    timer.seconds,
+                    ok=output is not None,
+                    registry=self.registry,
+                )
+            if error:
+                record(url, STAGE_FAILED, index, output=output, error=error)
+            elif not deferred:
+                record(url, STAGE_DONE, index, output=output)
+
+        async def run_stage(workers, next_queue, next_count):
+            await asyncio.gather(*workers)
+            if next_queue is not None:
+                for _ in range(next_count):
+                    await next_queue.put(_DONE)
+
+        try:
+            await asyncio.gather(
+                feed(),
+                run_stage(
+                    [extract_worker() for _ in range(self.extract_concurrency)],
+                    optimize_queue,
+                    self.optimize_concurrency,
+                ),
+                run_stage(
+                    [optimize_worker() for _ in range(self.optimize_concurrency)],
+                    write_queue,
+                    self.write_concurrency,
+                ),
+                run_stage(
+                    [write_worker() for _ in range(self.write_concurrency)], None, 0
+                ),
+            )
+        finally:
+            write_pool.shutdown(wait=True)
+            if self.sink is not None:
+                self.sink.close()
+            await self.extractor.aclose()
+
+        if skipped:
+            logger.info(f"跳过任务日志中已完成的{skipped}个URL")
+        logger.info(f"流水线处理完成，共{total}个URL")
+        return [results[i] for i in sorted(results)]
+
+    def run_sync(
+        self, urls: Iterable[Union[str, dict]], collect_results: bool = True
+    ) -> List[Dict[str, Union[str, dict]]]:
+        """
+        在新的事件循环中同步运行流水线
+
+        Args:
+            urls: URL或已读取页面的序列
+            collect_results: 是否收集并返回所有结果
+
+        Returns:
+            结果列表
+        """
+        return asyncio.run(self.run(urls, collect_results=collect_results))
@@ -0,0 +1,382 @@
+"""
+输出模块，提供可插拔的结果写出方式
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def write_result_files(
+    result: Dict[str, Any],
+    output_file: str,
+    save_html: bool = False,
+    write_markdown: bool = True,
+):
+    """
+    将单个结果保存为markdown、HTML（可选）和元数据JSON文件
+
+    Args:
+        result: 处理结果
+        output_file: markdown输出文件路径，HTML和JSON文件与其同名
+        save_html: 是否保存HTML
+        write_markdown: 是否写出markdown文件，流式输出时markdown已写出
+    """
+    output_dir = os.path.dirname(output_file)
+    if output_dir:  # 如果文件路径包含目录
+        os.makedirs(output_dir, exist_ok=True)
+
+    # 保存Markdown
+    if write_markdown:
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(result.get("markdown", ""))
+
+    # 保存HTML（如果需要）
+    if save_html and result.get("html"):
+        html_file = os.path.splitext(output_file)[0] + ".html"
+        with open(html_file, "w", encoding="utf-8") as f:
+            f.write(result.get("html", ""))
+
+    # 保存元数据
+    json_file = os.path.splitext(output_file)[0] + ".json"
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(result.get("metadata", {}), f, ensure_ascii=False, indent=2)
+
+
+def _commit_file(tmp_path: str, path: str):
+    """将写完的临时文件刷到磁盘后原子地重命名为正式文件"""
+    fd = os.open(tmp_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        # 部分平台不能打开目录，重命名本身已经完成
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BaseSink(ABC):
+    """
+    输出基类，定义结果写出的通用接口，实现需保证线程安全
+
+    durable为True的输出在write返回时结果已完整写出；否则结果在缓冲区或未完成的分片中，
+    写入磁盘后通过on_commit回调报告对应的序号和输出位置，调用方应在此之后才认为结果已保存
+    """
+
+    durable = True
+
+    def __init__(self, output_dir: str, save_html: bool = False):
+        """
+        初始化输出
+
+        Args:
+            output_dir: 输出目录
+            save_html: 是否保存HTML
+        """
+        self.output_dir = output_dir
+        self.save_html = save_html
+        # 结果写入磁盘后的回调，参数为(序号, 输出位置)列表
+        self.on_commit: Optional[Callable[[List[Tuple[int, str]]], None]] = None
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _record(self, index: int, result: Dict[str, Any]) -> dict:
+        """构建一条输出记录"""
+        metadata = result.get("metadata") or {}
+        return {
+            "index": index,
+            "url": metadata.get("url", ""),
+            "markdown": result.get("markdown", ""),
+            "html": result.get("html", "") if self.save_html else "",
+            "metadata": metadata,
+        }
+
+    @abstractmethod
+    def write(self, index: int, result: Dict[str, Union[str, dict]]) -> str:
+        """
+        写出一个结果
+
+        Args:
+            index: 结果在输入中的序号（从0开始）
+            result: 处理结果
+
+        Returns:
+            输出位置
+        """
+        pass
+
+    def close(self):
+        """刷新缓冲并关闭输出"""
+        pass
+
+
+class FileSink(BaseSink):
+    """
+    每个结果写出url_N.md、url_N.html（可选）和url_N.json三个文件
+    """
+
+    def write(self, index: int, result: Dict[str, Union[str, dict]]) -> str:
+        """写出一个结果"""
+        output_file = os.path.join(self.output_dir, f"url_{index+1}.md")
+        write_result_files(result, output_file, self.save_html)
+        return output_file
+
+
+class _ShardedSink(BaseSink):
+    """
+    分片输出基类，每个分片最多shard_size条记录，新的运行不会覆盖已有分片
+
+    分片先写入.part临时文件，写满或关闭时刷到磁盘并重命名，再通过on_commit报告
+    其中的所有记录；进程中途退出时未完成的分片只留下.part文件，其中的URL不会被
+    任务日志记为完成，恢复运行时重新处理
+    """
+
+    PREFIX = "results"
+    SUFFIX = ""
+    TMP_SUFFIX = ".part"
+    durable = False
+
+    def __init__(
+        self, output_dir: str, save_html: bool = False, shard_size: int = 10000
+    ):
+        """
+        初始化分片输出
+
+        Args:
+            output_dir: 输出目录
+            save_html: 是否保存HTML
+            shard_size: 每个分片的记录数
+        """
+        super().__init__(output_dir, save_html)
+        self.shard_size = max(1, shard_size)
+        self._shard = self._next_shard_number()
+        self._count = 0
+        # 当前分片中尚未写入磁盘的记录的(序号, 输出位置)
+        self._pending: List[Tuple[int, str]] = []
+
+    def _next_shard_number(self) -> int:
+        """从已有分片之后继续编号，恢复运行时不覆盖已有结果"""
+        pattern = re.compile(rf"^{self.PREFIX}-(\d+){re.escape(self.SUFFIX)}$")
+        numbers = [
+            int(match.group(1))
+            for match in map(pattern.match, os.listdir(self.output_dir))
+            if match
+        ]
+        return max(numbers) + 1 if numbers else 0
+
+    def _shard_path(self) -> str:
+        """当前分片的路径"""
+        return os.path.join(
+            self.output_dir, f"{self.PREFIX}-{self._shard:05d}{self.SUFFIX}"
+        )
+
+    def _add(self, index: int) -> str:
+        """登记当前分片中的一条新记录，返回其输出位置（调用方需持有锁）"""
+        location = f"{self._shard_path()}#{self._count}"
+        self._pending.append((index, location))
+        self._count += 1
+        return location
+
+    @abstractmethod
+    def _close_shard(self):
+        """写出并关闭当前分片的临时文件（调用方需持有锁）"""
+        pass
+
+    def _finish_shard(self):
+        """完成当前分片：关闭、刷盘、重命名并报告其中的记录（调用方需持有锁）"""
+        if not self._pending:
+            return
+        self._close_shard()
+        path = self._shard_path()
+        _commit_file(path + self.TMP_SUFFIX, path)
+        committed, self._pending = self._pending, []
+        self._shard += 1
+        self._count = 0
+        if self.on_commit is not None:
+            self.on_commit(committed)
+
+    def close(self):
+        """完成当前分片"""
+        with self._lock:
+            self._finish_shard()
+
+
+class JsonlSink(_ShardedSink):
+    """
+    将结果写入gzip压缩的JSONL分片，每行一条记录
+    """
+
+    SUFFIX = ".jsonl.gz"
+
+    def __init__(
+        self,
+        output_dir: str,
+        save_html: bool = False,
+        shard_size: int = 10000,
+        compresslevel: int = 6,
+    ):
+        """
+        初始化JSONL输出
+
+        Args:
+            output_dir: 输出目录
+            save_html: 是否保存HTML
+            shard_size: 每个分片的记录数
+            compresslevel: gzip压缩级别
+        """
+        super().__init__(output_dir, save_html, shard_size)
+        self.compresslevel = compresslevel
+        self._file: Optional[IO[str]] = None
+
+    def write(self, index: int, result: Dict[str, Union[str, dict]]) -> str:
+        """写出一个结果"""
+        line = json.dumps(self._record(index, result), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(
+                    self._shard_path() + self.TMP_SUFFIX,
+                    "wt",
+                    encoding="utf-8",
+                    compresslevel=self.compresslevel,
+                )
+            self._file.write(line)
+            location = self._add(index)
+            if self._count >= self.shard_size:
+                self._finish_shard()
+        return location
+
+    def _close_shard(self):
+        """关闭当前分片的gzip文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetSink(_ShardedSink):
+    """
+    将结果写入列式Parquet分片，内存中最多缓冲buffer_size条记录后写出一个行组，
+    分片的footer在分片完成时写入，之后分片才可读取
+
+    需要安装pyarrow
+    """
+
+    SUFFIX = ".parquet"
+
+    def __init__(
+        self,
+        output_dir: str,
+        save_html: bool = False,
+        shard_size: int = 10000,
+        buffer_size: int = 500,
+    ):
+        """
+        初始化Parquet输出
+
+        Args:
+            output_dir: 输出目录
+            save_html: 是否保存HTML
+            shard_size: 每个分片的记录数
+            buffer_size: 每个行组的记录数
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet输出需要安装pyarrow: pip install pyarrow")
+
+        super().__init__(output_dir, save_html, shard_size)
+        self._pa = pa
+        self._pq = pq
+        self.buffer_size = max(1, buffer_size)
+        self._schema = pa.schema(
+            [
+                ("index", pa.int64()),
+                ("url", pa.string()),
+                ("markdown", pa.string()),
+                ("html", pa.string()),
+                ("metadata", pa.string()),
+            ]
+        )
+        self._buffer: List[dict] = []
+        self._writer = None
+
+    def _flush(self):
+        """将缓冲区写出为一个行组（调用方需持有锁）"""
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                self._shard_path() + self.TMP_SUFFIX,
+                self._schema,
+                compression="zstd",
+            )
+        table = self._pa.Table.from_pylist(self._buffer, schema=self._schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def write(self, index: int, result: Dict[str, Union[str, dict]]) -> str:
+        """写出一个结果"""
+        record = self._record(index, result)
+        record["metadata"] = json.dumps(record["metadata"], ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(record)
+            location = self._add(index)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+            if self._count >= self.shard_size:
+                self._finish_shard()
+        return location
+
+    def _close_shard(self):
+        """写出剩余缓冲并写入分片的footer"""
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+SINKS: Dict[str, Callable[..., BaseSink]] = {
+    "files": FileSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+
+def get_sink(
+    sink_type: str,
+    output_dir: str,
+    save_html: bool = False,
+    shard_size: Optional[int] = None,
+) -> BaseSink:
+    """
+    获取指定类型的输出
+
+    Args:
+        sink_type: 输出类型，支持"files"、"jsonl"和"parquet"
+        output_dir: 输出目录
+        save_html: 是否保存HTML
+        shard_size: 分片输出每个分片的记录数
+
+    Returns:
+        输出实例
+    """
+    if sink_type not in SINKS:
+        raise ValueError(f"不支持的输出类型: {sink_type}")
+    if sink_type == "files" or shard_size is None:
+        return SINKS[sink_type](output_dir, save_html)
+    return SINKS[sink_type](output_dir, save_html, shard_size=shard_size)
@@ -0,0 +1,118 @@
+"""
+HTML预处理模块，在构建提示词前裁剪与正文无关的节点和属性
+"""
+import re
+from typing import Any, Dict
+
+from bs4 import BeautifulSoup, Comment
+
+# 与正文无关、整体移除的标签
+REMOVED_TAGS = [
+    "script",
+    "style",
+    "noscript",
+    "svg",
+    "canvas",
+    "iframe",
+    "template",
+    "object",
+    "embed",
+    "link",
+    "meta",
+    "nav",
+    "footer",
+    "aside",
+    "form",
+    "button",
+    "input",
+    "select",
+    "textarea",
+]
+
+# 表示导航等页面框架的ARIA角色
+REMOVED_ROLES = {"navigation", "banner", "contentinfo", "search", "menu", "menubar"}
+
+# 保留的属性，其余属性（class、style、data-*、事件处理等）全部移除
+KEPT_ATTRIBUTES = {"href", "src", "alt", "title", "colspan", "rowspan", "lang"}
+
+# 内容对空白敏感、不压缩空白的标签
+PRESERVED_TAGS = ["pre", "code"]
+
+TRUNCATED_MARKER = "<!-- truncated -->"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def prune_html(html: str, max_chars: int = 0) -> Dict[str, Any]:
+    """
+    裁剪并压缩HTML
+
+    移除脚本、样式、内联SVG、导航和表单等非正文节点、注释以及白名单以外的属性，
+    压缩pre/code以外文本节点中的空白，并按max_chars截断
+
+    Args:
+        html: 原始HTML
+        max_chars: 输出HTML的最大字符数，为0时不截断
+
+    Returns:
+        包含以下字段的字典:
+        - html: 裁剪后的HTML
+        - bytes_before / bytes_after: 裁剪前后的UTF-8字节数
+        - truncated: 是否被截断
+    """
+    if not html:
+        return {
+            "html": "",
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "truncated": False,
+        }
+
+    soup = BeautifulSoup(html, "lxml")
+
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    for tag in soup.find_all(REMOVED_TAGS):
+        tag.decompose()
+
+    for tag in soup.find_all(True):
+        if tag.decomposed:
+            continue
+        if (
+            tag.get("role") in REMOVED_ROLES
+            or tag.get("aria-hidden") == "true"
+            or tag.has_attr("hidden")
+        ):
+            tag.decompose()
+            continue
+        tag.attrs = {k: v for k, v in tag.attrs.items() if k in KEPT_ATTRIBUTES}
+
+    for text in soup.find_all(string=True):
+        if text.find_parent(PRESERVED_TAGS):
+            continue
+        collapsed = _WHITESPACE_RE.sub(" ", text)
+        if not collapsed.strip():
+            # 标签之间仅含空白的文本节点直接移除
+            text.extract()
+        elif collapsed != text:
+            text.replace_with(collapsed)
+
+    root = soup.body or soup
+    pruned = "".join(str(child) for child in root.children).strip()
+
+    truncated = bool(max_chars) and len(pruned) > max_chars
+    if truncated:
+        cut = pruned[:max_chars]
+        # 避免在标签中间截断
+        last_open = cut.rfind("<")
+        if last_open > cut.rfind(">"):
+            cut = cut[:last_open]
+        pruned = cut + TRUNCATED_MARKER
+
+    return {
+        "html": pruned,
+        "bytes_before": len(html.encode("utf-8")),
+        "bytes_after": len(pruned.encode("utf-8")),
+        "truncated": truncated,
+    }
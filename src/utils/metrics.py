@@ -0,0 +1,343 @@
+"""
+指标模块，记录每个处理阶段的耗时、重试次数、传输字节数、token数和缓存命中，
+写入结果元数据并以Prometheus文本格式导出
+"""
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 处理阶段
+STAGE_EXTRACT = "extract"
+STAGE_OPTIMIZE = "optimize"
+STAGE_SAVE = "save"
+
+# 阶段耗时直方图的桶边界(秒)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    线程安全的计数器和直方图集合，可渲染为Prometheus文本格式
+    """
+
+    def __init__(self, prefix: str = "web_agent", buckets=DEFAULT_BUCKETS):
+        """
+        初始化指标注册表
+
+        Args:
+            prefix: 指标名前缀
+            buckets: 直方图的桶边界(秒)
+        """
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, list]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> _Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels):
+        """
+        增加计数器
+
+        Args:
+            name: 指标名（不含前缀）
+            value: 增量
+            help: 指标说明
+            **labels: 标签
+        """
+        name = f"{self.prefix}_{name}"
+        key = self._labels(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        """
+        记录一次直方图观测
+
+        Args:
+            name: 指标名（不含前缀）
+            value: 观测值
+            help: 指标说明
+            **labels: 标签
+        """
+        name = f"{self.prefix}_{name}"
+        key = self._labels(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._histograms.setdefault(name, {})
+            # 每个桶的计数、总和、总数
+            state = series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get(self, name: str, **labels) -> float:
+        """
+        获取计数器的当前值，直方图返回观测次数
+
+        Args:
+            name: 指标名（不含前缀）
+            **labels: 标签
+
+        Returns:
+            当前值，不存在时返回0
+        """
+        name = f"{self.prefix}_{name}"
+        key = self._labels(labels)
+        with self._lock:
+            if name in self._histograms:
+                state = self._histograms[name].get(key)
+                return state[2] if state else 0
+            return self._counters.get(name, {}).get(key, 0)
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._help.clear()
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(labels: _Labels, extra: Optional[Tuple[str, str]] = None):
+        items = list(labels) + ([extra] if extra else [])
+        if not items:
+            return ""
+        body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+        return "{" + body + "}"
+
+    def render(self) -> str:
+        """
+        渲染为Prometheus文本格式
+
+        Returns:
+            指标文本
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{self._format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, (counts, total, count) in sorted(
+                    self._histograms[name].items()
+                ):
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        labels = self._format_labels(key, ("le", f"{bound:g}"))
+                        lines.append(f"{name}_bucket{labels} {bucket_count}")
+                    labels = self._format_labels(key, ("le", "+Inf"))
+                    lines.append(f"{name}_bucket{labels} {count}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {total:g}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        原子地写出指标文件，可供node_exporter的textfile收集器读取
+
+        Args:
+            path: 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# 默认的全局注册表
+REGISTRY = MetricsRegistry()
+
+
+class Timer:
+    """
+    计时上下文管理器
+
+    Example:
+        with Timer() as timer:
+            ...
+        timer.seconds
+    """
+
+    def __init__(self):
+        self.start = 0.0
+        self.seconds = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    计算百分位数（线性插值）
+
+    Args:
+        values: 数值列表
+        q: 百分位，0-100
+
+    Returns:
+        百分位数，列表为空时返回0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def stage_metrics(result: Dict[str, Any], stage: str) -> dict:
+    """
+    获取结果元数据中某个阶段的指标字典，不存在时创建
+
+    Args:
+        result: 处理结果
+        stage: 阶段名称
+
+    Returns:
+        阶段指标字典，可就地更新
+    """
+    metadata = result.setdefault("metadata", {})
+    metrics: dict = metadata.setdefault("metrics", {}).setdefault(stage, {})
+    return metrics
+
+
+def record_stage(
+    result: Dict[str, Union[str, dict]],
+    stage: str,
+    seconds: float,
+    ok: bool = True,
+    registry: Optional[MetricsRegistry] = None,
+) -> dict:
+    """
+    将阶段耗时写入结果元数据，并把该阶段的全部指标汇总到注册表
+
+    阶段指标字典中可识别的字段为retries、bytes_in、bytes_out、
+    prompt_tokens、completion_tokens、cached_tokens、cache_hit、hedged、
+    ttfb_seconds和triage
+
+    Args:
+        result: 处理结果
+        stage: 阶段名称
+        seconds: 阶段耗时(秒)
+        ok: 阶段是否成功
+        registry: 指标注册表，默认使用全局注册表
+
+    Returns:
+        阶段指标字典
+    """
+    registry = registry or REGISTRY
+    stats = stage_metrics(result, stage)
+    stats["seconds"] = round(seconds, 4)
+
+    registry.observe("stage_seconds", seconds, "各处理阶段耗时(秒)", stage=stage)
+    if "ttfb_seconds" in stats:
+        registry.observe(
+            "ttfb_seconds", stats["ttfb_seconds"], "流式输出首个片段的到达时间(秒)", stage=stage
+        )
+    registry.inc(
+        "stage_total",
+        help="各处理阶段完成次数",
+        stage=stage,
+        status="ok" if ok else "error",
+    )
+    if stats.get("retries"):
+        registry.inc("retries_total", stats["retries"], "重试次数", stage=stage)
+    for direction in ("in", "out"):
+        if stats.get(f"bytes_{direction}"):
+            registry.inc(
+                "bytes_total",
+                stats[f"bytes_{direction}"],
+                "传输字节数",
+                stage=stage,
+                direction=direction,
+            )
+    for kind in ("prompt", "completion", "cached"):
+        if stats.get(f"{kind}_tokens"):
+            registry.inc(
+                "llm_tokens_total",
+                stats[f"{kind}_tokens"],
+                "LLM token数",
+                type=kind,
+            )
+    if stats.get("hedged"):
+        registry.inc("hedged_total", help="对冲请求次数", stage=stage)
+    if stats.get("triage"):
+        registry.inc("triage_total", help="质量分级的处理方式次数", decision=stats["triage"])
+    if "cache_hit" in stats:
+        registry.inc(
+            "cache_requests_total",
+            help="缓存查询次数",
+            stage=stage,
+            result="hit" if stats["cache_hit"] else "miss",
+        )
+    return stats
+
+
+def start_metrics_server(
+    port: int, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None
+) -> ThreadingHTTPServer:
+    """
+    在后台线程中启动/metrics端点
+
+    Args:
+        port: 监听端口，为0时随机分配
+        host: 监听地址，默认只监听本机，需要被其他主机抓取时显式指定如"0.0.0.0"
+        registry: 指标注册表，默认使用全局注册表
+
+    Returns:
+        HTTP服务实例，调用shutdown()停止
+    """
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"指标服务已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
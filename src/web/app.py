@@ -1,141 +1,342 @@
+import json
 import os
-import fitz  # PyMuPDF
-from flask import Flask, render_template, request, jsonify, send_from_directory
-import threading
 import uuid
-import json
-from datetime import datetime
+
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    send_from_directory,
+)
+
+from src.web.engine import (
+    DEFAULT_PAGES_PER_TASK,
+    TOOL_VERSIONS,
+    ParseEngine,
+    format_page,
+    preview_text,
+)
+from src.web.jobs import JOB_DONE, JobQueue, QueueFull
+from src.web.storage import ResultCache, save_upload
+from src.web.store import PreferenceStore
 
 app = Flask(__name__)
-UPLOAD_FOLDER = 'uploads'
-RESULTS_FOLDER = 'results'
+UPLOAD_FOLDER = "uploads"
+RESULTS_FOLDER = "results"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
 
 # 支持的解析工具
 TOOLS = {
-    'openai': 'OpenAI GPT',
-    'claude': 'Anthropic Claude',
-    'llamaindex': 'LLamaIndex',
-    'pypdf2': 'PyPDF2',
-    'pdfminer': 'PDFMiner'
+    "openai": "OpenAI GPT",
+    "claude": "Anthropic Claude",
+    "llamaindex": "LLamaIndex",
+    "pypdf2": "PyPDF2",
+    "pdfminer": "PDFMiner",
 }
 
 
-# 模拟不同解析工具的处理函数
-def parse_with_tool(pdf_path, tool_name):
-    # 这里只是模拟，实际应用中需要接入真正的API或库
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        if tool_name == 'openai':
-            # 模拟OpenAI处理 - 更简洁
-            text += f"Page {page.number + 1} (OpenAI):\n" + page.get_text()[:500].replace('\n', ' ') + "...\n\n"
-        elif tool_name == 'claude':
-            # 模拟Claude处理 - 保留更多格式
-            text += f"=== Page {page.number + 1} (Claude) ===\n" + page.get_text()[:600] + "\n\n"
-        elif tool_name == 'llamaindex':
-            # 模拟LLamaIndex处理 - 带标记
-            text += f"📄 Page {page.number + 1} (LLamaIndex):\n" + page.get_text()[:400] + "...[truncated]\n\n"
-        elif tool_name == 'pypdf2':
-            # 模拟PyPDF2处理 - 原始提取
-            text += f"Page {page.number + 1} (PyPDF2):\n" + page.get_text() + "\n\n"
-        else:  # pdfminer
-            # 模拟PDFMiner处理 - 更详细
-            text += f"Page {page.number + 1} (PDFMiner):\n" + page.get_text()[:700] + "\n\n"
-    return text
-
-
-@app.route('/')
+# PDF解析引擎，逐页文本提取一次后由所有解析工具共享
+engine = ParseEngine(
+    workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+    pages_per_task=int(os.getenv("PDF_PAGES_PER_TASK", DEFAULT_PAGES_PER_TASK)),
+)
+
+# 队列已满时建议客户端重试的间隔(秒)和SSE保活间隔(秒)
+JOB_RETRY_AFTER = 5
+SSE_KEEPALIVE = 15
+
+# 上传后预先解析的首屏页数，以及分页接口单次最多返回的页数
+PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "5"))
+MAX_PAGES_PER_REQUEST = 50
+
+
+# 解析结果缓存，按(内容哈希, 工具, 工具版本, 页码)逐页保存，重复上传的PDF不再解析
+cache = ResultCache(os.path.join(RESULTS_FOLDER, "parsed"))
+
+# 上传记录、工具输出和用户投票，排行榜随投票增量更新
+store = PreferenceStore(
+    os.getenv("PREFERENCE_DB", os.path.join(RESULTS_FOLDER, "preferences.sqlite3"))
+)
+# 旧版本的投票保存在results/<上传ID>.json，启动时导入，已导入的不会重复计票
+store.import_legacy(RESULTS_FOLDER)
+
+
+def document_meta(file_hash, pdf_path):
+    # 页数和第一页预览只读取一次
+    meta = cache.get_meta(file_hash)
+    if meta is None:
+        meta = {
+            "page_count": engine.page_count(pdf_path),
+            "preview": preview_text(engine.extract_pages(pdf_path, start=0, end=1)),
+        }
+        cache.put_meta(file_hash, meta)
+    return meta
+
+
+def cached_pages(file_hash, tools, start, end):
+    # 读取第start到end-1页已缓存的各工具输出，未缓存的页为None
+    return {
+        tool: [
+            cache.get_page(file_hash, tool, TOOL_VERSIONS[tool], number)
+            for number in range(start, end)
+        ]
+        for tool in tools
+    }
+
+
+def load_pages(file_hash, pdf_path, tools, start, end, progress=None):
+    # 读取第start到end-1页的各工具输出，未缓存的页按需解析，没人查看的页不会被解析
+    meta = document_meta(file_hash, pdf_path)
+    end = min(end, meta["page_count"] + 1)
+    pages = cached_pages(file_hash, tools, start, end)
+    missing = [
+        number
+        for number in range(start, end)
+        if any(pages[tool][number - start] is None for tool in tools)
+    ]
+    if not missing:
+        return meta, pages
+
+    # 只提取缺页所在的范围，逐页文本由各工具共享
+    texts = engine.extract_pages(pdf_path, progress, missing[0] - 1, missing[-1])
+    chars = dict.fromkeys(tools, 0)
+    for number, text in enumerate(texts, missing[0]):
+        for tool in tools:
+            if pages[tool][number - start] is None:
+                output = format_page(tool, number, text)
+                cache.put_page(file_hash, tool, TOOL_VERSIONS[tool], number, output)
+                pages[tool][number - start] = output
+                chars[tool] += len(output)
+    for tool in tools:
+        if chars[tool]:
+            store.add_output(
+                file_hash, tool, TOOL_VERSIONS[tool], meta["page_count"], chars[tool]
+            )
+    return meta, pages
+
+
+def build_response(upload_id, file_hash, tools, meta, pages):
+    # 只包含首屏的页面，其余页面通过pages_url分页获取
+    end = 1 + len(pages[tools[0]])
+    window = {tool: "".join(pages[tool]) for tool in tools}
+    response = {
+        "file_id": upload_id,
+        "file_hash": file_hash,
+        "page_count": meta["page_count"],
+        "pages_url": f"/uploads/{upload_id}/pages",
+        "next_page": end if end <= meta["page_count"] else None,
+        "results": [
+            {"tool": tool, "name": TOOLS[tool], "result": window[tool]}
+            for tool in tools
+        ],
+        "preview": meta["preview"],
+    }
+    # 前两个工具保留tool1/tool2字段，兼容两栏对比页面
+    for index, tool in enumerate(tools[:2], 1):
+        response[f"tool{index}"] = {"name": TOOLS[tool], "result": window[tool]}
+    return response
+
+
+def parse_job(job, file_hash, pdf_path, tools):
+    # 只解析首屏，每页完成后更新任务进度
+    meta, pages = load_pages(
+        file_hash, pdf_path, tools, 1, 1 + PAGE_WINDOW, progress=job.progress
+    )
+    return build_response(job.id, file_hash, tools, meta, pages)
+
+
+# 后台解析队列：固定数量的工作线程，等待中的任务数有上限
+jobs = JobQueue(
+    parse_job,
+    workers=int(os.getenv("PDF_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("PDF_QUEUE_SIZE", "16")),
+)
+
+
+@app.route("/")
 def index():
-    return render_template('index.html', tools=TOOLS)
+    return render_template("index.html", tools=TOOLS)
 
 
-@app.route('/upload', methods=['POST'])
+@app.route("/upload", methods=["POST"])
 def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
 
-    file = request.files['file']
-    tool1 = request.form.get('tool1')
-    tool2 = request.form.get('tool2')
+    file = request.files["file"]
+    # 支持tools多选，也兼容tool1/tool2两个工具的表单
+    tools = request.form.getlist("tools") or [
+        tool for tool in (request.form.get("tool1"), request.form.get("tool2")) if tool
+    ]
 
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+    if file.filename == "":
+        return jsonify({"error": "No selected file"}), 400
 
-    if not all([tool1, tool2]) or tool1 == tool2:
-        return jsonify({'error': 'Please select two different tools'}), 400
+    if len(tools) < 2 or len(set(tools)) != len(tools):
+        return jsonify({"error": "Please select at least two different tools"}), 400
 
-    # 生成唯一ID保存文件
-    file_id = str(uuid.uuid4())
-    pdf_path = os.path.join(UPLOAD_FOLDER, f"{file_id}.pdf")
-    file.save(pdf_path)
+    if any(tool not in TOOLS for tool in tools):
+        return jsonify({"error": "Unknown tool"}), 400
 
-    # 并行处理PDF
-    results = {}
-    threads = []
+    # 按内容哈希保存文件，相同的PDF只保存一份；每次上传有独立的ID记录用户选择
+    file_hash, pdf_path = save_upload(file.stream, UPLOAD_FOLDER)
+    upload_id = str(uuid.uuid4())
+    store.add_upload(upload_id, file_hash, tools)
 
-    def process_tool(tool_name):
-        results[tool_name] = parse_with_tool(pdf_path, tool_name)
+    status = {
+        "job_id": upload_id,
+        "file_id": upload_id,
+        "file_hash": file_hash,
+        "status_url": f"/jobs/{upload_id}",
+        "events_url": f"/jobs/{upload_id}/events",
+    }
 
-    for tool in [tool1, tool2]:
-        t = threading.Thread(target=process_tool, args=(tool,))
-        threads.append(t)
-        t.start()
+    # 首屏所有工具的结果都已缓存时直接返回
+    meta = cache.get_meta(file_hash)
+    if meta is not None:
+        end = min(1 + PAGE_WINDOW, meta["page_count"] + 1)
+        pages = cached_pages(file_hash, tools, 1, end)
+        if all(page is not None for tool in tools for page in pages[tool]):
+            result = build_response(upload_id, file_hash, tools, meta, pages)
+            jobs.complete(upload_id, result)
+            return jsonify(dict(status, cached=True, result=result))
 
-    for t in threads:
-        t.join()
+    # 解析在后台任务中执行，请求立即返回任务ID
+    try:
+        jobs.submit(upload_id, file_hash, pdf_path, tools)
+    except QueueFull:
+        store.remove_upload(upload_id)
+        response = jsonify({"error": "Too many pending uploads, please retry later"})
+        return response, 503, {"Retry-After": str(JOB_RETRY_AFTER)}
 
-    # 保存结果
-    result_data = {
-        'id': file_id,
-        'tools': [tool1, tool2],
-        'results': results,
-        'timestamp': datetime.now().isoformat()
-    }
+    return jsonify(dict(status, cached=False)), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    status = job.snapshot()
+    if job.state == JOB_DONE:
+        status["result"] = job.result
+    return jsonify(status)
 
-    with open(os.path.join(RESULTS_FOLDER, f"{file_id}.json"), 'w') as f:
-        json.dump(result_data, f)
 
-    # 提取第一页作为预览
-    doc = fitz.open(pdf_path)
-    first_page = doc[0].get_text()
-    doc.close()
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
 
-    return jsonify({
-        'file_id': file_id,
-        'tool1': {'name': TOOLS[tool1], 'result': results[tool1]},
-        'tool2': {'name': TOOLS[tool2], 'result': results[tool2]},
-        'preview': first_page[:500] + '...' if len(first_page) > 500 else first_page
-    })
+    def stream():
+        version = -1
+        while True:
+            current, status = job.wait(version, SSE_KEEPALIVE)
+            if current == version:
+                # 保持连接，避免代理断开空闲连接
+                yield ": keep-alive\n\n"
+                continue
+            version = current
+            event = status["state"] if job.finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(status)}\n\n"
+            if job.finished:
+                return
 
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-@app.route('/pdf/<file_id>')
-def serve_pdf(file_id):
-    return send_from_directory(UPLOAD_FOLDER, f"{file_id}.pdf")
 
+@app.route("/uploads/<upload_id>/pages")
+def upload_pages(upload_id):
+    upload = store.get_upload(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
 
-@app.route('/save_choice', methods=['POST'])
+    try:
+        start = int(request.args.get("start", 1))
+        count = int(request.args.get("count", PAGE_WINDOW))
+    except ValueError:
+        return jsonify({"error": "Invalid page range"}), 400
+    if start < 1 or count < 1:
+        return jsonify({"error": "Invalid page range"}), 400
+    count = min(count, MAX_PAGES_PER_REQUEST)
+
+    tools = request.args.getlist("tool") or upload["tools"]
+    if any(tool not in upload["tools"] for tool in tools):
+        return jsonify({"error": "Unknown tool"}), 400
+
+    file_hash = upload["file_hash"]
+    pdf_path = os.path.join(UPLOAD_FOLDER, f"{file_hash}.pdf")
+    try:
+        meta, pages = load_pages(file_hash, pdf_path, tools, start, start + count)
+    except Exception as e:
+        # 上传的文件已被删除或无法解析
+        app.logger.error(f"读取PDF失败 {file_hash}: {str(e)}")
+        if not os.path.exists(pdf_path):
+            return jsonify({"error": "PDF file not found"}), 404
+        return jsonify({"error": "Failed to read PDF"}), 500
+    end = start + len(pages[tools[0]])
+
+    return jsonify(
+        {
+            "page_count": meta["page_count"],
+            "start": start,
+            "next_page": end if end <= meta["page_count"] else None,
+            "pages": [
+                {
+                    "page": number,
+                    "results": {tool: pages[tool][number - start] for tool in tools},
+                }
+                for number in range(start, end)
+            ],
+        }
+    )
+
+
+@app.route("/pdf/<file_hash>")
+def serve_pdf(file_hash):
+    return send_from_directory(UPLOAD_FOLDER, f"{file_hash}.pdf")
+
+
+@app.route("/save_choice", methods=["POST"])
 def save_choice():
     data = request.json
-    file_id = data.get('file_id')
-    chosen_tool = data.get('chosen_tool')
+    file_id = data.get("file_id")
+    chosen_tool = data.get("chosen_tool")
+
+    upload = store.get_upload(file_id)
+    if upload is None:
+        return jsonify({"error": "Result not found"}), 404
+
+    # 两栏页面按位置提交tool1/tool2
+    if chosen_tool in ("tool1", "tool2"):
+        chosen_tool = upload["tools"][int(chosen_tool[-1]) - 1]
 
-    result_file = os.path.join(RESULTS_FOLDER, f"{file_id}.json")
-    if not os.path.exists(result_file):
-        return jsonify({'error': 'Result not found'}), 404
+    try:
+        recorded, winner = store.record_vote(file_id, chosen_tool)
+    except ValueError:
+        return jsonify({"error": "Unknown tool"}), 400
 
-    with open(result_file, 'r') as f:
-        result_data = json.load(f)
+    if not recorded and winner != chosen_tool:
+        return jsonify({"error": "Choice already saved", "chosen_tool": winner}), 409
 
-    result_data['user_choice'] = chosen_tool
-    result_data['choice_timestamp'] = datetime.now().isoformat()
+    return jsonify({"status": "success"})
 
-    with open(result_file, 'w') as f:
-        json.dump(result_data, f)
 
-    return jsonify({'status': 'success'})
+@app.route("/leaderboard")
+def leaderboard():
+    board = store.leaderboard()
+    for entry in board:
+        entry["name"] = TOOLS.get(entry["tool"], entry["tool"])
+    return jsonify({"leaderboard": board})
 
 
-if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+if __name__ == "__main__":
+    app.run(debug=True)
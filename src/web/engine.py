@@ -0,0 +1,206 @@
+"""
+PDF解析引擎，每个PDF只打开一次，逐页文本只提取一次，由所有解析工具共享
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+# 每个任务提取的页数，页数不超过该值的PDF直接在当前进程内提取
+DEFAULT_PAGES_PER_TASK = 16
+
+# 预览文本的最大字符数
+PREVIEW_CHARS = 500
+
+# 进度回调，参数为(已提取页数, 总页数)
+Progress = Callable[[int, int], None]
+
+
+# 模拟不同解析工具的输出格式，实际应用中需要接入真正的API或库
+def _format_openai(number: int, text: str) -> str:
+    # 模拟OpenAI处理 - 更简洁
+    return f"Page {number} (OpenAI):\n" + text[:500].replace("\n", " ") + "...\n\n"
+
+
+def _format_claude(number: int, text: str) -> str:
+    # 模拟Claude处理 - 保留更多格式
+    return f"=== Page {number} (Claude) ===\n" + text[:600] + "\n\n"
+
+
+def _format_llamaindex(number: int, text: str) -> str:
+    # 模拟LLamaIndex处理 - 带标记
+    return f"📄 Page {number} (LLamaIndex):\n" + text[:400] + "...[truncated]\n\n"
+
+
+def _format_pypdf2(number: int, text: str) -> str:
+    # 模拟PyPDF2处理 - 原始提取
+    return f"Page {number} (PyPDF2):\n" + text + "\n\n"
+
+
+def _format_pdfminer(number: int, text: str) -> str:
+    # 模拟PDFMiner处理 - 更详细
+    return f"Page {number} (PDFMiner):\n" + text[:700] + "\n\n"
+
+
+# 解析工具名称到逐页格式化函数的映射
+FORMATTERS: Dict[str, Callable[[int, str], str]] = {
+    "openai": _format_openai,
+    "claude": _format_claude,
+    "llamaindex": _format_llamaindex,
+    "pypdf2": _format_pypdf2,
+    "pdfminer": _format_pdfminer,
+}
+
+# 解析工具版本，输出格式变化时递增，使缓存的解析结果失效
+TOOL_VERSIONS: Dict[str, str] = {tool: "1" for tool in FORMATTERS}
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """
+    提取PDF中[start, end)范围内各页的文本，在工作进程中执行
+
+    Args:
+        pdf_path: PDF文件路径
+        start: 起始页序号
+        end: 结束页序号(不含)
+
+    Returns:
+        各页文本
+    """
+    with fitz.open(pdf_path) as doc:
+        return [doc[number].get_text() for number in range(start, end)]
+
+
+def format_page(tool_name: str, number: int, text: str) -> str:
+    """
+    按解析工具的格式输出单页结果
+
+    Args:
+        tool_name: 解析工具名称
+        number: 页码，从1开始
+        text: 页面文本
+
+    Returns:
+        单页解析结果
+
+    Raises:
+        ValueError: 不支持的解析工具
+    """
+    if tool_name not in FORMATTERS:
+        raise ValueError(f"不支持的解析工具: {tool_name}")
+    return FORMATTERS[tool_name](number, text)
+
+
+def preview_text(pages: List[str]) -> str:
+    """第一页文本的预览"""
+    first_page = pages[0] if pages else ""
+    if len(first_page) > PREVIEW_CHARS:
+        return first_page[:PREVIEW_CHARS] + "..."
+    return first_page
+
+
+class ParseEngine:
+    """
+    PDF解析引擎
+
+    逐页文本只提取一次，所有解析工具和预览共享同一份结果；
+    页数较多的PDF按页段分发到有界的工作进程池并行提取
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+    ):
+        """
+        初始化解析引擎
+
+        Args:
+            workers: 工作进程数，默认为CPU核数，为1时在当前进程内提取
+            pages_per_task: 每个任务提取的页数
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 多个后台任务线程共享同一个进程池
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """获取工作进程池，workers为1时返回None"""
+        if self.workers <= 1:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # 进程池在后台任务线程中首次创建，fork已有多个线程的进程可能复制
+                # 其他线程持有的锁，因此以spawn方式启动工作进程
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    @staticmethod
+    def page_count(pdf_path: str) -> int:
+        """读取PDF的页数，不提取文本"""
+        with fitz.open(pdf_path) as doc:
+            count: int = doc.page_count
+        return count
+
+    def extract_pages(
+        self,
+        pdf_path: str,
+        progress: Optional[Progress] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> List[str]:
+        """
+        提取PDF中[start, end)范围内各页的文本
+
+        Args:
+            pdf_path: PDF文件路径
+            progress: 进度回调，参数为(已提取页数, 范围内总页数)，在调用线程中执行
+            start: 起始页序号，从0开始
+            end: 结束页序号(不含)，默认为最后一页之后
+
+        Returns:
+            各页文本，按页码顺序
+        """
+        with fitz.open(pdf_path) as doc:
+            end = doc.page_count if end is None else min(end, doc.page_count)
+            total = max(0, end - start)
+            pool = self._get_pool()
+            if pool is None or total <= self.pages_per_task:
+                pages = []
+                for number in range(start, end):
+                    pages.append(doc[number].get_text())
+                    if progress:
+                        progress(len(pages), total)
+                return pages
+
+        futures = {
+            pool.submit(
+                extract_page_range,
+                pdf_path,
+                first,
+                min(first + self.pages_per_task, end),
+            ): first
+            for first in range(start, end, self.pages_per_task)
+        }
+        ranges: Dict[int, List[str]] = {}
+        done = 0
+        # 按完成顺序汇报进度，最后按页码顺序拼接
+        for future in as_completed(futures):
+            ranges[futures[future]] = future.result()
+            done += len(ranges[futures[future]])
+            if progress:
+                progress(done, total)
+        return [text for first in sorted(ranges) for text in ranges[first]]
+
+    def close(self):
+        """关闭工作进程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
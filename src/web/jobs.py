@@ -0,0 +1,212 @@
+"""
+后台任务队列，上传请求立即返回任务ID，解析在有界的后台工作线程中执行
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """等待中的任务数已达上限"""
+
+
+class Job:
+    """
+    后台任务，状态和进度的每次更新都会唤醒等待中的订阅者
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.state = JOB_QUEUED
+        self.pages_done = 0
+        self.page_count: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self._version = 0
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束"""
+        return self.state in (JOB_DONE, JOB_FAILED)
+
+    def update(self, **fields):
+        """更新任务字段并通知订阅者"""
+        with self._cond:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._version += 1
+            self._cond.notify_all()
+
+    def progress(self, done: int, total: int):
+        """进度回调，参数为(已完成页数, 总页数)"""
+        self.update(pages_done=done, page_count=total)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """任务状态，不含结果"""
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "pages_done": self.pages_done,
+            "page_count": self.page_count,
+            "error": self.error,
+        }
+
+    def wait(self, version: int, timeout: float) -> Tuple[int, Dict[str, Any]]:
+        """
+        等待任务在version之后发生变化
+
+        进度更新较快时多次更新合并为一次，订阅者总是拿到最新状态
+
+        Args:
+            version: 订阅者已看到的版本号
+            timeout: 最长等待时间(秒)
+
+        Returns:
+            (当前版本号, 任务状态)，超时未变化时版本号不变
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout)
+            return self._version, self.snapshot()
+
+
+class JobQueue:
+    """
+    有界的后台任务队列
+
+    固定数量的工作线程依次执行任务；等待中的任务数达到上限时拒绝新任务，
+    由调用方返回503让客户端稍后重试。已结束的任务只保留最近的max_jobs个
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., Dict[str, Any]],
+        workers: int = 2,
+        max_pending: int = 16,
+        max_jobs: int = 1000,
+    ):
+        """
+        初始化任务队列
+
+        Args:
+            handler: 任务处理函数，参数为(任务, *提交参数)，返回任务结果
+            workers: 工作线程数
+            max_pending: 等待中的任务数上限
+            max_jobs: 保留的任务数上限
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def _start(self):
+        """首次提交任务时启动工作线程"""
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, *args) -> Job:
+        """
+        提交任务
+
+        Args:
+            job_id: 任务ID
+            *args: 传给处理函数的参数
+
+        Returns:
+            任务
+
+        Raises:
+            QueueFull: 等待中的任务数已达上限
+        """
+        job = Job(job_id)
+        with self._lock:
+            self._start()
+            try:
+                self._queue.put_nowait((job, args))
+            except queue.Full:
+                raise QueueFull(f"等待中的任务数已达上限: {self._queue.maxsize}")
+            self._jobs[job_id] = job
+            self._evict()
+        return job
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> Job:
+        """
+        登记一个无需执行的已完成任务，例如结果全部命中缓存时
+
+        Args:
+            job_id: 任务ID
+            result: 任务结果
+
+        Returns:
+            任务
+        """
+        job = Job(job_id)
+        job.update(state=JOB_DONE, result=result)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict()
+        return job
+
+    def _evict(self):
+        """超过保留上限时移除最早结束的任务"""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                return
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按ID获取任务，不存在时返回None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """等待中的任务数"""
+        return self._queue.qsize()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job, args = item
+            job.update(state=JOB_RUNNING)
+            try:
+                result = self.handler(job, *args)
+            except Exception as e:
+                logger.error(f"任务{job.id}失败: {str(e)}")
+                job.update(state=JOB_FAILED, error=str(e))
+            else:
+                job.update(state=JOB_DONE, result=result)
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """等待已提交的任务完成后停止工作线程"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
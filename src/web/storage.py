@@ -0,0 +1,157 @@
+"""
+上传文件和解析结果存储，按内容哈希去重，相同的PDF只保存和解析一次
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Optional, Tuple
+
+# 写入上传文件时每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_upload(stream: BinaryIO, folder: str) -> Tuple[str, str]:
+    """
+    流式写入上传文件，同时计算SHA-256，以哈希作为文件名保存
+
+    已存在相同内容的文件时丢弃本次写入的副本
+
+    Args:
+        stream: 上传文件流
+        folder: 保存目录
+
+    Returns:
+        (内容哈希, 文件路径)
+    """
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        file_hash = digest.hexdigest()
+        path = os.path.join(folder, f"{file_hash}.pdf")
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return file_hash, path
+
+
+class ResultCache:
+    """
+    解析结果缓存，按(内容哈希, 工具, 工具版本, 页码)逐页保存每个工具的输出
+
+    每页单独保存，只解析过的页面才占用空间，分页读取时不需要加载整个文档的结果；
+    同一工具只保留当前版本的结果，工具输出格式变化后旧结果被删除，
+    缓存大小只随不同PDF的数量和实际查看的页数增长
+    """
+
+    def __init__(self, root: str):
+        """
+        初始化结果缓存
+
+        Args:
+            root: 缓存目录
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, file_hash: str) -> str:
+        return os.path.join(self.root, file_hash[:2], file_hash)
+
+    def _tool_dir(self, file_hash: str, tool: str, version: str) -> str:
+        return os.path.join(self._dir(file_hash), f"{tool}@{version}")
+
+    @staticmethod
+    def _write(directory: str, name: str, content: str):
+        """先写临时文件再替换，并发读取不会看到写了一半的内容"""
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, os.path.join(directory, name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_meta(self, file_hash: str) -> Optional[dict]:
+        """
+        读取文档信息
+
+        Args:
+            file_hash: PDF内容哈希
+
+        Returns:
+            包含page_count和preview的字典，未缓存时返回None
+        """
+        path = os.path.join(self._dir(file_hash), "meta.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta: dict = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def put_meta(self, file_hash: str, meta: dict):
+        """
+        写入文档信息
+
+        Args:
+            file_hash: PDF内容哈希
+            meta: 包含page_count和preview的字典
+        """
+        directory = self._dir(file_hash)
+        os.makedirs(directory, exist_ok=True)
+        self._write(directory, "meta.json", json.dumps(meta))
+
+    def get_page(
+        self, file_hash: str, tool: str, version: str, number: int
+    ) -> Optional[str]:
+        """
+        读取一页的工具输出
+
+        Args:
+            file_hash: PDF内容哈希
+            tool: 解析工具名称
+            version: 解析工具版本
+            number: 页码，从1开始
+
+        Returns:
+            单页输出，未缓存时返回None
+        """
+        path = os.path.join(self._tool_dir(file_hash, tool, version), f"{number}.txt")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_page(self, file_hash: str, tool: str, version: str, number: int, text: str):
+        """
+        写入一页的工具输出，首次写入某个版本时删除同一工具的其他版本
+
+        Args:
+            file_hash: PDF内容哈希
+            tool: 解析工具名称
+            version: 解析工具版本
+            number: 页码，从1开始
+            text: 单页输出
+        """
+        directory = self._tool_dir(file_hash, tool, version)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            pattern = os.path.join(glob.escape(self._dir(file_hash)), f"{tool}@*")
+            for stale in glob.glob(pattern):
+                if stale != directory:
+                    shutil.rmtree(stale, ignore_errors=True)
+        self._write(directory, f"{number}.txt", text)
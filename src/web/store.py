@@ -0,0 +1,319 @@
+"""
+偏好存储模块，用SQLite(WAL模式)保存上传记录、工具输出和用户投票，并增量维护排行榜
+"""
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Elo初始分和K系数
+INITIAL_RATING = 1000.0
+ELO_K = 32.0
+
+# 写入冲突时等待其他进程释放锁的时间(毫秒)
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS uploads ("
+    "id TEXT PRIMARY KEY, file_hash TEXT NOT NULL, tools TEXT NOT NULL, "
+    "created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS uploads_file_hash ON uploads (file_hash)",
+    "CREATE TABLE IF NOT EXISTS outputs ("
+    "file_hash TEXT NOT NULL, tool TEXT NOT NULL, version TEXT NOT NULL, "
+    "page_count INTEGER NOT NULL, chars INTEGER NOT NULL, created_at REAL NOT NULL, "
+    "PRIMARY KEY (file_hash, tool, version))",
+    "CREATE TABLE IF NOT EXISTS votes ("
+    "upload_id TEXT PRIMARY KEY REFERENCES uploads (id), winner TEXT NOT NULL, "
+    "created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS votes_winner ON votes (winner)",
+    "CREATE TABLE IF NOT EXISTS ratings ("
+    "tool TEXT PRIMARY KEY, rating REAL NOT NULL, wins INTEGER NOT NULL, "
+    "losses INTEGER NOT NULL)",
+)
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    """按Elo公式计算rating对opponent的期望得分"""
+    return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400.0))
+
+
+class PreferenceStore:
+    """
+    上传、工具输出和投票的嵌入式存储
+
+    每次投票在同一个写事务中插入投票并更新胜者与每个落选工具的Elo分和胜负数，
+    排行榜查询只读取ratings表，不需要重放历史投票；WAL模式下读不阻塞写，
+    多个进程同时投票时由SQLite的写锁串行化，不会丢失更新
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化偏好存储
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 自动提交模式，写事务由_transaction显式开始
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        with self._transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _transaction(self):
+        """写事务，开始时即获取写锁，避免读后写的升级冲突"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def add_upload(self, upload_id: str, file_hash: str, tools: List[str]):
+        """
+        记录一次上传
+
+        Args:
+            upload_id: 上传ID
+            file_hash: PDF内容哈希
+            tools: 参与比较的解析工具
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO uploads (id, file_hash, tools, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (upload_id, file_hash, json.dumps(tools), time.time()),
+            )
+
+    def remove_upload(self, upload_id: str):
+        """删除没有投票的上传记录，例如任务未能入队时"""
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM uploads WHERE id = ? "
+                "AND NOT EXISTS (SELECT 1 FROM votes WHERE upload_id = ?)",
+                (upload_id, upload_id),
+            )
+
+    def get_upload(self, upload_id: str) -> Optional[dict]:
+        """
+        读取上传记录
+
+        Args:
+            upload_id: 上传ID
+
+        Returns:
+            包含id、file_hash、tools、created_at和winner的字典，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT u.id, u.file_hash, u.tools, u.created_at, v.winner "
+                "FROM uploads u LEFT JOIN votes v ON v.upload_id = u.id WHERE u.id = ?",
+                (upload_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "file_hash": row[1],
+            "tools": json.loads(row[2]),
+            "created_at": row[3],
+            "winner": row[4],
+        }
+
+    def add_output(
+        self, file_hash: str, tool: str, version: str, page_count: int, chars: int
+    ):
+        """
+        记录一个工具输出，输出文本保存在解析结果缓存中
+
+        页面按需逐批解析，同一输出多次记录时字符数累加
+
+        Args:
+            file_hash: PDF内容哈希
+            tool: 解析工具名称
+            version: 解析工具版本
+            page_count: 页数
+            chars: 本次解析的页面的输出字符数
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO outputs "
+                "(file_hash, tool, version, page_count, chars, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (file_hash, tool, version) DO UPDATE SET "
+                "page_count = excluded.page_count, chars = chars + excluded.chars",
+                (file_hash, tool, version, page_count, chars, time.time()),
+            )
+
+    def record_vote(self, upload_id: str, winner: str) -> Tuple[bool, str]:
+        """
+        记录用户投票，并增量更新Elo分和胜负数
+
+        胜者与本次上传中的每个其他工具各计一场比赛，各场比赛的分数变化都按投票前的分数计算；
+        每次上传只计第一次投票
+
+        Args:
+            upload_id: 上传ID
+            winner: 胜出的解析工具名称
+
+        Returns:
+            (是否新记录了投票, 该上传的胜者)
+
+        Raises:
+            KeyError: 上传不存在
+            ValueError: 胜者不在本次上传的工具中
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT u.tools, v.winner FROM uploads u "
+                "LEFT JOIN votes v ON v.upload_id = u.id WHERE u.id = ?",
+                (upload_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(upload_id)
+            tools, existing = json.loads(row[0]), row[1]
+            if winner not in tools:
+                raise ValueError(f"工具{winner}不在本次比较中")
+            if existing is not None:
+                return False, existing
+
+            conn.execute(
+                "INSERT INTO votes (upload_id, winner, created_at) VALUES (?, ?, ?)",
+                (upload_id, winner, time.time()),
+            )
+            # 所有比赛都按投票前的分数计算，结果与tools的顺序无关
+            ratings = self._ratings(conn, tools)
+            gained = 0.0
+            for loser in tools:
+                if loser == winner:
+                    continue
+                delta = ELO_K * (1 - expected_score(ratings[winner], ratings[loser]))
+                gained += delta
+                self._update_rating(conn, loser, ratings[loser] - delta, losses=1)
+            self._update_rating(
+                conn, winner, ratings[winner] + gained, wins=len(tools) - 1
+            )
+        return True, winner
+
+    def import_legacy(self, results_dir: str) -> int:
+        """
+        导入旧版本保存在results_dir/<上传ID>.json中的上传记录和投票
+
+        旧版本的投票按位置保存为tool1/tool2，按文件中的tools映射为工具名称；
+        投票按时间顺序计入Elo分。已导入的上传不会重复计票，可以在每次启动时调用
+
+        Args:
+            results_dir: 旧版本的结果目录
+
+        Returns:
+            新导入的投票数
+        """
+        records = []
+        for path in glob.glob(os.path.join(results_dir, "*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                upload_id, tools = data["id"], data["tools"]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"跳过无法读取的旧结果文件 {path}: {str(e)}")
+                continue
+            choice = data.get("user_choice")
+            if choice in ("tool1", "tool2"):
+                choice = tools[int(choice[-1]) - 1]
+            records.append(
+                (data.get("choice_timestamp") or "", upload_id, tools, choice)
+            )
+
+        imported = 0
+        for _, upload_id, tools, choice in sorted(records):
+            # 旧版本按上传ID保存PDF，没有内容哈希
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO uploads (id, file_hash, tools, created_at) "
+                    "VALUES (?, '', ?, ?)",
+                    (upload_id, json.dumps(tools), time.time()),
+                )
+            if choice in tools:
+                recorded, _ = self.record_vote(upload_id, choice)
+                imported += recorded
+        if imported:
+            logger.info(f"已从{results_dir}导入{imported}条旧投票")
+        return imported
+
+    @staticmethod
+    def _ratings(conn: sqlite3.Connection, tools: List[str]) -> Dict[str, float]:
+        """读取工具的当前Elo分，没有记录的工具为初始分"""
+        placeholders = ", ".join("?" * len(tools))
+        rows = conn.execute(
+            f"SELECT tool, rating FROM ratings WHERE tool IN ({placeholders})", tools
+        ).fetchall()
+        ratings = dict.fromkeys(tools, INITIAL_RATING)
+        ratings.update(dict(rows))
+        return ratings
+
+    @staticmethod
+    def _update_rating(
+        conn: sqlite3.Connection,
+        tool: str,
+        rating: float,
+        wins: int = 0,
+        losses: int = 0,
+    ):
+        conn.execute(
+            "INSERT INTO ratings (tool, rating, wins, losses) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (tool) DO UPDATE SET rating = excluded.rating, "
+            "wins = wins + excluded.wins, losses = losses + excluded.losses",
+            (tool, rating, wins, losses),
+        )
+
+    def leaderboard(self) -> List[dict]:
+        """
+        按Elo分排序的排行榜
+
+        Returns:
+            每个工具的tool、rating、wins、losses、matches和win_rate
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tool, rating, wins, losses FROM ratings "
+                "ORDER BY rating DESC, tool"
+            ).fetchall()
+        board = []
+        for tool, rating, wins, losses in rows:
+            matches = wins + losses
+            board.append(
+                {
+                    "tool": tool,
+                    "rating": round(rating, 1),
+                    "wins": wins,
+                    "losses": losses,
+                    "matches": matches,
+                    "win_rate": round(wins / matches, 4) if matches else 0.0,
+                }
+            )
+        return board
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
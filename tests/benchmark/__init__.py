@@ -0,0 +1,3 @@
+"""
+评估模块测试包
+"""
@@ -0,0 +1,67 @@
+"""
+性能基准测试测试
+"""
+import unittest
+
+from src.benchmark.harness import run_benchmark
+from src.benchmark.mock_server import make_payload
+from src.utils.metrics import percentile
+
+
+class TestPercentile(unittest.TestCase):
+    """百分位数测试类"""
+
+    def test_percentile(self):
+        """测试线性插值百分位数"""
+        values = [4.0, 1.0, 3.0, 2.0]
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertEqual(percentile(values, 100), 4.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_make_payload_size(self):
+        """测试模拟页面大小"""
+        payload = make_payload("https://example.com", 5000)
+        self.assertGreaterEqual(len(payload["markdown"]), 5000)
+        self.assertIn("<script>", payload["html"])
+
+
+class TestRunBenchmark(unittest.TestCase):
+    """基准测试场景测试类"""
+
+    def check_report(self, report, num_urls):
+        self.assertEqual(report["urls"], num_urls)
+        self.assertGreater(report["urls_per_s"], 0)
+        self.assertGreater(report["requests"], 0)
+        self.assertGreater(report["bytes_received"], 0)
+        self.assertLessEqual(report["latency_p50_ms"], report["latency_p99_ms"])
+
+    def test_batch(self):
+        """测试完整批处理场景"""
+        report = run_benchmark(
+            num_urls=5, scenario="batch", latency=0.0, payload_size=2000
+        )
+        self.check_report(report, 5)
+        # 每个URL一次提取请求和一次LLM请求
+        self.assertEqual(report["requests"], 10)
+
+    def test_extract_async(self):
+        """测试提取器异步接口场景"""
+        report = run_benchmark(
+            num_urls=5,
+            scenario="extract_async",
+            extractor_type="jina",
+            latency=0.0,
+            payload_size=2000,
+        )
+        self.check_report(report, 5)
+        self.assertEqual(report["requests"], 5)
+
+    def test_unknown_scenario(self):
+        """测试不支持的场景"""
+        with self.assertRaises(ValueError):
+            run_benchmark(num_urls=1, scenario="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+提取结果缓存测试模块
+"""
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from src.extractors.cache import DEFAULT_MAX_SIZE, CachedExtractor, ExtractorCache
+from src.extractors.firecrawl import FirecrawlExtractor
+
+
+class TestExtractorCache(unittest.TestCase):
+    """测试提取结果缓存"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp.name
+        self.result = {
+            "markdown": "# 标题" * 100,
+            "html": "<h1>标题</h1>" * 100,
+            "metadata": {"url": "https://example.com", "extractor": "firecrawl"},
+        }
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    def test_key_depends_on_options(self):
+        """测试缓存键包含提取器和请求选项"""
+        key = ExtractorCache.make_key("https://a.com", "firecrawl", {"f": 1})
+        self.assertEqual(
+            key, ExtractorCache.make_key("https://a.com", "firecrawl", {"f": 1})
+        )
+        self.assertNotEqual(
+            key, ExtractorCache.make_key("https://a.com", "jina", {"f": 1})
+        )
+        self.assertNotEqual(
+            key, ExtractorCache.make_key("https://a.com", "firecrawl", {"f": 2})
+        )
+
+    def test_key_depends_on_base_url(self):
+        """测试不同后端地址的结果不共用缓存，且缓存大小默认有上限"""
+        real = CachedExtractor(
+            FirecrawlExtractor(api_key="key"), ExtractorCache(self.cache_dir)
+        )
+        mock = CachedExtractor(
+            FirecrawlExtractor(api_key="key", base_url="http://127.0.0.1:8000"),
+            ExtractorCache(self.cache_dir),
+        )
+        self.assertNotEqual(real._key("https://a.com"), mock._key("https://a.com"))
+        self.assertEqual(real.cache.max_size, DEFAULT_MAX_SIZE)
+
+    def test_persist_and_ttl(self):
+        """测试缓存持久化和过期"""
+        cache = ExtractorCache(self.cache_dir, ttl=60)
+        cache.set("k", self.result)
+
+        # 重新加载后仍可读取
+        reloaded = ExtractorCache(self.cache_dir, ttl=60)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.get("k"), self.result)
+
+        expired = ExtractorCache(self.cache_dir, ttl=60)
+        expired.ttl = 0.01
+        time.sleep(0.02)
+        self.assertIsNone(expired.get("k"))
+        self.assertEqual(len(expired), 0)
+
+    def test_lru_eviction(self):
+        """测试超过大小上限时淘汰最久未使用的记录"""
+        cache = ExtractorCache(self.cache_dir)
+        cache.set("a", self.result)
+        entry_size = cache.size
+        cache.max_size = entry_size * 2 + entry_size // 2
+
+        cache.set("b", self.result)
+        cache.get("a")
+        cache.set("c", self.result)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_cached_extractor(self):
+        """测试命中缓存时不再调用被包装的提取器"""
+        inner = FirecrawlExtractor(api_key="key")
+        inner.extract = MagicMock(return_value=self.result)
+        extractor = CachedExtractor(inner, ExtractorCache(self.cache_dir))
+
+        first = extractor.extract("https://example.com")
+        second = extractor.extract("https://example.com")
+
+        inner.extract.assert_called_once()
+        self.assertNotIn("cache_hit", first["metadata"])
+        self.assertTrue(second["metadata"]["cache_hit"])
+        self.assertEqual(second["markdown"], self.result["markdown"])
+
+
+if __name__ == "__main__":
+    unittest.main()
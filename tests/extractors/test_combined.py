@@ -0,0 +1,130 @@
+"""
+组合提取器测试模块
+"""
+import asyncio
+import time
+import unittest
+
+from src.extractors.base import BaseExtractor
+from src.extractors.combined import CombinedExtractor
+from src.main import get_extractor
+
+
+class DelayedExtractor(BaseExtractor):
+    """按固定延迟返回结果的测试提取器"""
+
+    def __init__(self, name, delay, markdown="# ok"):
+        super().__init__(None)
+        self.name = name
+        self.delay = delay
+        self.markdown = markdown
+        self.calls = 0
+        self.cancelled = False
+
+    def _result(self, url):
+        return {
+            "markdown": self.markdown,
+            "html": "",
+            "metadata": {"url": url, "extractor": self.name},
+        }
+
+    def extract(self, url):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._result(url)
+
+    async def extract_async(self, url):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._result(url)
+
+    def extract_batch(self, urls):
+        return [self.extract(url) for url in urls]
+
+
+class TestCombinedExtractor(unittest.IsolatedAsyncioTestCase):
+    """测试对冲请求"""
+
+    async def test_fast_primary_not_hedged(self):
+        """测试主提取器在截止时间内返回时不启动后备提取器"""
+        primary = DelayedExtractor("primary", 0)
+        backup = DelayedExtractor("backup", 0)
+        combined = CombinedExtractor([primary, backup], hedge_delay=1.0)
+
+        result = await combined.extract_async("https://a.com")
+
+        self.assertEqual(result["metadata"]["extractor"], "primary")
+        self.assertFalse(result["metadata"]["metrics"]["extract"]["hedged"])
+        self.assertEqual(backup.calls, 0)
+
+    async def test_slow_primary_hedged(self):
+        """测试主提取器超过截止时间后启动后备提取器，并取消落后的请求"""
+        primary = DelayedExtractor("primary", 5)
+        backup = DelayedExtractor("backup", 0)
+        combined = CombinedExtractor([primary, backup], hedge_delay=0.05)
+
+        start = time.perf_counter()
+        result = await combined.extract_async("https://a.com")
+        await asyncio.sleep(0)
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(result["metadata"]["extractor"], "backup")
+        self.assertTrue(result["metadata"]["metrics"]["extract"]["hedged"])
+        self.assertTrue(primary.cancelled)
+
+    async def test_empty_primary_falls_through(self):
+        """测试主提取器返回空markdown时立即启动后备提取器"""
+        primary = DelayedExtractor("primary", 0, markdown="")
+        backup = DelayedExtractor("backup", 0)
+        combined = CombinedExtractor([primary, backup], hedge_delay=10)
+
+        result = await combined.extract_async("https://a.com")
+        self.assertEqual(result["metadata"]["extractor"], "backup")
+
+        # 全部无效时返回主提取器的结果
+        backup.markdown = ""
+        result = await combined.extract_async("https://a.com")
+        self.assertEqual(result["metadata"]["extractor"], "primary")
+
+    def test_deadline_uses_percentile(self):
+        """测试样本足够后以延迟百分位数作为截止时间"""
+        combined = CombinedExtractor(
+            [DelayedExtractor("primary", 0)],
+            hedge_delay=2.0,
+            hedge_percentile=50,
+            hedge_min_samples=3,
+        )
+        self.assertEqual(combined.hedge_deadline(), 2.0)
+        for seconds in (0.1, 0.2, 0.3):
+            combined._observe(seconds)
+        self.assertAlmostEqual(combined.hedge_deadline(), 0.2)
+
+    def test_sync_extract_hedged(self):
+        """测试同步接口的对冲请求"""
+        primary = DelayedExtractor("primary", 1)
+        backup = DelayedExtractor("backup", 0)
+        combined = CombinedExtractor([primary, backup], hedge_delay=0.05)
+
+        start = time.perf_counter()
+        result = combined.extract("https://a.com")
+        self.assertLess(time.perf_counter() - start, 0.9)
+        self.assertEqual(result["metadata"]["extractor"], "backup")
+
+    def test_get_extractor_keeps_zero_hedge_delay(self):
+        """测试显式指定的0秒对冲等待时间不会被替换为默认值"""
+        extractor = get_extractor(
+            "combined",
+            combined_extractors=["local", "local"],
+            hedge_delay=0,
+            use_cache=False,
+        )
+        self.assertEqual(extractor.hedge_delay, 0)
+        self.assertEqual(get_extractor("combined", use_cache=False).hedge_delay, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+本地提取器测试模块
+"""
+import asyncio
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from src.extractors.local import (
+    MEMBER_SEPARATOR,
+    LocalExtractor,
+    expand_sources,
+    html_to_markdown,
+    iter_sources,
+)
+from src.main import get_extractor
+
+PAGE = """<html><head><title>Page {i}</title>
+<link rel="canonical" href="https://example.com/page{i}">
+<script>track()</script><style>p {{ color: red; }}</style></head>
+<body><nav><a href="/">Home</a></nav>
+<main><h1>Heading {i}</h1><p>Body text {i} with <a href="/next">a link</a>.</p>
+<pre><code>def f():
+    return {i}</code></pre></main>
+<footer>Copyright</footer></body></html>"""
+
+
+class TestLocalExtractor(unittest.TestCase):
+    """本地提取器测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.pages_dir = os.path.join(self.root, "pages")
+        os.makedirs(os.path.join(self.pages_dir, "sub"))
+        paths = [
+            os.path.join(self.pages_dir, "a.html"),
+            os.path.join(self.pages_dir, "sub", "b.htm"),
+            os.path.join(self.pages_dir, "c.html"),
+        ]
+        for i, path in enumerate(paths):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(PAGE.format(i=i))
+        with open(os.path.join(self.pages_dir, "notes.txt"), "w") as f:
+            f.write("ignored")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_html_to_markdown(self):
+        """测试移除非正文节点并保留标题、链接和代码缩进"""
+        converted = html_to_markdown(PAGE.format(i=1))
+        markdown = converted["markdown"]
+
+        self.assertEqual(converted["title"], "Page 1")
+        self.assertEqual(converted["canonical_url"], "https://example.com/page1")
+        self.assertIn("# Heading 1", markdown)
+        self.assertIn("[a link](https://example.com/next)", markdown)
+        self.assertIn("        return 1", markdown)
+        for removed in ("track()", "color: red", "Home", "Copyright"):
+            self.assertNotIn(removed, markdown)
+
+    def test_iter_sources_directory(self):
+        """测试目录按路径顺序展开为HTML文件"""
+        sources = list(iter_sources(self.pages_dir))
+        names = [os.path.relpath(s, self.pages_dir) for s in sources]
+        self.assertEqual(names, ["a.html", "c.html", os.path.join("sub", "b.htm")])
+
+    def test_extract_single_file(self):
+        """测试转换单个文件和file://地址"""
+        extractor = LocalExtractor(workers=1)
+        path = os.path.join(self.pages_dir, "a.html")
+
+        for source in (path, f"file://{path}"):
+            result = extractor.extract(source)
+            self.assertIn("# Heading 0", result["markdown"])
+            self.assertEqual(result["metadata"]["title"], "Page 0")
+            self.assertEqual(result["metadata"]["extractor"], "local")
+            extract = result["metadata"]["metrics"]["extract"]
+            self.assertEqual(extract["bytes_in"], os.path.getsize(path))
+
+    def test_missing_file(self):
+        """测试文件不存在时返回错误结果"""
+        result = LocalExtractor(workers=1).extract(os.path.join(self.root, "x.html"))
+        self.assertEqual(result["markdown"], "")
+        self.assertIn("error", result["metadata"])
+
+    def test_archives(self):
+        """测试从zip和tar.gz归档中读取成员"""
+        zip_path = os.path.join(self.root, "pages.zip")
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("docs/index.html", PAGE.format(i=7))
+            archive.writestr("docs/readme.txt", "ignored")
+        tar_path = os.path.join(self.root, "pages.tar.gz")
+        with tarfile.open(tar_path, "w:gz") as archive:
+            archive.add(self.pages_dir, arcname="pages")
+
+        sources, collections = expand_sources([zip_path, tar_path])
+        self.assertEqual(collections, 2)
+        self.assertEqual(len(sources), 4)
+        self.assertEqual(sources[0], f"{zip_path}{MEMBER_SEPARATOR}docs/index.html")
+
+        results = LocalExtractor(workers=1).extract_batch(sources)
+        self.assertIn("# Heading 7", results[0]["markdown"])
+        self.assertTrue(all(r["markdown"] for r in results))
+
+    def test_process_pool_batch(self):
+        """测试多进程批量转换保持输入顺序"""
+        extractor = LocalExtractor(workers=2)
+        try:
+            results = extractor.extract_batch([self.pages_dir])
+            titles = [r["metadata"]["title"] for r in results]
+            self.assertEqual(titles, ["Page 0", "Page 2", "Page 1"])
+
+            path = os.path.join(self.pages_dir, "c.html")
+            result = asyncio.run(extractor.extract_async(path))
+            self.assertEqual(result["metadata"]["title"], "Page 2")
+        finally:
+            extractor.close()
+
+    def test_get_extractor(self):
+        """测试通过get_extractor创建本地提取器且不包装缓存"""
+        extractor = get_extractor(
+            "local", local_workers=3, cache_dir=os.path.join(self.root, "cache")
+        )
+        self.assertIsInstance(extractor, LocalExtractor)
+        self.assertEqual(extractor.workers, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+提取器弹性模块测试
+"""
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+
+from requests.exceptions import ConnectionError, HTTPError
+
+from src.extractors.jina import JinaExtractor
+from src.extractors.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    BackendResilience,
+    CircuitBreaker,
+    RetryBudget,
+    parse_retry_after,
+)
+
+
+class TestRetryAfter(unittest.TestCase):
+    """Retry-After解析测试类"""
+
+    def test_parse(self):
+        """测试秒数和HTTP日期两种格式"""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        seconds = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+        self.assertTrue(25 <= seconds <= 31)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """熔断器测试类"""
+
+    def test_open_half_open_close(self):
+        """测试失败率超过阈值时打开，冷却后探测成功则关闭"""
+        breaker = CircuitBreaker("test", min_requests=4, cooldown=0.05)
+        for _ in range(2):
+            breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, STATE_HALF_OPEN)
+        # 半开状态只放行一个探测请求
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, STATE_CLOSED)
+
+    def test_probe_lease_expires(self):
+        """测试探测请求没有报告结果时，探测超时后放行新的探测请求"""
+        breaker = CircuitBreaker(
+            "test", min_requests=1, cooldown=0.01, probe_timeout=0.05
+        )
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.release_probe()
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_doubles_cooldown(self):
+        """测试探测失败后以加倍的冷却时间重新打开"""
+        breaker = CircuitBreaker("test", min_requests=1, cooldown=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, STATE_OPEN)
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, STATE_OPEN)
+        time.sleep(0.05)
+        self.assertEqual(breaker.state, STATE_HALF_OPEN)
+
+
+class TestBackendResilience(unittest.TestCase):
+    """后端弹性策略测试类"""
+
+    def test_retry_budget(self):
+        """测试重试预算用尽后不再重试"""
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_balance=10)
+        resilience = BackendResilience("test", retry_count=5, retry_budget=budget)
+        for _ in range(4):
+            resilience.on_request()
+        delays = [resilience.next_delay(0) for _ in range(3)]
+        self.assertIsNotNone(delays[0])
+        self.assertIsNotNone(delays[1])
+        self.assertIsNone(delays[2])
+
+    def test_retry_after(self):
+        """测试遵循Retry-After，过长时放弃重试并打开熔断器"""
+        breaker = CircuitBreaker("test")
+        resilience = BackendResilience(
+            "test", base_delay=0, max_retry_after=10, breaker=breaker
+        )
+        self.assertEqual(resilience.next_delay(0, retry_after=2), 2)
+        self.assertIsNone(resilience.next_delay(resilience.retry_count - 1))
+
+        resilience.on_failure(retry_after=60)
+        self.assertEqual(breaker.state, STATE_OPEN)
+        self.assertIsNone(resilience.next_delay(0))
+
+    @patch("time.sleep")
+    @patch("requests.post")
+    def test_extractor_fails_fast_when_open(self, mock_post, mock_sleep):
+        """测试后端故障时熔断器打开，之后的请求不再发出"""
+        mock_post.side_effect = ConnectionError("connection refused")
+        resilience = BackendResilience(
+            "jina",
+            retry_count=3,
+            breaker=CircuitBreaker("jina", min_requests=3, cooldown=60),
+        )
+        extractor = JinaExtractor(api_key="key", resilience=resilience)
+
+        first = extractor.extract("https://a.com")
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(first["metadata"]["metrics"]["extract"]["retries"], 2)
+
+        second = extractor.extract("https://b.com")
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertIn("熔断", second["metadata"]["error"])
+
+    @patch("time.sleep")
+    @patch("requests.post")
+    def test_client_error_not_retried(self, mock_post, mock_sleep):
+        """测试4xx响应不重试，也不计入后端故障"""
+        response = MagicMock(status_code=404)
+        response.raise_for_status.side_effect = HTTPError("404", response=response)
+        mock_post.return_value = response
+        breaker = CircuitBreaker("jina", min_requests=1)
+        extractor = JinaExtractor(
+            api_key="key", resilience=BackendResilience("jina", breaker=breaker)
+        )
+
+        result = extractor.extract("https://a.com")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertTrue(result["metadata"]["error"])
+        self.assertEqual(breaker.state, STATE_CLOSED)
+        mock_sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
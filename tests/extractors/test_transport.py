@@ -0,0 +1,225 @@
+"""
+异步传输层测试模块
+"""
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+from aiohttp import web
+
+from src.extractors.firecrawl import FirecrawlExtractor
+from src.extractors.jina import JinaExtractor
+from src.extractors.resilience import STATE_HALF_OPEN, BackendResilience, CircuitBreaker
+from src.extractors.transport import AsyncTransport, TransportError
+
+
+class TestAsyncTransport(unittest.IsolatedAsyncioTestCase):
+    """测试异步传输层"""
+
+    async def asyncSetUp(self):
+        """启动本地测试服务"""
+        self.calls = 0
+        self.release = asyncio.Event()
+
+        async def flaky(request):
+            self.calls += 1
+            if self.calls < 2:
+                return web.Response(status=503)
+            return web.json_response({"ok": True})
+
+        async def bad_request(request):
+            self.calls += 1
+            return web.Response(status=400)
+
+        async def html_page(request):
+            self.calls += 1
+            return web.Response(text="<html>" + "x" * 1000 + "</html>")
+
+        async def hanging(request):
+            self.calls += 1
+            await self.release.wait()
+            return web.json_response({"ok": True})
+
+        app = web.Application()
+        app.router.add_post("/flaky", flaky)
+        app.router.add_post("/bad", bad_request)
+        app.router.add_post("/html", html_page)
+        app.router.add_post("/hanging", hanging)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.transport = AsyncTransport(retry_count=3, backoff=0)
+
+    async def asyncTearDown(self):
+        """关闭测试服务"""
+        self.release.set()
+        await self.transport.close()
+        await self.runner.cleanup()
+
+    async def test_retry_on_server_error(self):
+        """测试5xx响应会被重试，并统计重试次数和传输字节数"""
+        stats = {}
+        data = await self.transport.request_json(
+            "POST", f"{self.base_url}/flaky", json={"a": 1}, stats=stats
+        )
+        self.assertEqual(data, {"ok": True})
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["bytes_out"], 2 * len(b'{"a": 1}'))
+        self.assertEqual(stats["bytes_in"], len(b'{"ok": true}'))
+
+    async def test_client_error_not_retried(self):
+        """测试4xx响应直接失败"""
+        with self.assertRaises(TransportError) as ctx:
+            await self.transport.request_json("POST", f"{self.base_url}/bad")
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertEqual(self.calls, 1)
+
+    async def test_non_json_body(self):
+        """测试2xx响应体不是JSON时重试后抛出TransportError，错误信息截断响应体"""
+        with self.assertRaises(TransportError) as ctx:
+            await self.transport.request_json("POST", f"{self.base_url}/html")
+        self.assertEqual(ctx.exception.status, 200)
+        self.assertEqual(self.calls, 3)
+        self.assertIn("<html>", str(ctx.exception))
+        self.assertLess(len(str(ctx.exception)), 300)
+
+    async def test_cancelled_probe_releases_breaker(self):
+        """测试半开状态的探测请求被取消后归还探测名额，熔断器不会一直拒绝请求"""
+        breaker = CircuitBreaker("test", min_requests=1, cooldown=0.01)
+        resilience = BackendResilience("test", breaker=breaker)
+        breaker.record_failure()
+        await asyncio.sleep(0.02)
+        self.assertEqual(breaker.state, STATE_HALF_OPEN)
+
+        probe = asyncio.create_task(
+            self.transport.request_json(
+                "POST", f"{self.base_url}/hanging", resilience=resilience
+            )
+        )
+        while self.calls == 0:
+            await asyncio.sleep(0.01)
+        self.assertFalse(breaker.allow())
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertEqual(breaker.state, STATE_HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+
+class TestExtractAsync(unittest.IsolatedAsyncioTestCase):
+    """测试提取器的异步接口"""
+
+    async def test_firecrawl_extract_async(self):
+        """测试Firecrawl异步提取"""
+        transport = AsyncTransport()
+        transport.request_json = AsyncMock(
+            return_value={
+                "success": True,
+                "data": {"markdown": "# 标题", "html": "<h1>标题</h1>", "title": "T"},
+            }
+        )
+        extractor = FirecrawlExtractor(api_key="key", transport=transport)
+
+        results = await asyncio.gather(
+            extractor.extract_async("https://a.com"),
+            extractor.extract_async("https://b.com"),
+        )
+
+        self.assertEqual(
+            [r["metadata"]["url"] for r in results], ["https://a.com", "https://b.com"]
+        )
+        self.assertEqual(results[0]["markdown"], "# 标题")
+        self.assertEqual(transport.request_json.await_count, 2)
+
+    async def test_jina_extract_async_error(self):
+        """测试Jina异步提取失败时返回空结果"""
+        transport = AsyncTransport()
+        transport.request_json = AsyncMock(side_effect=TransportError("HTTP 503"))
+        extractor = JinaExtractor(api_key="key", transport=transport)
+
+        result = await extractor.extract_async("https://a.com")
+
+        self.assertEqual(result["markdown"], "")
+        self.assertEqual(result["metadata"]["error"], "HTTP 503")
+
+
+class TestFirecrawlBatchManager(unittest.IsolatedAsyncioTestCase):
+    """测试Firecrawl批处理任务管理器"""
+
+    async def test_stream_partial_and_missing(self):
+        """测试部分结果即时产出，只重新提取缺失的URL"""
+        urls = [f"https://example.com/{i}" for i in range(5)]
+        polls = {"job-0": 0, "job-1": 0}
+
+        async def request_json(method, url, headers=None, json=None, **kwargs):
+            if method == "POST":
+                job = "job-0" if json["urls"][0] == urls[0] else "job-1"
+                return {"success": True, "data": {"jobId": job}}
+            job = url.rsplit("/", 1)[1]
+            polls[job] += 1
+            if job == "job-0":
+                # 第一次轮询返回部分结果，第二次完成
+                done = urls[:1] if polls[job] == 1 else urls[:3]
+                status = "scraping" if polls[job] == 1 else "completed"
+            else:
+                # 第二个任务完成但缺少一个URL
+                done, status = urls[3:4], "completed"
+            results = [{"url": u, "markdown": f"# {u}"} for u in done]
+            return {"data": {"status": status, "results": results}}
+
+        transport = AsyncTransport()
+        transport.request_json = AsyncMock(side_effect=request_json)
+        extractor = FirecrawlExtractor(
+            api_key="key", transport=transport, max_urls_per_batch=3, poll_interval=0
+        )
+        extractor.extract_async = AsyncMock(
+            return_value={"markdown": "# fallback", "metadata": {"url": urls[4]}}
+        )
+
+        results = [r async for r in extractor.extract_batch_stream(urls)]
+
+        self.assertEqual(sorted(r["metadata"]["url"] for r in results), sorted(urls))
+        extractor.extract_async.assert_awaited_once_with(urls[4])
+        self.assertEqual(polls, {"job-0": 2, "job-1": 1})
+
+    async def test_batch_async_matches_normalized_urls(self):
+        """测试在事件循环中批量提取，补全斜杠或重定向后的结果仍匹配到请求的URL"""
+        urls = ["https://A.com", "https://b.com/path", "https://c.com"]
+
+        async def request_json(method, url, headers=None, json=None, **kwargs):
+            if method == "POST":
+                self.assertEqual(json["urls"], urls)
+                return {"success": True, "data": {"jobId": "job"}}
+            results = [
+                {"url": "https://a.com/", "markdown": "# a"},
+                {
+                    "url": "https://www.b.com/moved",
+                    "markdown": "# b",
+                    "metadata": {"sourceURL": "https://b.com/path/"},
+                },
+            ]
+            return {"data": {"status": "completed", "results": results}}
+
+        transport = AsyncTransport()
+        transport.request_json = AsyncMock(side_effect=request_json)
+        extractor = FirecrawlExtractor(
+            api_key="key", transport=transport, poll_interval=0
+        )
+        extractor.extract_async = AsyncMock(
+            return_value={"markdown": "# c", "metadata": {"url": urls[2]}}
+        )
+
+        results = await extractor.extract_batch_async(urls)
+
+        self.assertEqual([r["metadata"]["url"] for r in results], urls)
+        self.assertEqual([r["markdown"] for r in results], ["# a", "# b", "# c"])
+        extractor.extract_async.assert_awaited_once_with(urls[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
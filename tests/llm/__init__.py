@@ -0,0 +1,3 @@
+"""
+LLM测试包
+"""
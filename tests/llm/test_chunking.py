@@ -0,0 +1,77 @@
+"""
+Markdown分块测试模块
+"""
+import unittest
+from unittest.mock import patch
+
+from src.llm.chunking import estimate_tokens, split_markdown
+from src.llm.processor import LLMProcessor
+from tests.llm.test_processor import make_response
+
+
+class TestChunking(unittest.TestCase):
+    """测试markdown分块"""
+
+    def test_estimate_tokens(self):
+        """测试token估计"""
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+        self.assertEqual(estimate_tokens("中文"), 2)
+
+    def test_split_on_headings_and_budget(self):
+        """测试按标题切分且每块不超过预算"""
+        sections = [f"## 第{i}节\n\n" + ("内容" * 40 + "\n\n") * 3 for i in range(6)]
+        markdown = "# 标题\n\n" + "".join(sections)
+
+        chunks = split_markdown(markdown, 400)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 400)
+        # 除第一块外，每块都从标题开始
+        for chunk in chunks[1:]:
+            self.assertTrue(chunk.startswith("## "))
+        self.assertEqual("".join(chunks).replace("\n", ""), markdown.replace("\n", ""))
+
+    def test_code_fence_kept_whole(self):
+        """测试代码块不会在中间被切开"""
+        code = "```python\n" + "\n\n".join(f"x = {i}" for i in range(20)) + "\n```"
+        paragraph = "段落" * 50
+        chunks = split_markdown(paragraph + "\n\n" + code + "\n\n" + paragraph, 120)
+        self.assertEqual(chunks, [paragraph, code, paragraph])
+
+    @patch("openai.OpenAI")
+    def test_optimize_chunked(self, mock_openai):
+        """测试长文档分块优化并按顺序拼接"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.side_effect = lambda **kwargs: make_response(
+            kwargs["messages"][1]["content"].split("```\n")[1].split("\n```")[0].upper()
+        )
+        markdown = "\n\n".join(
+            f"## part{i}\n\n" + " ".join(["text"] * 100) for i in range(4)
+        )
+
+        processor = LLMProcessor(api_key="key", chunk_tokens=200)
+        result = processor.optimize_markdown({"markdown": markdown, "html": ""})
+
+        self.assertEqual(result["metadata"]["chunks"], mock_create.call_count)
+        self.assertGreater(result["metadata"]["chunks"], 1)
+        self.assertEqual(result["markdown"], markdown.upper())
+
+    @patch("openai.OpenAI")
+    def test_short_markdown_keeps_html(self, mock_openai):
+        """测试markdown较短而HTML较长时不分块，提示词中仍附带HTML"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.return_value = make_response("# 优化后")
+        html = "<p>" + "网页正文内容" * 2000 + "</p>"
+
+        processor = LLMProcessor(api_key="key", chunk_tokens=200, prune_html=False)
+        result = processor.optimize_markdown({"markdown": "# 标题\n\n正文", "html": html})
+
+        mock_create.assert_called_once()
+        self.assertNotIn("chunks", result["metadata"])
+        self.assertIn("网页正文内容", mock_create.call_args.kwargs["messages"][1]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+LLM处理器测试模块
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src import main
+from src.llm.cache import ResponseCache
+from src.llm.processor import LLMProcessor
+
+
+def make_response(content):
+    """构建模拟的LLM响应"""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def make_stream(pieces, prompt_tokens=0):
+    """构建模拟的流式响应事件，最后一个事件只包含usage"""
+    events = []
+    for piece in pieces:
+        event = MagicMock(usage=None)
+        event.choices = [MagicMock()]
+        event.choices[0].delta.content = piece
+        events.append(event)
+    final = MagicMock(choices=[])
+    final.usage.prompt_tokens = prompt_tokens
+    final.usage.completion_tokens = len(pieces)
+    events.append(final)
+    return iter(events)
+
+
+class TestResponseCache(unittest.TestCase):
+    """测试LLM响应缓存"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "llm.sqlite3")
+        self.data = {
+            "markdown": "# 标题",
+            "html": "<h1>标题</h1>",
+            "metadata": {"url": "https://example.com"},
+        }
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    def test_key_depends_on_settings(self):
+        """测试缓存键包含模型和温度"""
+        messages = [{"role": "user", "content": "hi"}]
+        key = ResponseCache.make_key("gpt-4", 0.1, "openai", messages)
+        self.assertNotEqual(
+            key, ResponseCache.make_key("gpt-4", 0.2, "openai", messages)
+        )
+        self.assertNotEqual(
+            key, ResponseCache.make_key("gpt-4o", 0.1, "openai", messages)
+        )
+
+    @patch("openai.OpenAI")
+    def test_optimize_uses_cache(self, mock_openai):
+        """测试相同输入的第二次优化命中缓存"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.return_value = make_response("# 优化后")
+
+        processor = LLMProcessor(api_key="key", llm_cache_path=self.cache_path)
+        first = processor.optimize_markdown(self.data)
+        processor.cache.close()
+
+        # 新的处理器实例从SQLite读取缓存
+        processor = LLMProcessor(api_key="key", llm_cache_path=self.cache_path)
+        second = processor.optimize_markdown(self.data)
+        processor.cache.close()
+
+        mock_create.assert_called_once()
+        self.assertEqual(second["markdown"], "# 优化后")
+        self.assertFalse(first["metadata"]["llm_cache_hit"])
+        self.assertTrue(second["metadata"]["llm_cache_hit"])
+        self.assertIn("tokens_saved", first["metadata"]["html_pruning"])
+        # 原始数据不被修改
+        self.assertNotIn("optimized", self.data["metadata"])
+
+    @patch("openai.OpenAI")
+    def test_optimize_records_usage(self, mock_openai):
+        """测试token用量和缓存命中写入optimize阶段指标"""
+        response = make_response("# 优化后")
+        response.usage.prompt_tokens = 120
+        response.usage.completion_tokens = 30
+        mock_openai.return_value.chat.completions.create.return_value = response
+
+        processor = LLMProcessor(api_key="key", llm_cache_path=self.cache_path)
+        first = processor.optimize_markdown(self.data)
+        second = processor.optimize_markdown(self.data)
+        processor.cache.close()
+
+        stats = first["metadata"]["metrics"]["optimize"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["prompt_tokens"], 120)
+        self.assertEqual(stats["completion_tokens"], 30)
+        self.assertFalse(stats["cache_hit"])
+        self.assertTrue(second["metadata"]["metrics"]["optimize"]["cache_hit"])
+        self.assertEqual(second["metadata"]["metrics"]["optimize"]["requests"], 0)
+
+    @patch("openai.OpenAI")
+    def test_static_prompt_prefix(self, mock_openai):
+        """测试系统消息固定不变，可变内容只出现在用户消息中"""
+        response = make_response("# 优化后")
+        response.usage.prompt_tokens = 300
+        response.usage.prompt_tokens_details.cached_tokens = 256
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.return_value = response
+
+        processor = LLMProcessor(api_key="key")
+        result = processor.optimize_markdown(self.data)
+        processor.optimize_markdown({"markdown": "# 另一篇", "html": ""})
+
+        first, second = (c.kwargs["messages"] for c in mock_create.call_args_list)
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(first[0]["role"], "system")
+        self.assertNotIn("# 标题", first[0]["content"])
+        self.assertIn("# 标题", first[1]["content"])
+        self.assertIn("# 另一篇", second[1]["content"])
+        self.assertEqual(
+            result["metadata"]["metrics"]["optimize"]["cached_tokens"], 256
+        )
+
+
+class TestStreaming(unittest.TestCase):
+    """测试流式优化"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "llm.sqlite3")
+        self.data = {"markdown": "# 标题", "html": "", "metadata": {}}
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    @patch("openai.OpenAI")
+    def test_stream_writes_pieces(self, mock_openai):
+        """测试片段按到达顺序写出，并记录首字节时间和token用量"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.side_effect = [make_stream(["# 优化", "后\n", "正文"], 80)]
+        processor = LLMProcessor(api_key="key", llm_cache_path=self.cache_path)
+
+        pieces = []
+        result = processor.optimize_markdown_stream(self.data, pieces.append)
+
+        self.assertEqual(pieces, ["# 优化", "后\n", "正文"])
+        self.assertEqual(result["markdown"], "# 优化后\n正文")
+        self.assertTrue(result["metadata"]["optimized"])
+        self.assertTrue(mock_create.call_args.kwargs["stream"])
+        stats = result["metadata"]["metrics"]["optimize"]
+        self.assertIn("ttfb_seconds", stats)
+        self.assertEqual(stats["prompt_tokens"], 80)
+
+        # 第二次命中响应缓存，一次写出完整内容
+        pieces = []
+        processor.optimize_markdown_stream(self.data, pieces.append)
+        processor.cache.close()
+        self.assertEqual(pieces, ["# 优化后\n正文"])
+        mock_create.assert_called_once()
+
+    @patch("openai.OpenAI")
+    def test_stream_failure_writes_original(self, mock_openai):
+        """测试开始输出前失败时写出原始markdown"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.side_effect = RuntimeError("boom")
+        processor = LLMProcessor(api_key="key")
+
+        pieces = []
+        result = processor.optimize_markdown_stream(self.data, pieces.append)
+
+        self.assertEqual(pieces, ["# 标题"])
+        self.assertEqual(result["markdown"], "# 标题")
+        self.assertNotIn("optimized", result["metadata"])
+
+
+class TestConvertStreaming(unittest.TestCase):
+    """测试命令行的流式输出"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp.name, "out", "page.md")
+        extractor = MagicMock()
+        extractor.extract.return_value = {
+            "markdown": "# 标题",
+            "html": "",
+            "metadata": {"url": "https://example.com"},
+        }
+        patcher = patch.object(main, "get_extractor", return_value=extractor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    def convert(self, output_file=None):
+        """流式转换示例URL"""
+        return main.convert_url_to_markdown(
+            "https://example.com",
+            output_file=output_file,
+            stream=True,
+            api_key="key",
+            llm_cache_path=None,
+        )
+
+    @patch("openai.OpenAI")
+    def test_stream_to_file(self, mock_openai):
+        """测试片段到达时已写入输出文件，保存阶段不再重写markdown"""
+        observed = []
+
+        def events():
+            for event in make_stream(["# 优化", "后\n", "正文"]):
+                yield event
+                if os.path.exists(self.output_file):
+                    with open(self.output_file, encoding="utf-8") as f:
+                        observed.append(f.read())
+
+        mock_openai.return_value.chat.completions.create.return_value = events()
+
+        with patch.object(
+            main, "write_result_files", wraps=main.write_result_files
+        ) as mock_write:
+            result = self.convert(self.output_file)
+
+        self.assertEqual(observed[:3], ["# 优化", "# 优化后\n", "# 优化后\n正文"])
+        self.assertFalse(mock_write.call_args.kwargs["write_markdown"])
+        with open(self.output_file, encoding="utf-8") as f:
+            self.assertEqual(f.read(), result["markdown"])
+        metadata_file = os.path.splitext(self.output_file)[0] + ".json"
+        with open(metadata_file, encoding="utf-8") as f:
+            self.assertTrue(json.load(f)["optimized"])
+
+    @patch("openai.OpenAI")
+    def test_stream_to_stdout(self, mock_openai):
+        """测试未指定输出文件时写到标准输出"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.return_value = make_stream(["# 优化", "后"])
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            result = self.convert()
+
+        self.assertEqual(stdout.getvalue(), "# 优化后")
+        self.assertEqual(result["markdown"], "# 优化后")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
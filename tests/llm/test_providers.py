@@ -0,0 +1,67 @@
+"""
+LLM提供者测试模块
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from src.llm.processor import LLMProcessor
+from src.llm.providers import DEFAULT_LOCAL_BASE_URL, LocalProvider, get_provider
+
+
+class TestProviders(unittest.TestCase):
+    """LLM提供者测试类"""
+
+    def test_get_provider(self):
+        """测试按名称创建提供者，不支持的名称抛出异常"""
+        self.assertIsInstance(get_provider("local"), LocalProvider)
+        with self.assertRaises(ValueError):
+            get_provider("unknown")
+        with self.assertRaises(ValueError):
+            LLMProcessor(provider="unknown")
+
+    @patch("openai.OpenAI")
+    def test_local_provider_client(self, mock_openai):
+        """测试本地提供者使用默认地址和占位密钥"""
+        processor = LLMProcessor(provider="local", model="qwen2.5-7b-instruct")
+        processor.client
+
+        mock_openai.assert_called_once_with(
+            api_key="local", base_url=DEFAULT_LOCAL_BASE_URL
+        )
+
+    @patch("openai.OpenAI")
+    def test_rules_provider(self, mock_openai):
+        """测试规则提供者不发送请求，批量优化结果确定"""
+        processor = LLMProcessor(provider="rules")
+        data = [
+            {"markdown": f"# 文档{i}\n\n\n### 小节\n* 项目", "html": "", "metadata": {}}
+            for i in range(3)
+        ]
+
+        results = asyncio.run(processor.optimize_batch(data))
+
+        mock_openai.assert_not_called()
+        self.assertEqual(results[1]["markdown"], "# 文档1\n\n## 小节\n\n- 项目")
+        self.assertEqual(results[1]["metadata"]["optimizer"], "rules")
+        self.assertTrue(results[1]["metadata"]["optimized"])
+
+    @patch("openai.OpenAI")
+    def test_rules_fallback(self, mock_openai):
+        """测试LLM请求失败时按规则优化"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.side_effect = RuntimeError("connection refused")
+        data = {"markdown": "# 标题\n\n\n#### 小节", "html": "", "metadata": {}}
+
+        without = LLMProcessor(provider="local").optimize_markdown(data)
+        result = LLMProcessor(provider="local", llm_fallback="rules").optimize_markdown(
+            data
+        )
+
+        self.assertIs(without, data)
+        self.assertEqual(result["markdown"], "# 标题\n\n## 小节")
+        self.assertEqual(result["metadata"]["optimizer"], "rules")
+
+
+if __name__ == "__main__":
+    unittest.main()
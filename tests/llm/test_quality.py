@@ -0,0 +1,120 @@
+"""
+markdown质量分析测试模块
+"""
+import unittest
+from unittest.mock import patch
+
+from src.llm.processor import LLMProcessor
+from src.llm.quality import (
+    DECISION_LLM,
+    DECISION_RULES,
+    DECISION_SKIP,
+    analyze_markdown,
+    decide,
+    optimization_ok,
+)
+from src.utils.metrics import STAGE_OPTIMIZE
+
+CLEAN = """# 标题
+
+这是第一段正文，链接指向[示例](https://example.com "示例")。
+
+## 小节
+
+| 名称 | 值 |
+| --- | --- |
+| a | 1 |
+
+```python
+print("# 不是标题")
+```
+"""
+
+
+class TestAnalyzeMarkdown(unittest.TestCase):
+    """质量分析测试类"""
+
+    def test_clean_markdown(self):
+        """测试规范的markdown没有问题且跳过优化"""
+        report = analyze_markdown(CLEAN)
+
+        self.assertEqual(report["score"], 1.0)
+        self.assertFalse(any(report["issues"].values()))
+        self.assertEqual(decide(report), DECISION_SKIP)
+
+    def test_rule_fixable_issues(self):
+        """测试标题跳级、未闭合代码块和连续重复段落由规则修复"""
+        paragraph = "连续重复出现的段落，长度超过重复检测的最短长度"
+        markdown = f"# 标题\n\n### 跳级\n\n{paragraph}\n\n{paragraph}\n\n```\ncode"
+        report = analyze_markdown(markdown)
+
+        self.assertEqual(report["issues"]["heading_skips"], 1)
+        self.assertEqual(report["issues"]["duplicate_blocks"], 1)
+        self.assertEqual(report["issues"]["unclosed_fences"], 1)
+        self.assertLess(report["score"], 1.0)
+        self.assertEqual(decide(report), DECISION_RULES)
+
+    def test_tables_and_links_need_llm(self):
+        """测试表格结构和链接问题在质量分低于阈值时交给LLM"""
+        markdown = "# 标题\n\n| a | b |\n| 1 | 2 | 3 |\n\n[空链接]()和[断开](https://a.com"
+        report = analyze_markdown(markdown)
+
+        self.assertEqual(report["issues"]["broken_tables"], 1)
+        self.assertEqual(report["issues"]["broken_links"], 2)
+        self.assertEqual(decide(report, llm_below=0.8), DECISION_LLM)
+        # 阈值为0时从不调用LLM
+        self.assertEqual(decide(report, llm_below=0), DECISION_SKIP)
+
+    def test_repeated_blocks(self):
+        """测试非连续的重复段落只计为repeated_blocks"""
+        paragraph = "页脚版权声明之类在页面中多次重复出现的文字内容"
+        report = analyze_markdown(f"{paragraph}\n\n正文\n\n{paragraph}")
+
+        self.assertEqual(report["issues"]["repeated_blocks"], 1)
+        self.assertEqual(report["issues"]["duplicate_blocks"], 0)
+
+
+class TestTriage(unittest.TestCase):
+    """LLM处理器质量分级测试类"""
+
+    @patch("openai.OpenAI")
+    def test_skip_and_rules_without_llm(self, mock_openai):
+        """测试规范的文档跳过优化，只有格式问题的按规则修复，均不调用LLM"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        processor = LLMProcessor(api_key="key", llm_triage=True)
+
+        skipped = processor.optimize_markdown({"markdown": CLEAN, "metadata": {}})
+        fixed = processor.optimize_markdown(
+            {"markdown": "# 标题\n\n### 跳级\n\n正文", "metadata": {}}
+        )
+
+        mock_create.assert_not_called()
+        self.assertEqual(skipped["markdown"], CLEAN)
+        self.assertFalse(skipped["metadata"]["optimized"])
+        self.assertEqual(skipped["metadata"]["quality"]["decision"], DECISION_SKIP)
+        self.assertTrue(optimization_ok(skipped))
+        self.assertEqual(fixed["markdown"], "# 标题\n\n## 跳级\n\n正文")
+        self.assertEqual(fixed["metadata"]["optimizer"], "rules")
+        self.assertEqual(
+            fixed["metadata"]["metrics"][STAGE_OPTIMIZE]["triage"], DECISION_RULES
+        )
+
+    @patch("openai.OpenAI")
+    def test_escalate_to_llm(self, mock_openai):
+        """测试有表格问题的文档交给LLM，并记录质量报告"""
+        mock_create = mock_openai.return_value.chat.completions.create
+        mock_create.return_value.choices[0].message.content = "# 优化后"
+        processor = LLMProcessor(api_key="key", llm_triage=True)
+
+        result = processor.optimize_markdown(
+            {"markdown": "| a | b |\n| 1 | 2 | 3 |", "metadata": {}}
+        )
+
+        mock_create.assert_called_once()
+        self.assertEqual(result["markdown"], "# 优化后")
+        self.assertEqual(result["metadata"]["quality"]["decision"], DECISION_LLM)
+        self.assertEqual(result["metadata"]["quality"]["issues"]["broken_tables"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+规则优化测试模块
+"""
+import unittest
+
+from src.llm.rules import rule_optimize
+
+
+class TestRuleOptimize(unittest.TestCase):
+    """规则优化测试类"""
+
+    def test_headings_and_blank_lines(self):
+        """测试修正标题跳级、去掉闭合的#并合并多余空行"""
+        markdown = "# 标题\n\n\n\n### 小节 ##\n正文\n\n#标签"
+        self.assertEqual(rule_optimize(markdown), "# 标题\n\n## 小节\n\n正文\n\n#标签")
+
+    def test_lists_and_duplicates(self):
+        """测试统一列表标记、保留分隔线并移除连续重复的段落"""
+        markdown = "* a\n+ b\n  * c\n\n* * *\n\n**粗体**\n\n重复\n\n重复"
+        self.assertEqual(
+            rule_optimize(markdown), "- a\n- b\n  - c\n\n* * *\n\n**粗体**\n\n重复"
+        )
+
+    def test_code_blocks_unchanged(self):
+        """测试代码块内容不变，未闭合的代码块被补全"""
+        markdown = "```py\n# 注释\n\n\n* x  \n```\n\n~~~\nopen"
+        self.assertEqual(
+            rule_optimize(markdown), "```py\n# 注释\n\n\n* x  \n```\n\n~~~\nopen\n~~~"
+        )
+
+    def test_deterministic(self):
+        """测试结果确定且重复整理不再变化"""
+        markdown = "## A\n\n#### B\n\n+ item\n\n\n\ntext"
+        once = rule_optimize(markdown)
+        self.assertEqual(once, rule_optimize(markdown))
+        self.assertEqual(once, rule_optimize(once))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+LLM请求调度测试模块
+"""
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import openai
+
+from src.llm.processor import LLMProcessor
+from src.llm.scheduler import RateLimiter, TokenBucket
+from tests.llm.test_processor import make_response
+
+
+def rate_limit_error(retry_after):
+    """构建带Retry-After响应头的429异常"""
+    response = MagicMock(status_code=429, headers={"retry-after": str(retry_after)})
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """测试令牌桶"""
+
+    def test_wait_time(self):
+        """测试配额耗尽后需要等待"""
+        bucket = TokenBucket(60)
+        self.assertEqual(bucket.wait_time(60), 0)
+        bucket.consume(60)
+        self.assertAlmostEqual(bucket.wait_time(1), 1.0, places=1)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """测试调度器"""
+
+    async def test_requests_per_minute(self):
+        """测试超过RPM配额后请求被延后"""
+        limiter = RateLimiter(max_concurrency=4, requests_per_minute=600)
+        limiter.requests.tokens = 1
+
+        start = time.monotonic()
+        for _ in range(2):
+            await limiter.acquire()
+            limiter.release()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    async def test_optimize_batch_retries_429(self):
+        """测试批量优化在429后按Retry-After重试"""
+        processor = LLMProcessor(api_key="key", llm_concurrency=2)
+        create = AsyncMock(
+            side_effect=[rate_limit_error(0.05)]
+            + [make_response(f"# 结果{i}") for i in range(3)]
+        )
+        processor._async_client = MagicMock()
+        processor._async_client.chat.completions.create = create
+
+        data = [{"markdown": f"# 文档{i}", "html": ""} for i in range(3)]
+        results = await processor.optimize_batch(data)
+
+        self.assertEqual(create.await_count, 4)
+        self.assertTrue(all(r["metadata"]["optimized"] for r in results))
+        self.assertEqual(
+            sorted(r["markdown"] for r in results), ["# 结果0", "# 结果1", "# 结果2"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
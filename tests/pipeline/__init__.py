@@ -0,0 +1,3 @@
+"""
+流水线测试包
+"""
@@ -0,0 +1,187 @@
+"""
+离线语料读取测试模块
+"""
+import gzip
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from src.extractors.local import LocalExtractor
+from src.pipeline.ingest import iter_pages, iter_warc
+from src.pipeline.runner import BatchPipeline
+
+PAGE = "<html><head><title>{title}</title></head><body><h1>{title}</h1></body></html>"
+
+
+def warc_record(record_type: str, url: str, content_type: str, block: bytes) -> bytes:
+    """构造一条WARC记录"""
+    headers = (
+        "WARC/1.0\r\n"
+        f"WARC-Type: {record_type}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "WARC-Date: 2024-01-01T00:00:00Z\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(block)}\r\n\r\n"
+    )
+    return headers.encode("utf-8") + block + b"\r\n\r\n"
+
+
+def http_response(status: int, content_type: str, body: bytes, extra="") -> bytes:
+    """构造HTTP响应报文"""
+    head = f"HTTP/1.1 {status} OK\r\nContent-Type: {content_type}\r\n{extra}\r\n"
+    return head.encode("latin-1") + body
+
+
+class TestIngest(unittest.TestCase):
+    """离线语料读取测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_warc(self) -> str:
+        gzipped = io.BytesIO()
+        with gzip.GzipFile(fileobj=gzipped, mode="wb") as f:
+            f.write(PAGE.format(title="Gzip").encode("utf-8"))
+        chunked = PAGE.format(title="Chunked").encode("utf-8")
+        chunked = b"%x\r\n%s\r\n0\r\n\r\n" % (len(chunked), chunked)
+
+        records = [
+            warc_record("warcinfo", "", "application/warc-fields", b"software: test"),
+            warc_record("request", "https://a.com/", "application/http", b"GET /"),
+            warc_record(
+                "response",
+                "https://a.com/",
+                "application/http; msgtype=response",
+                http_response(
+                    200,
+                    "text/html; charset=gbk",
+                    PAGE.format(title="中文").encode("gbk"),
+                ),
+            ),
+            warc_record(
+                "response",
+                "https://a.com/style.css",
+                "application/http; msgtype=response",
+                http_response(200, "text/css", b"body {}"),
+            ),
+            warc_record(
+                "response",
+                "https://a.com/missing",
+                "application/http; msgtype=response",
+                http_response(404, "text/html", PAGE.format(title="404").encode()),
+            ),
+            warc_record(
+                "response",
+                "https://b.com/",
+                "application/http; msgtype=response",
+                http_response(
+                    200,
+                    "text/html",
+                    gzipped.getvalue(),
+                    "Content-Encoding: gzip\r\n",
+                ),
+            ),
+            warc_record(
+                "response",
+                "https://c.com/",
+                "application/http; msgtype=response",
+                http_response(
+                    200, "text/html", chunked, "Transfer-Encoding: chunked\r\n"
+                ),
+            ),
+            warc_record(
+                "resource",
+                "https://d.com/",
+                "text/html",
+                PAGE.format(title="Resource").encode(),
+            ),
+        ]
+        path = os.path.join(self.root, "crawl.warc.gz")
+        # 按记录分别压缩，与常见的WARC文件一致
+        with open(path, "wb") as f:
+            for record in records:
+                f.write(gzip.compress(record))
+        return path
+
+    def test_iter_warc(self):
+        """测试只读取成功的HTML响应并还原编码"""
+        pages = list(iter_warc(self._write_warc()))
+
+        self.assertEqual(
+            [p["url"] for p in pages],
+            ["https://a.com/", "https://b.com/", "https://c.com/", "https://d.com/"],
+        )
+        self.assertIn("<title>中文</title>", pages[0]["html"])
+        self.assertIn("<title>Gzip</title>", pages[1]["html"])
+        self.assertIn("<title>Chunked</title>", pages[2]["html"])
+        self.assertEqual(pages[0]["metadata"]["fetched_at"], "2024-01-01T00:00:00Z")
+        self.assertEqual(pages[0]["metadata"]["status_code"], 200)
+
+    def test_max_page_bytes(self):
+        """测试跳过超过大小上限的记录"""
+        path = os.path.join(self.root, "large.warc")
+        with open(path, "wb") as f:
+            for url, size in (("https://big.com/", 5000), ("https://small.com/", 10)):
+                body = PAGE.format(title="x" * size).encode()
+                f.write(warc_record("resource", url, "text/html", body))
+
+        pages = list(iter_warc(path, max_page_bytes=1000))
+        self.assertEqual([p["url"] for p in pages], ["https://small.com/"])
+
+        # 单个HTML文件同样受大小上限约束
+        big_file = os.path.join(self.root, "big.html")
+        with open(big_file, "w", encoding="utf-8") as f:
+            f.write(PAGE.format(title="x" * 5000))
+        self.assertEqual(list(iter_pages([big_file], max_page_bytes=1000)), [])
+        self.assertEqual(len(list(iter_pages([big_file]))), 1)
+
+    def test_uppercase_gz_extension(self):
+        """测试扩展名大写的压缩WARC文件同样解压读取"""
+        path = self._write_warc()
+        upper = os.path.join(self.root, "CRAWL.WARC.GZ")
+        os.rename(path, upper)
+        self.assertEqual(len(list(iter_pages([upper]))), 4)
+
+    def test_iter_pages_archives_and_directory(self):
+        """测试流式读取tar.gz、zip和目录"""
+        pages_dir = os.path.join(self.root, "pages")
+        os.makedirs(pages_dir)
+        for name in ("a.html", "b.txt"):
+            with open(os.path.join(pages_dir, name), "w", encoding="utf-8") as f:
+                f.write(PAGE.format(title=name))
+
+        tar_path = os.path.join(self.root, "pages.tar.gz")
+        with tarfile.open(tar_path, "w:gz") as archive:
+            archive.add(pages_dir, arcname="pages")
+        zip_path = os.path.join(self.root, "pages.zip")
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("z.htm", PAGE.format(title="zip"))
+
+        pages = list(iter_pages([pages_dir, tar_path, zip_path]))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages[0]["url"], os.path.join(pages_dir, "a.html"))
+        self.assertEqual(pages[1]["url"], f"{tar_path}!/pages/a.html")
+        self.assertIn("<title>zip</title>", pages[2]["html"])
+
+    def test_pipeline_with_pages(self):
+        """测试已读取的页面直接进入流水线转换"""
+        pipeline = BatchPipeline(LocalExtractor(workers=1), extract_concurrency=2)
+        results = pipeline.run_sync(iter_pages([self._write_warc()]))
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]["markdown"], "# 中文")
+        self.assertEqual(results[3]["metadata"]["url"], "https://d.com/")
+        self.assertEqual(results[3]["metadata"]["fetched_at"], "2024-01-01T00:00:00Z")
+        self.assertEqual(results[3]["metadata"]["extractor"], "local")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+任务日志测试模块
+"""
+import glob
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from src.pipeline.journal import STAGE_DONE, STAGE_FAILED, JobJournal
+from src.pipeline.runner import BatchPipeline
+from src.pipeline.sinks import JsonlSink
+from tests.pipeline.test_runner import FakeExtractor, FakeProcessor
+
+
+class AbandonedJsonlSink(JsonlSink):
+    """关闭时不完成当前分片的测试输出，模拟进程在分片中途退出"""
+
+    def close(self):
+        if self._file is not None:
+            # 只释放文件句柄，不写出gzip尾部、不重命名、不报告
+            gz = self._file.buffer
+            raw, gz.fileobj = gz.fileobj, None
+            raw.close()
+            self._file = None
+
+
+class RecordingExtractor(FakeExtractor):
+    """记录被提取URL的测试提取器"""
+
+    def __init__(self, fail=()):
+        super().__init__()
+        self.fail = set(fail)
+        self.seen = []
+
+    async def extract_async(self, url):
+        self.seen.append(url)
+        if url in self.fail:
+            return {"markdown": "", "html": "", "metadata": {"url": url, "error": "x"}}
+        return await super().extract_async(url)
+
+
+class FallbackProcessor(FakeProcessor):
+    """对指定URL返回未优化内容的测试处理器，模拟LLM请求失败时的原文后备"""
+
+    def __init__(self, fail=()):
+        super().__init__()
+        self.fail = set(fail)
+
+    async def optimize_markdown_async(self, data):
+        if data["metadata"]["url"] in self.fail:
+            self.calls += 1
+            return data
+        return await super().optimize_markdown_async(data)
+
+
+class TestJobJournal(unittest.TestCase):
+    """测试任务日志"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal.jsonl")
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    def test_replay_ignores_truncated_line(self):
+        """测试回放时忽略不完整的最后一行"""
+        journal = JobJournal(self.path)
+        journal.record("https://a.com", STAGE_DONE, index=0, output="url_1.md")
+        journal.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"url": "https://b.com", "sta')
+
+        journal = JobJournal(self.path, resume=True)
+        self.assertTrue(journal.is_done("https://a.com"))
+        self.assertIsNone(journal.stage("https://b.com"))
+        journal.close()
+
+    def test_resume_skips_completed(self):
+        """测试恢复运行时只重新处理失败的URL"""
+        urls = ["https://a.com", "https://b.com", "https://c.com"]
+
+        journal = JobJournal(self.path)
+        extractor = RecordingExtractor(fail={"https://b.com"})
+        BatchPipeline(extractor, output_dir=self.tmp.name, journal=journal).run_sync(
+            urls
+        )
+        journal.close()
+        self.assertEqual(sorted(extractor.seen), urls)
+
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(journal.stage("https://b.com"), STAGE_FAILED)
+        extractor = RecordingExtractor()
+        results = BatchPipeline(
+            extractor, output_dir=self.tmp.name, journal=journal
+        ).run_sync(urls)
+        journal.close()
+
+        self.assertEqual(extractor.seen, ["https://b.com"])
+        self.assertEqual(len(results), 1)
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(set(journal.completed()), set(urls))
+        journal.close()
+
+    def test_resume_retries_failed_optimization(self):
+        """测试LLM优化失败的URL记为失败，恢复运行时重新处理"""
+        urls = ["https://a.com", "https://b.com"]
+
+        journal = JobJournal(self.path)
+        results = BatchPipeline(
+            FakeExtractor(),
+            processor=FallbackProcessor(fail={"https://b.com"}),
+            output_dir=self.tmp.name,
+            journal=journal,
+        ).run_sync(urls)
+        journal.close()
+        self.assertIn("error", results[1]["metadata"])
+
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(journal.stage("https://a.com"), STAGE_DONE)
+        self.assertEqual(journal.stage("https://b.com"), STAGE_FAILED)
+        extractor = RecordingExtractor()
+        results = BatchPipeline(
+            extractor,
+            processor=FallbackProcessor(),
+            output_dir=self.tmp.name,
+            journal=journal,
+        ).run_sync(urls)
+        journal.close()
+
+        self.assertEqual(extractor.seen, ["https://b.com"])
+        self.assertTrue(results[0]["markdown"].endswith("optimized"))
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(set(journal.completed()), set(urls))
+        journal.close()
+
+    def test_resume_after_abandoned_shard(self):
+        """测试分片中途退出后恢复运行，未写入磁盘的URL被重新处理，不丢失结果"""
+        urls = [f"https://example.com/{i}" for i in range(5)]
+        output_dir = os.path.join(self.tmp.name, "out")
+
+        journal = JobJournal(self.path)
+        sink = AbandonedJsonlSink(output_dir, shard_size=3)
+        BatchPipeline(FakeExtractor(), sink=sink, journal=journal).run_sync(urls)
+        journal.close()
+
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(len(journal.completed()), 3)
+        extractor = RecordingExtractor()
+        sink = JsonlSink(output_dir, shard_size=3)
+        BatchPipeline(extractor, sink=sink, journal=journal).run_sync(urls)
+        journal.close()
+
+        self.assertEqual(len(extractor.seen), 2)
+        written = []
+        for path in sorted(glob.glob(os.path.join(output_dir, "*.jsonl.gz"))):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                written.extend(json.loads(line)["url"] for line in f)
+        self.assertEqual(sorted(written), urls)
+        journal = JobJournal(self.path, resume=True)
+        self.assertEqual(set(journal.completed()), set(urls))
+        for record in journal.completed().values():
+            self.assertTrue(os.path.exists(record["output"].split("#")[0]))
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+批处理流水线测试模块
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.extractors.base import BaseExtractor
+from src.pipeline.journal import STAGE_DONE, STAGE_FAILED, JobJournal
+from src.pipeline.runner import BatchPipeline
+from src.pipeline.sinks import BaseSink
+from src.utils.metrics import MetricsRegistry
+
+
+class FakeExtractor(BaseExtractor):
+    """返回固定内容的测试提取器"""
+
+    def extract(self, url):
+        return {"markdown": f"# {url}", "html": "", "metadata": {"url": url}}
+
+    async def extract_async(self, url):
+        await asyncio.sleep(0)
+        if "empty" in url:
+            return {"markdown": "", "html": "", "metadata": {"url": url}}
+        return self.extract(url)
+
+    def extract_batch(self, urls):
+        return [self.extract(url) for url in urls]
+
+
+class FakeProcessor:
+    """在markdown后追加标记的测试处理器"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def optimize_markdown_async(self, data):
+        self.calls += 1
+        await asyncio.sleep(0)
+        markdown = data["markdown"] + " optimized"
+        metadata = {**data.get("metadata", {}), "optimized": True}
+        return {**data, "markdown": markdown, "metadata": metadata}
+
+
+class RaisingExtractor(FakeExtractor):
+    """对包含boom的URL抛出异常的测试提取器"""
+
+    async def extract_async(self, url):
+        if "boom" in url:
+            raise RuntimeError("extract boom")
+        return await super().extract_async(url)
+
+
+class RaisingProcessor(FakeProcessor):
+    """对包含llm-fail的页面抛出异常的测试处理器"""
+
+    async def optimize_markdown_async(self, data):
+        if "llm-fail" in data["markdown"]:
+            raise ValueError("llm boom")
+        return await super().optimize_markdown_async(data)
+
+
+class RaisingSink(BaseSink):
+    """对包含sink-fail的页面抛出异常的测试输出"""
+
+    def write(self, index, result):
+        if "sink-fail" in result["markdown"]:
+            raise TypeError("sink boom")
+        return f"mem#{index}"
+
+
+class TestBatchPipeline(unittest.TestCase):
+    """测试批处理流水线"""
+
+    def test_run_writes_and_keeps_order(self):
+        """测试结果按输入顺序返回并逐个写出"""
+        urls = [f"https://example.com/{i}" for i in range(10)] + ["https://empty.com"]
+        processor = FakeProcessor()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            pipeline = BatchPipeline(
+                FakeExtractor(),
+                processor=processor,
+                output_dir=output_dir,
+                extract_concurrency=3,
+                optimize_concurrency=2,
+            )
+            results = pipeline.run_sync(urls)
+
+            self.assertEqual([r["metadata"]["url"] for r in results], urls)
+            self.assertEqual(
+                results[0]["markdown"], "# https://example.com/0 optimized"
+            )
+            # 空markdown不会送入LLM
+            self.assertEqual(processor.calls, 10)
+            with open(os.path.join(output_dir, "url_3.md"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), "# https://example.com/2 optimized")
+
+    def test_stage_metrics(self):
+        """测试每个结果记录各阶段耗时，并汇总到指标注册表"""
+        registry = MetricsRegistry()
+        with tempfile.TemporaryDirectory() as output_dir:
+            pipeline = BatchPipeline(
+                FakeExtractor(),
+                processor=FakeProcessor(),
+                output_dir=output_dir,
+                registry=registry,
+            )
+            results = pipeline.run_sync(["https://a.com", "https://b.com"])
+
+        for result in results:
+            metrics = result["metadata"]["metrics"]
+            self.assertEqual(set(metrics), {"extract", "optimize", "save"})
+            self.assertGreaterEqual(metrics["save"]["seconds"], 0)
+        self.assertEqual(registry.get("stage_seconds", stage="extract"), 2)
+        self.assertEqual(registry.get("stage_total", stage="save", status="ok"), 2)
+
+    def test_item_failures_are_isolated(self):
+        """测试任一阶段的异常只让对应URL失败，其他URL照常完成"""
+        urls = [
+            "https://a.com",
+            "https://boom.com",
+            "https://llm-fail.com",
+            "https://sink-fail.com",
+            "https://b.com",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = JobJournal(os.path.join(tmp, "journal.jsonl"))
+            pipeline = BatchPipeline(
+                RaisingExtractor(),
+                processor=RaisingProcessor(),
+                sink=RaisingSink(tmp),
+                journal=journal,
+            )
+            results = pipeline.run_sync(urls)
+            stages = {url: journal.stage(url) for url in urls}
+            journal.close()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[1]["metadata"]["error"], "extract boom")
+        self.assertEqual(results[2]["metadata"]["error"], "llm boom")
+        self.assertEqual(stages["https://a.com"], STAGE_DONE)
+        self.assertEqual(stages["https://b.com"], STAGE_DONE)
+        for url in urls[1:4]:
+            self.assertEqual(stages[url], STAGE_FAILED)
+
+    def test_run_without_collecting(self):
+        """测试不收集结果时返回空列表"""
+        pipeline = BatchPipeline(FakeExtractor())
+        self.assertEqual(
+            pipeline.run_sync(["https://a.com"], collect_results=False), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
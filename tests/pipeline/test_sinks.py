@@ -0,0 +1,116 @@
+"""
+结果输出测试模块
+"""
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from src.pipeline.sinks import FileSink, JsonlSink, ParquetSink
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pq = None
+
+
+def make_result(i):
+    """构建测试结果"""
+    return {
+        "markdown": f"# {i}",
+        "html": f"<h1>{i}</h1>",
+        "metadata": {"url": f"https://example.com/{i}"},
+    }
+
+
+class TestSinks(unittest.TestCase):
+    """测试结果输出"""
+
+    def setUp(self):
+        """测试准备"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = self.tmp.name
+
+    def tearDown(self):
+        """清理临时目录"""
+        self.tmp.cleanup()
+
+    def test_file_sink(self):
+        """测试每个URL三个文件的输出"""
+        sink = FileSink(self.output_dir, save_html=True)
+        location = sink.write(0, make_result(0))
+        sink.close()
+
+        self.assertEqual(location, os.path.join(self.output_dir, "url_1.md"))
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            ["url_1.html", "url_1.json", "url_1.md"],
+        )
+
+    def test_jsonl_sink_shards(self):
+        """测试JSONL按分片大小切分，且新的运行不覆盖已有分片"""
+        sink = JsonlSink(self.output_dir, shard_size=2)
+        for i in range(3):
+            sink.write(i, make_result(i))
+        sink.close()
+
+        sink = JsonlSink(self.output_dir, shard_size=2)
+        location = sink.write(3, make_result(3))
+        sink.close()
+
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            [
+                "results-00000.jsonl.gz",
+                "results-00001.jsonl.gz",
+                "results-00002.jsonl.gz",
+            ],
+        )
+        self.assertTrue(location.endswith("results-00002.jsonl.gz#0"))
+        with gzip.open(
+            os.path.join(self.output_dir, "results-00000.jsonl.gz"),
+            "rt",
+            encoding="utf-8",
+        ) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(
+            [r["url"] for r in records],
+            ["https://example.com/0", "https://example.com/1"],
+        )
+        self.assertEqual(records[0]["html"], "")
+
+    def test_sharded_sink_commits_on_finish(self):
+        """测试分片写满或关闭前只存在.part临时文件，完成后才报告其中的记录"""
+        sink = JsonlSink(self.output_dir, shard_size=2)
+        committed = []
+        sink.on_commit = committed.extend
+        locations = [sink.write(i, make_result(i)) for i in range(3)]
+
+        self.assertEqual(committed, list(enumerate(locations[:2])))
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            ["results-00000.jsonl.gz", "results-00001.jsonl.gz.part"],
+        )
+        sink.close()
+        self.assertEqual(committed, list(enumerate(locations)))
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            ["results-00000.jsonl.gz", "results-00001.jsonl.gz"],
+        )
+
+    @unittest.skipIf(pq is None, "需要安装pyarrow")
+    def test_parquet_sink(self):
+        """测试Parquet输出"""
+        sink = ParquetSink(self.output_dir, save_html=True, buffer_size=2)
+        for i in range(5):
+            sink.write(i, make_result(i))
+        sink.close()
+
+        table = pq.read_table(os.path.join(self.output_dir, "results-00000.parquet"))
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column("html").to_pylist()[4], "<h1>4</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main()
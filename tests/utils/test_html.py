@@ -0,0 +1,74 @@
+"""
+HTML裁剪测试模块
+"""
+import unittest
+
+from src.utils.html import TRUNCATED_MARKER, prune_html
+
+SAMPLE_HTML = """
+<html>
+<head><title>标题</title><style>body { color: red; }</style></head>
+<body>
+  <nav class="menu"><a href="/">首页</a></nav>
+  <div role="banner">横幅</div>
+  <main class="content" data-track="1" onclick="track()">
+    <!-- 注释 -->
+    <h1 id="title" style="font-size: 2em">正文标题</h1>
+    <p>第一段 <a href="https://example.com" class="link">链接</a></p>
+    <img src="a.png" alt="图片" width="100">
+    <svg><path d="M0 0"/></svg>
+  </main>
+  <script>var x = 1;</script>
+  <footer>页脚</footer>
+</body>
+</html>
+"""
+
+
+class TestPruneHtml(unittest.TestCase):
+    """测试HTML裁剪"""
+
+    def test_removes_non_content(self):
+        """测试移除非正文节点和属性"""
+        result = prune_html(SAMPLE_HTML)
+        html = result["html"]
+
+        for removed in ["<script", "<style", "<svg", "<nav", "<footer", "横幅", "注释"]:
+            self.assertNotIn(removed, html)
+        for removed in ["class=", "style=", "data-track", "onclick", "width="]:
+            self.assertNotIn(removed, html)
+
+        self.assertIn("<h1>正文标题</h1>", html)
+        self.assertIn('<a href="https://example.com">链接</a>', html)
+        self.assertIn('<img alt="图片" src="a.png"/>', html)
+        self.assertLess(result["bytes_after"], result["bytes_before"])
+        self.assertFalse(result["truncated"])
+
+    def test_truncate(self):
+        """测试按字符数截断且不截断在标签中间"""
+        result = prune_html("<p>" + "内容" * 100 + "</p><p>结尾</p>", max_chars=50)
+        self.assertTrue(result["truncated"])
+        self.assertTrue(result["html"].endswith(TRUNCATED_MARKER))
+        self.assertLessEqual(len(result["html"]), 50 + len(TRUNCATED_MARKER))
+
+    def test_preserves_whitespace_in_pre_and_code(self):
+        """测试pre和code中的空白不被压缩"""
+        snippet = "def f():\n    return  1\n"
+        html = prune_html(
+            "<div>\n  <p>多个   空格</p>\n"
+            f"  <pre><code>{snippet}</code></pre>\n"
+            "  <p>行内 <code>a  =  b</code></p>\n</div>"
+        )["html"]
+
+        self.assertIn(f"<pre><code>{snippet}</code></pre>", html)
+        self.assertIn("<code>a  =  b</code>", html)
+        self.assertIn("<p>多个 空格</p>", html)
+        self.assertTrue(html.startswith("<div><p>"))
+
+    def test_empty(self):
+        """测试空HTML"""
+        self.assertEqual(prune_html("")["html"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
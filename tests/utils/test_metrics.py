@@ -0,0 +1,98 @@
+"""
+指标模块测试
+"""
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from src.utils.metrics import (
+    STAGE_EXTRACT,
+    STAGE_OPTIMIZE,
+    MetricsRegistry,
+    record_stage,
+    stage_metrics,
+    start_metrics_server,
+)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """指标注册表测试类"""
+
+    def test_render_counter_and_histogram(self):
+        """测试Prometheus文本格式渲染"""
+        registry = MetricsRegistry(buckets=(1, 5))
+        registry.inc("requests_total", help="请求数", stage="extract")
+        registry.inc("requests_total", 2, stage="extract")
+        registry.observe("stage_seconds", 0.5, stage="extract")
+        registry.observe("stage_seconds", 3, stage="extract")
+
+        text = registry.render()
+        self.assertIn("# TYPE web_agent_requests_total counter", text)
+        self.assertIn('web_agent_requests_total{stage="extract"} 3', text)
+        self.assertIn('web_agent_stage_seconds_bucket{stage="extract",le="1"} 1', text)
+        self.assertIn('web_agent_stage_seconds_bucket{stage="extract",le="5"} 2', text)
+        self.assertIn(
+            'web_agent_stage_seconds_bucket{stage="extract",le="+Inf"} 2', text
+        )
+        self.assertIn('web_agent_stage_seconds_sum{stage="extract"} 3.5', text)
+        self.assertEqual(registry.get("stage_seconds", stage="extract"), 2)
+
+    def test_write_and_serve(self):
+        """测试写出指标文件和/metrics端点"""
+        registry = MetricsRegistry()
+        registry.inc("pages_total")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "metrics.prom")
+            registry.write(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertIn("web_agent_pages_total 1", f.read())
+
+        # 默认只监听本机
+        server = start_metrics_server(0, registry=registry)
+        try:
+            host, port = server.server_address[:2]
+            self.assertEqual(host, "127.0.0.1")
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+                self.assertIn("web_agent_pages_total 1", resp.read().decode())
+        finally:
+            server.shutdown()
+
+
+class TestRecordStage(unittest.TestCase):
+    """阶段指标记录测试类"""
+
+    def test_record_stage(self):
+        """测试阶段指标写入元数据并汇总到注册表"""
+        registry = MetricsRegistry()
+        result = {"markdown": "# a", "metadata": {"url": "https://a.com"}}
+        stage_metrics(result, STAGE_EXTRACT).update(
+            {"retries": 2, "bytes_in": 100, "bytes_out": 10, "cache_hit": False}
+        )
+        stage_metrics(result, STAGE_OPTIMIZE).update(
+            {"prompt_tokens": 50, "completion_tokens": 20, "cached_tokens": 32}
+        )
+
+        record_stage(result, STAGE_EXTRACT, 0.25, registry=registry)
+        record_stage(result, STAGE_OPTIMIZE, 1.5, ok=False, registry=registry)
+
+        metrics = result["metadata"]["metrics"]
+        self.assertEqual(metrics["extract"]["seconds"], 0.25)
+        self.assertEqual(metrics["optimize"]["seconds"], 1.5)
+        self.assertEqual(registry.get("retries_total", stage="extract"), 2)
+        self.assertEqual(
+            registry.get("bytes_total", stage="extract", direction="in"), 100
+        )
+        self.assertEqual(registry.get("llm_tokens_total", type="prompt"), 50)
+        self.assertEqual(registry.get("llm_tokens_total", type="cached"), 32)
+        self.assertEqual(
+            registry.get("cache_requests_total", stage="extract", result="miss"), 1
+        )
+        self.assertEqual(
+            registry.get("stage_total", stage="optimize", status="error"), 1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
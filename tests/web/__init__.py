@@ -0,0 +1,3 @@
+"""
+Web应用测试包
+"""
@@ -0,0 +1,306 @@
+"""
+Web应用接口测试模块
+"""
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import fitz
+
+from src.web.engine import TOOL_VERSIONS, ParseEngine
+from src.web.jobs import JobQueue
+from src.web.storage import ResultCache
+from src.web.store import PreferenceStore
+
+# 应用模块导入时在当前目录下创建uploads和results，在临时目录中导入
+web_app = None
+_module_dir = tempfile.TemporaryDirectory()
+
+
+def setUpModule():
+    global web_app
+    cwd = os.getcwd()
+    os.chdir(_module_dir.name)
+    try:
+        web_app = importlib.import_module("src.web.app")
+    finally:
+        os.chdir(cwd)
+
+
+def tearDownModule():
+    _module_dir.cleanup()
+
+
+def make_pdf(page_count):
+    """生成每页带有页码文本的PDF"""
+    with fitz.open() as doc:
+        for number in range(1, page_count + 1):
+            doc.new_page().insert_text((72, 72), f"page {number} text")
+        return doc.tobytes()
+
+
+class AppTestCase(unittest.TestCase):
+    """使用临时目录中的缓存、存储和任务队列的测试基类"""
+
+    TOOLS = ["pypdf2", "pdfminer"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, "uploads")
+        os.makedirs(self.uploads)
+        self.store = PreferenceStore(os.path.join(self.tmp.name, "prefs.sqlite3"))
+        self.cache = ResultCache(os.path.join(self.tmp.name, "parsed"))
+        self.jobs = self.make_jobs()
+        for name, value in (
+            ("UPLOAD_FOLDER", self.uploads),
+            ("PAGE_WINDOW", 2),
+            ("engine", ParseEngine(workers=1)),
+            ("cache", self.cache),
+            ("store", self.store),
+            ("jobs", self.jobs),
+        ):
+            patcher = patch.object(web_app, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = web_app.app.test_client()
+
+    def make_jobs(self):
+        """创建任务队列"""
+        return JobQueue(web_app.parse_job, workers=1)
+
+    def tearDown(self):
+        self.jobs.close()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def upload(self, pdf, tools=None, **fields):
+        """上传PDF，返回响应"""
+        data = {"file": (io.BytesIO(pdf), "doc.pdf"), **fields}
+        if not fields:
+            data["tools"] = tools or self.TOOLS
+        return self.client.post(
+            "/upload", data=data, content_type="multipart/form-data"
+        )
+
+    def wait_done(self, job_id):
+        """等待后台任务结束，返回任务状态接口的响应数据"""
+        job = self.jobs.get(job_id)
+        version = -1
+        while not job.finished:
+            version, _ = job.wait(version, 5)
+        return self.client.get(f"/jobs/{job_id}").get_json()
+
+
+class TestPagination(AppTestCase):
+    """测试首屏解析和分页接口"""
+
+    def setUp(self):
+        super().setUp()
+        response = self.upload(make_pdf(5))
+        self.assertEqual(response.status_code, 202)
+        self.upload_id = response.get_json()["file_id"]
+        self.status = self.wait_done(self.upload_id)
+        self.file_hash = self.status["result"]["file_hash"]
+
+    def cached(self, number):
+        """第number页的pypdf2输出是否已缓存"""
+        version = TOOL_VERSIONS["pypdf2"]
+        return self.cache.get_page(self.file_hash, "pypdf2", version, number)
+
+    def test_first_window(self):
+        """测试上传后只解析首屏的页面"""
+        self.assertEqual(self.status["state"], "done")
+        result = self.status["result"]
+        self.assertEqual(result["page_count"], 5)
+        self.assertEqual(result["next_page"], 3)
+        self.assertEqual(result["pages_url"], f"/uploads/{self.upload_id}/pages")
+        text = result["tool1"]["result"]
+        self.assertIn("page 2 text", text)
+        self.assertNotIn("page 3 text", text)
+        self.assertEqual([r["tool"] for r in result["results"]], self.TOOLS)
+        self.assertIsNone(self.cached(3))
+
+    def test_pages_parsed_on_demand(self):
+        """测试分页接口按需解析首屏以外的页面，并返回下一页页码"""
+        url = f"/uploads/{self.upload_id}/pages"
+
+        response = self.client.get(url, query_string={"start": 3, "count": 2})
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([page["page"] for page in data["pages"]], [3, 4])
+        self.assertEqual(data["next_page"], 5)
+        self.assertIn("page 3 text", data["pages"][0]["results"]["pypdf2"])
+        self.assertEqual(set(data["pages"][0]["results"]), set(self.TOOLS))
+        self.assertIsNotNone(self.cached(4))
+        self.assertIsNone(self.cached(5))
+
+        data = self.client.get(
+            url, query_string={"start": 5, "count": 10, "tool": "pdfminer"}
+        ).get_json()
+        self.assertEqual([page["page"] for page in data["pages"]], [5])
+        self.assertEqual(list(data["pages"][0]["results"]), ["pdfminer"])
+        self.assertIsNone(data["next_page"])
+
+    def test_page_errors(self):
+        """测试上传记录不存在、PDF被删除和PDF损坏时返回JSON错误"""
+        url = f"/uploads/{self.upload_id}/pages?start=3"
+        pdf_path = os.path.join(self.uploads, f"{self.file_hash}.pdf")
+
+        response = self.client.get("/uploads/missing/pages")
+        self.assertEqual(response.status_code, 404)
+
+        with open(pdf_path, "wb") as f:
+            f.write(b"not a pdf")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["error"], "Failed to read PDF")
+
+        os.remove(pdf_path)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()["error"], "PDF file not found")
+
+        # 已缓存的页面不需要读取PDF
+        response = self.client.get(f"/uploads/{self.upload_id}/pages?start=1")
+        self.assertEqual(response.status_code, 200)
+
+
+class TestJobs(AppTestCase):
+    """测试后台解析任务的提交、排队和进度事件"""
+
+    def make_jobs(self):
+        # 任务汇报进度后阻塞，直到测试放行
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+        def handler(job, file_hash, pdf_path, tools):
+            job.progress(1, 2)
+            self.started.set()
+            self.gate.wait(5)
+            return {"file_hash": file_hash, "tools": tools}
+
+        return JobQueue(handler, workers=1, max_pending=1)
+
+    def tearDown(self):
+        self.gate.set()
+        super().tearDown()
+
+    def test_upload_returns_job_immediately(self):
+        """测试上传在解析完成前返回202和任务ID"""
+        response = self.upload(make_pdf(1), tool1="openai", tool2="claude")
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(data["cached"])
+        self.assertEqual(data["status_url"], f"/jobs/{data['job_id']}")
+        self.assertTrue(self.started.wait(5))
+        status = self.client.get(data["status_url"]).get_json()
+        self.assertEqual(status["state"], "running")
+        self.assertNotIn("result", status)
+        self.assertEqual(
+            self.store.get_upload(data["file_id"])["tools"], ["openai", "claude"]
+        )
+
+        self.gate.set()
+        self.assertEqual(
+            self.wait_done(data["job_id"])["result"]["tools"], ["openai", "claude"]
+        )
+
+    def test_queue_full(self):
+        """测试等待中的任务数达到上限时返回503和Retry-After"""
+        self.assertEqual(self.upload(make_pdf(1)).status_code, 202)
+        self.assertTrue(self.started.wait(5))
+        self.assertEqual(self.upload(make_pdf(2)).status_code, 202)
+
+        response = self.upload(make_pdf(3))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], str(web_app.JOB_RETRY_AFTER))
+        self.assertIn("error", response.get_json())
+
+    def test_events(self):
+        """测试事件流先推送进度，任务完成后推送done事件并结束"""
+        job_id = self.upload(make_pdf(1)).get_json()["job_id"]
+        self.assertTrue(self.started.wait(5))
+
+        response = self.client.get(f"/jobs/{job_id}/events", buffered=False)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        chunks = iter(response.response)
+        events = [next(chunks)]
+        self.gate.set()
+        events.extend(chunks)
+        response.close()
+
+        parsed = []
+        for event in events:
+            event = event.decode() if isinstance(event, bytes) else event
+            name, data = event.strip().split("\n")
+            parsed.append((name[len("event: ") :], json.loads(data[len("data: ") :])))
+        self.assertEqual(parsed[0][0], "progress")
+        self.assertEqual(parsed[0][1]["pages_done"], 1)
+        self.assertEqual(parsed[0][1]["page_count"], 2)
+        self.assertEqual(parsed[-1][0], "done")
+        self.assertEqual(parsed[-1][1]["state"], "done")
+
+
+class TestVotes(AppTestCase):
+    """测试投票和排行榜接口"""
+
+    def setUp(self):
+        super().setUp()
+        self.upload_id = "u1"
+        self.store.add_upload(self.upload_id, "hash", ["openai", "claude"])
+
+    def vote(self, chosen_tool, file_id=None):
+        """提交投票，返回响应"""
+        return self.client.post(
+            "/save_choice",
+            json={"file_id": file_id or self.upload_id, "chosen_tool": chosen_tool},
+        )
+
+    def test_positional_choice(self):
+        """测试两栏页面提交的tool1/tool2按上传的工具顺序映射"""
+        response = self.vote("tool2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"status": "success"})
+        self.assertEqual(self.store.get_upload(self.upload_id)["winner"], "claude")
+
+    def test_second_vote(self):
+        """测试重复提交相同选择返回成功，不同选择返回409和已保存的选择"""
+        self.assertEqual(self.vote("openai").status_code, 200)
+        self.assertEqual(self.vote("tool1").status_code, 200)
+
+        response = self.vote("claude")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()["chosen_tool"], "openai")
+        board = {entry["tool"]: entry for entry in self.store.leaderboard()}
+        self.assertEqual(board["openai"]["wins"], 1)
+
+    def test_invalid_votes(self):
+        """测试上传不存在返回404，工具不在本次比较中返回400"""
+        self.assertEqual(self.vote("openai", file_id="missing").status_code, 404)
+        self.assertEqual(self.vote("pypdf2").status_code, 400)
+        self.assertIsNone(self.store.get_upload(self.upload_id)["winner"])
+
+    def test_leaderboard(self):
+        """测试排行榜返回工具名称、胜负数和Elo分"""
+        self.assertEqual(
+            self.client.get("/leaderboard").get_json(), {"leaderboard": []}
+        )
+        self.vote("claude")
+
+        board = self.client.get("/leaderboard").get_json()["leaderboard"]
+        self.assertEqual([entry["tool"] for entry in board], ["claude", "openai"])
+        self.assertEqual(board[0]["name"], web_app.TOOLS["claude"])
+        self.assertEqual((board[0]["wins"], board[0]["losses"]), (1, 0))
+        self.assertEqual((board[1]["wins"], board[1]["losses"]), (0, 1))
+        self.assertGreater(board[0]["rating"], board[1]["rating"])
+        self.assertEqual(board[0]["win_rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
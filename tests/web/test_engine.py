@@ -0,0 +1,78 @@
+"""
+PDF解析引擎测试模块
+"""
+import os
+import tempfile
+import unittest
+
+import fitz
+
+from src.web.engine import ParseEngine, format_page, preview_text
+
+
+class TestParseEngine(unittest.TestCase):
+    """PDF解析引擎测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "doc.pdf")
+        with fitz.open() as doc:
+            for number in range(1, 6):
+                doc.new_page().insert_text((72, 72), f"page {number} text")
+            doc.save(self.pdf_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_extract_in_process(self):
+        """测试多个工具按页格式化同一份逐页文本"""
+        pages = ParseEngine(workers=1).extract_pages(self.pdf_path)
+
+        self.assertEqual(len(pages), 5)
+        self.assertTrue(
+            format_page("pypdf2", 5, pages[4]).startswith(
+                "Page 5 (PyPDF2):\npage 5 text"
+            )
+        )
+        self.assertTrue(
+            format_page("openai", 1, pages[0]).startswith("Page 1 (OpenAI)")
+        )
+        self.assertTrue(preview_text(pages).startswith("page 1 text"))
+
+    def test_process_pool_matches_serial(self):
+        """测试按页段分发到进程池的结果与串行提取一致且顺序不变"""
+        serial = ParseEngine(workers=1).extract_pages(self.pdf_path)
+        engine = ParseEngine(workers=2, pages_per_task=2)
+        try:
+            pages = engine.extract_pages(self.pdf_path)
+        finally:
+            engine.close()
+
+        self.assertEqual(pages, serial)
+
+    def test_page_range(self):
+        """测试只提取指定范围的页面，进度按范围内页数汇报"""
+        progress = []
+        engine = ParseEngine(workers=2, pages_per_task=1)
+        try:
+            pages = engine.extract_pages(
+                self.pdf_path, lambda done, total: progress.append((done, total)), 1, 4
+            )
+        finally:
+            engine.close()
+
+        self.assertEqual(
+            [text.strip() for text in pages],
+            ["page 2 text", "page 3 text", "page 4 text"],
+        )
+        self.assertEqual(progress[-1], (3, 3))
+        self.assertEqual(ParseEngine.page_count(self.pdf_path), 5)
+
+    def test_unknown_tool(self):
+        """测试不支持的解析工具"""
+        with self.assertRaises(ValueError):
+            format_page("unknown", 1, "text")
+
+
+if __name__ == "__main__":
+    unittest.main()
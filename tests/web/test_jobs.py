@@ -0,0 +1,75 @@
+"""
+后台任务队列测试模块
+"""
+import threading
+import unittest
+
+from src.web.jobs import JOB_DONE, JOB_FAILED, JobQueue, QueueFull
+
+
+class TestJobQueue(unittest.TestCase):
+    """后台任务队列测试类"""
+
+    def test_progress_and_result(self):
+        """测试进度更新可被订阅者看到，结束后保存结果"""
+
+        def handler(job, total):
+            for done in range(1, total + 1):
+                job.progress(done, total)
+            return {"pages": total}
+
+        jobs = JobQueue(handler, workers=1)
+        job = jobs.submit("a", 3)
+
+        version, seen = -1, []
+        while True:
+            version, status = job.wait(version, timeout=5)
+            seen.append(status)
+            if status["state"] == JOB_DONE:
+                break
+        jobs.close()
+
+        self.assertEqual(job.result, {"pages": 3})
+        self.assertEqual(seen[-1]["pages_done"], 3)
+        self.assertEqual(seen[-1]["page_count"], 3)
+        self.assertIs(jobs.get("a"), job)
+
+    def test_failure(self):
+        """测试处理函数异常时任务失败并记录错误"""
+
+        def handler(job):
+            raise RuntimeError("损坏的PDF")
+
+        jobs = JobQueue(handler, workers=1)
+        job = jobs.submit("a")
+        jobs.close()
+
+        self.assertEqual(job.state, JOB_FAILED)
+        self.assertEqual(job.error, "损坏的PDF")
+
+    def test_backpressure(self):
+        """测试等待中的任务数达到上限时拒绝新任务"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def handler(job):
+            started.set()
+            release.wait(5)
+            return {}
+
+        jobs = JobQueue(handler, workers=1, max_pending=1)
+        jobs.submit("running")
+        started.wait(5)
+        jobs.submit("pending")
+
+        with self.assertRaises(QueueFull):
+            jobs.submit("rejected")
+        self.assertIsNone(jobs.get("rejected"))
+
+        release.set()
+        jobs.close()
+        self.assertEqual(jobs.get("pending").state, JOB_DONE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+上传文件和解析结果存储测试模块
+"""
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.web.storage import ResultCache, save_upload
+
+
+class TestStorage(unittest.TestCase):
+    """上传文件和解析结果存储测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_upload_dedup(self):
+        """测试相同内容的上传只保存一份，文件名为内容哈希"""
+        data = b"%PDF-1.4 test" * 1000
+        first = save_upload(io.BytesIO(data), self.root)
+        second = save_upload(io.BytesIO(data), self.root)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], hashlib.sha256(data).hexdigest())
+        self.assertEqual(os.listdir(self.root), [f"{first[0]}.pdf"])
+
+    def test_result_cache_pages(self):
+        """测试逐页缓存，新版本替换同一工具的旧版本结果"""
+        cache = ResultCache(os.path.join(self.root, "parsed"))
+        file_hash = "ab" * 32
+        cache.put_meta(file_hash, {"page_count": 3, "preview": "p"})
+        cache.put_page(file_hash, "openai", "1", 1, "v1 page 1")
+        cache.put_page(file_hash, "claude", "1", 1, "claude page 1")
+
+        self.assertEqual(cache.get_meta(file_hash)["page_count"], 3)
+        self.assertEqual(cache.get_page(file_hash, "openai", "1", 1), "v1 page 1")
+        self.assertIsNone(cache.get_page(file_hash, "openai", "1", 2))
+        self.assertIsNone(cache.get_meta("cd" * 32))
+
+        cache.put_page(file_hash, "openai", "2", 2, "v2 page 2")
+        self.assertIsNone(cache.get_page(file_hash, "openai", "1", 1))
+        self.assertEqual(cache.get_page(file_hash, "openai", "2", 2), "v2 page 2")
+        self.assertEqual(cache.get_page(file_hash, "claude", "1", 1), "claude page 1")
+
+    def test_failed_write_leaves_no_temp_file(self):
+        """测试写入失败时删除临时文件"""
+        cache = ResultCache(os.path.join(self.root, "parsed"))
+        file_hash = "ab" * 32
+        with self.assertRaises(UnicodeEncodeError):
+            cache.put_page(file_hash, "openai", "1", 1, "bad \ud800")
+
+        directory = os.path.join(self.root, "parsed", "ab", file_hash, "openai@1")
+        self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
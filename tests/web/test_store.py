@@ -0,0 +1,134 @@
+"""
+偏好存储测试模块
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from src.web.store import INITIAL_RATING, PreferenceStore
+
+
+class TestPreferenceStore(unittest.TestCase):
+    """偏好存储测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "preferences.sqlite3")
+        self.store = PreferenceStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_vote_updates_leaderboard(self):
+        """测试投票增量更新Elo分和胜负数，每次上传只计第一次投票"""
+        self.store.add_upload("u1", "hash", ["openai", "claude", "pypdf2"])
+
+        self.assertEqual(self.store.record_vote("u1", "claude"), (True, "claude"))
+        self.assertEqual(self.store.record_vote("u1", "openai"), (False, "claude"))
+
+        board = {entry["tool"]: entry for entry in self.store.leaderboard()}
+        self.assertEqual(self.store.leaderboard()[0]["tool"], "claude")
+        self.assertEqual(board["claude"]["wins"], 2)
+        self.assertEqual(board["openai"]["losses"], 1)
+        self.assertEqual(board["pypdf2"]["win_rate"], 0.0)
+        self.assertGreater(board["claude"]["rating"], INITIAL_RATING)
+        self.assertAlmostEqual(
+            sum(entry["rating"] for entry in board.values()), 3 * INITIAL_RATING, 0
+        )
+        self.assertEqual(self.store.get_upload("u1")["winner"], "claude")
+
+    def test_vote_independent_of_tool_order(self):
+        """测试三个以上工具时分数变化与工具顺序无关"""
+        boards = []
+        for name, tools in (
+            ("a", ["openai", "claude", "pypdf2"]),
+            ("b", ["pypdf2", "claude", "openai"]),
+        ):
+            store = PreferenceStore(os.path.join(self.tmp.name, f"{name}.sqlite3"))
+            store.add_upload("u0", "hash", ["openai", "claude"])
+            store.record_vote("u0", "openai")
+            store.add_upload("u1", "hash", tools)
+            store.record_vote("u1", "claude")
+            boards.append(store.leaderboard())
+            store.close()
+
+        self.assertEqual(boards[0], boards[1])
+
+    def test_invalid_votes(self):
+        """测试不存在的上传和不在比较中的工具"""
+        self.store.add_upload("u1", "hash", ["openai", "claude"])
+
+        with self.assertRaises(KeyError):
+            self.store.record_vote("missing", "openai")
+        with self.assertRaises(ValueError):
+            self.store.record_vote("u1", "pdfminer")
+
+    def test_output_chars_accumulate(self):
+        """测试按需分批解析时输出字符数累加，而不是被最后一批覆盖"""
+        self.store.add_output("hash", "openai", "1", 12, 100)
+        self.store.add_output("hash", "openai", "1", 12, 40)
+        self.store.add_output("hash", "claude", "1", 12, 70)
+
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT tool, page_count, chars FROM outputs ORDER BY tool"
+            ).fetchall()
+        conn.close()
+        self.assertEqual(rows, [("claude", 12, 70), ("openai", 12, 140)])
+
+    def test_import_legacy(self):
+        """测试导入旧版本结果文件中的投票，重复导入不会重复计票"""
+        legacy = os.path.join(self.tmp.name, "results")
+        os.makedirs(legacy)
+        records = {
+            "old1": {"tools": ["openai", "claude"], "user_choice": "tool2"},
+            "old2": {"tools": ["claude", "pypdf2"], "user_choice": "claude"},
+            "old3": {"tools": ["openai", "pypdf2"]},
+        }
+        for upload_id, record in records.items():
+            with open(os.path.join(legacy, f"{upload_id}.json"), "w") as f:
+                json.dump({"id": upload_id, **record}, f)
+        with open(os.path.join(legacy, "broken.json"), "w") as f:
+            f.write("{")
+
+        self.assertEqual(self.store.import_legacy(legacy), 2)
+        self.assertEqual(self.store.import_legacy(legacy), 0)
+
+        board = {entry["tool"]: entry for entry in self.store.leaderboard()}
+        self.assertEqual(board["claude"]["wins"], 2)
+        self.assertEqual(board["openai"]["losses"], 1)
+        self.assertEqual(self.store.get_upload("old1")["winner"], "claude")
+        self.assertIsNone(self.store.get_upload("old3")["winner"])
+
+    def test_concurrent_votes(self):
+        """测试多个连接并发投票不丢失更新"""
+        for index in range(40):
+            self.store.add_upload(f"u{index}", "hash", ["openai", "claude"])
+        stores = [PreferenceStore(self.path) for _ in range(4)]
+
+        def vote(store, offset):
+            for index in range(offset, 40, len(stores)):
+                store.record_vote(f"u{index}", "openai")
+
+        threads = [
+            threading.Thread(target=vote, args=(store, offset))
+            for offset, store in enumerate(stores)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for store in stores:
+            store.close()
+
+        board = {entry["tool"]: entry for entry in self.store.leaderboard()}
+        self.assertEqual(board["openai"]["wins"], 40)
+        self.assertEqual(board["claude"]["losses"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()